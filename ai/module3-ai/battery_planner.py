@@ -0,0 +1,247 @@
+"""
+Battery Schedule Planner for Vesta Energy Orchestrator
+Plans battery charge/discharge over the whole forecast horizon instead of
+hour by hour, so the battery is not drained just before a price peak.
+
+The planner runs a dynamic program over a discretized state-of-charge
+grid. Every hour, the cost of moving from each SoC level to every other
+level is evaluated as one NumPy array, so a 48-hour plan takes a few
+milliseconds. The objective uses the same cost/carbon weighting as
+SourceOptimizer.calculate_combined_score.
+"""
+
+import numpy as np
+from typing import Dict, Optional
+
+
+class BatteryPlanner:
+    """
+    Cost/carbon-optimal battery schedule over a forecast horizon
+
+    Per hour the household load is met by solar first, then by battery
+    discharge and the grid. The battery can be charged from excess solar
+    or (optionally) from the grid. Energy is never exported, so discharge
+    is limited to the load not covered by solar.
+    """
+
+    def __init__(self,
+                 battery_capacity: float = 10.0,  # kWh
+                 max_discharge: float = 2.0,  # kW
+                 max_charge: float = 2.0,  # kW
+                 min_soc_fraction: float = 0.10,
+                 charge_efficiency: float = 0.95,
+                 cycle_cost: float = 0.10,  # ₹/kWh
+                 solar_cost: float = 0.05,  # ₹/kWh
+                 solar_carbon: float = 50.0,  # gCO2eq/kWh
+                 cost_weight: float = 0.5,
+                 carbon_weight: float = 0.5,
+                 soc_step: float = 0.1,  # kWh
+                 allow_grid_charging: bool = True):
+        """
+        Initialize the planner
+
+        Args:
+            battery_capacity: Battery storage capacity (kWh)
+            max_discharge: Maximum battery discharge rate (kW)
+            max_charge: Maximum battery charge rate, measured at the input (kW)
+            min_soc_fraction: Lowest state of charge discharge may reach (0-1)
+            charge_efficiency: Fraction of charged energy that is stored (0-1)
+            cycle_cost: Degradation cost per kWh charged or discharged (₹)
+            solar_cost: Solar maintenance cost per kWh used (₹)
+            solar_carbon: Solar lifecycle emissions (gCO2eq/kWh)
+            cost_weight: Weight for cost in the objective (0-1)
+            carbon_weight: Weight for carbon in the objective (0-1)
+            soc_step: Resolution of the state-of-charge grid (kWh)
+            allow_grid_charging: Allow charging the battery from the grid
+        """
+        self.battery_capacity = battery_capacity
+        self.max_discharge = max_discharge
+        self.max_charge = max_charge
+        self.min_soc_fraction = min_soc_fraction
+        self.charge_efficiency = charge_efficiency
+        self.cycle_cost = cycle_cost
+        self.solar_cost = solar_cost
+        self.solar_carbon = solar_carbon
+        self.cost_weight = cost_weight
+        self.carbon_weight = carbon_weight
+        self.allow_grid_charging = allow_grid_charging
+
+        n_states = int(round(battery_capacity / soc_step)) + 1
+        self.soc_levels = np.linspace(0.0, battery_capacity, n_states)
+
+        # Transition (i -> j) quantities are independent of the hour
+        delta = self.soc_levels[None, :] - self.soc_levels[:, None]
+        self._charge_in = np.where(delta > 0, delta / charge_efficiency, 0.0)
+        self._discharge = np.where(delta < 0, -delta, 0.0)
+        tolerance = 1e-9
+        self._rate_ok = ((self._charge_in <= max_charge + tolerance) &
+                         (self._discharge <= max_discharge + tolerance))
+        # Discharging may not go below the floor; charging from below it is fine
+        floor = battery_capacity * min_soc_fraction
+        self._floor_ok = (delta >= 0) | (self.soc_levels[None, :] >= floor - tolerance)
+
+    @classmethod
+    def from_optimizer(cls, optimizer, **kwargs) -> 'BatteryPlanner':
+        """Build a planner with the battery and weights of a SourceOptimizer"""
+        params = {
+            'battery_capacity': optimizer.battery_capacity,
+            'max_discharge': optimizer.battery_max_discharge,
+            'max_charge': optimizer.battery_max_discharge,
+            'cycle_cost': optimizer.battery_cycle_cost,
+            'solar_cost': optimizer.solar_maintenance_cost,
+            'cost_weight': optimizer.cost_weight,
+            'carbon_weight': optimizer.carbon_weight,
+        }
+        params.update(kwargs)
+        return cls(**params)
+
+    def combined(self, cost, carbon):
+        """Weighted objective (1 kg CO2 = ₹10, as in SourceOptimizer)"""
+        return self.cost_weight * cost + self.carbon_weight * (carbon / 1000) * 10
+
+    def _snap(self, soc: float) -> int:
+        """Index of the grid level closest to a state of charge"""
+        soc = min(max(soc, 0.0), self.battery_capacity)
+        return int(np.abs(self.soc_levels - soc).argmin())
+
+    def plan(self,
+             demand,
+             grid_price,
+             carbon_intensity,
+             solar_available,
+             initial_soc: float,
+             terminal_price: Optional[float] = None) -> Dict:
+        """
+        Compute the optimal charge/discharge schedule
+
+        Args:
+            demand: Forecast demand per hour (kWh)
+            grid_price: Grid price per hour (₹/kWh)
+            carbon_intensity: Grid carbon intensity per hour (gCO2eq/kWh)
+            solar_available: Solar energy available per hour (kWh)
+            initial_soc: Current battery charge (kWh)
+            terminal_price: Combined value of one kWh left in the battery at
+                            the end of the horizon (default: the horizon's
+                            mean grid rate, so the plan does not simply
+                            empty the battery in the last hour)
+
+        Returns:
+            Dictionary with per-hour arrays (soc, charge, discharge, grid,
+            solar_used, cost, carbon) and totals
+        """
+        demand = np.asarray(demand, dtype=float)
+        grid_price = np.broadcast_to(np.asarray(grid_price, dtype=float), demand.shape)
+        carbon_intensity = np.broadcast_to(np.asarray(carbon_intensity, dtype=float), demand.shape)
+        solar_available = np.broadcast_to(np.asarray(solar_available, dtype=float), demand.shape)
+        n_hours = len(demand)
+
+        net_load = demand - solar_available
+        load = np.maximum(net_load, 0.0)
+        excess = np.maximum(-net_load, 0.0)
+        solar_used = np.minimum(demand, solar_available)
+
+        grid_rate = self.combined(grid_price, carbon_intensity)
+        if terminal_price is None:
+            terminal_price = float(grid_rate.mean()) if n_hours else 0.0
+
+        # value[j]: best objective from hour t onwards when starting at level j
+        value = -terminal_price * self.soc_levels
+        policy = np.zeros((n_hours, len(self.soc_levels)), dtype=np.int64)
+        cycle = self.cycle_cost * (self._charge_in + self._discharge)
+
+        for t in range(n_hours - 1, -1, -1):
+            from_solar = np.minimum(self._charge_in, excess[t])
+            from_grid = self._charge_in - from_solar
+            grid = load[t] - self._discharge + from_grid
+
+            feasible = self._rate_ok & self._floor_ok & (self._discharge <= load[t] + 1e-9)
+            if not self.allow_grid_charging:
+                feasible &= from_grid <= 1e-9
+
+            stage = self.cost_weight * cycle + grid * grid_rate[t]
+            total = np.where(feasible, stage + value[None, :], np.inf)
+            policy[t] = total.argmin(axis=1)
+            value = total[np.arange(len(self.soc_levels)), policy[t]]
+
+        # Roll the policy forward from the current charge
+        states = np.zeros(n_hours + 1, dtype=np.int64)
+        states[0] = self._snap(initial_soc)
+        for t in range(n_hours):
+            states[t + 1] = policy[t, states[t]]
+
+        soc = self.soc_levels[states]
+        charge_in = self._charge_in[states[:-1], states[1:]]
+        discharge = self._discharge[states[:-1], states[1:]]
+        charge_from_solar = np.minimum(charge_in, excess)
+        charge_from_grid = charge_in - charge_from_solar
+
+        return self._schedule('dp', soc, solar_used, charge_from_solar,
+                              charge_from_grid, discharge, load, grid_price,
+                              carbon_intensity)
+
+    def greedy_plan(self,
+                    demand,
+                    grid_price,
+                    carbon_intensity,
+                    solar_available,
+                    initial_soc: float) -> Dict:
+        """
+        Hour-by-hour heuristic with the same output as plan()
+
+        Discharges whenever the grid is more expensive than cycling the
+        battery and stores excess solar, like SourceOptimizer.optimize_source.
+        Used as the fallback when the dynamic program cannot run.
+        """
+        demand = np.asarray(demand, dtype=float)
+        grid_price = np.broadcast_to(np.asarray(grid_price, dtype=float), demand.shape)
+        carbon_intensity = np.broadcast_to(np.asarray(carbon_intensity, dtype=float), demand.shape)
+        solar_available = np.broadcast_to(np.asarray(solar_available, dtype=float), demand.shape)
+        n_hours = len(demand)
+
+        load = np.maximum(demand - solar_available, 0.0)
+        excess = np.maximum(solar_available - demand, 0.0)
+        solar_used = np.minimum(demand, solar_available)
+        battery_better = self.cost_weight * self.cycle_cost < self.combined(grid_price, carbon_intensity)
+
+        floor = self.battery_capacity * self.min_soc_fraction
+        soc = np.zeros(n_hours + 1)
+        discharge = np.zeros(n_hours)
+        charge_from_solar = np.zeros(n_hours)
+        soc[0] = min(max(initial_soc, 0.0), self.battery_capacity)
+        for t in range(n_hours):
+            level = soc[t]
+            if battery_better[t]:
+                discharge[t] = min(self.max_discharge, max(0.0, level - floor), load[t])
+                level -= discharge[t]
+            room = (self.battery_capacity - level) / self.charge_efficiency
+            charge_from_solar[t] = min(excess[t], self.max_charge, room)
+            soc[t + 1] = level + charge_from_solar[t] * self.charge_efficiency
+
+        return self._schedule('greedy', soc, solar_used, charge_from_solar,
+                              np.zeros(n_hours), discharge, load, grid_price,
+                              carbon_intensity)
+
+    def _schedule(self, method, soc, solar_used, charge_from_solar,
+                  charge_from_grid, discharge, load, grid_price,
+                  carbon_intensity) -> Dict:
+        """Per-hour energy flows, cost and carbon for a state-of-charge path"""
+        grid = load - discharge + charge_from_grid
+        solar_total = solar_used + charge_from_solar
+        cost = (grid * grid_price + solar_total * self.solar_cost +
+                (charge_from_solar + charge_from_grid + discharge) * self.cycle_cost)
+        carbon = grid * carbon_intensity + solar_total * self.solar_carbon
+
+        return {
+            'method': method,
+            'soc': soc,
+            'charge_from_solar': charge_from_solar,
+            'charge_from_grid': charge_from_grid,
+            'discharge': discharge,
+            'grid': grid,
+            'solar_used': solar_used,
+            'cost': cost,
+            'carbon': carbon,
+            'total_cost': float(cost.sum()),
+            'total_carbon': float(carbon.sum()),
+            'objective': float(self.combined(cost, carbon).sum()),
+        }
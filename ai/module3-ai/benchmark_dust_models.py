@@ -0,0 +1,97 @@
+"""
+Solar Dust Model Benchmark for Vesta Energy Orchestrator
+Compares fit time and accuracy of the SolarDustPredictor model types
+
+Each dataset size is simulated afresh by SolarDustDataGenerator, so the
+test rows are new readings rather than noisy copies of training rows.
+Every model type is trained on the first 80% of the rows and scored on
+the latest 20% (time-ordered split).
+
+Classic gradient boosting is sequential and grows one exact tree per
+stage, so it is skipped above --max-sequential-rows.
+
+Usage:
+    python benchmark_dust_models.py --rows 1000000 10000000 --n-jobs -1 --seed 42
+"""
+
+import os
+import time
+import argparse
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+
+from generate_solar_dust_data import SolarDustDataGenerator
+from train_solar_dust_model import SolarDustPredictor
+
+MODEL_TYPES = ['random_forest', 'gradient_boosting', 'hist_gradient_boosting']
+
+
+def generate_dataset(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Simulate `rows` consecutive readings (same seed, same dataset)"""
+    return SolarDustDataGenerator(seed=seed).generate_solar_dust_dataset(rows=rows)
+
+
+def benchmark(df: pd.DataFrame, model_types, n_jobs: int = -1, test_size: float = 0.2,
+              max_sequential_rows: int = 1_000_000) -> list:
+    """Fit every model type on the same time-ordered split; returns result rows"""
+    X, y = SolarDustPredictor().prepare_features(df)
+    split = int(len(X) * (1 - test_size))
+
+    results = []
+    for model_type in model_types:
+        row = {'rows': len(df), 'model_type': model_type, 'n_jobs': n_jobs}
+        if model_type == 'gradient_boosting' and len(df) > max_sequential_rows:
+            results.append({**row, 'status': 'skipped'})
+            continue
+
+        predictor = SolarDustPredictor(model_type, n_jobs=n_jobs)
+        start = time.perf_counter()
+        predictor.fit(X[:split], y[:split])
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predicted = predictor.model.predict(X[split:])
+        predict_seconds = time.perf_counter() - start
+
+        results.append({
+            **row,
+            'status': 'ok',
+            'fit_seconds': round(fit_seconds, 2),
+            'predict_seconds': round(predict_seconds, 2),
+            'test_mae': round(float(mean_absolute_error(y[split:], predicted)), 4),
+        })
+        print(f"  {model_type:<24} fit {fit_seconds:>8.2f}s  MAE {results[-1]['test_mae']:.3f}% dust")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark solar dust model types')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--models', nargs='+', choices=MODEL_TYPES, default=MODEL_TYPES)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-sequential-rows', type=int, default=1_000_000)
+    parser.add_argument('--output', default='models/benchmarks/dust_models.csv')
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU cores")
+
+    results = []
+    for rows in args.rows:
+        print(f"\nSimulating {rows:,} rows...")
+        results.extend(benchmark(generate_dataset(rows, args.seed), args.models, n_jobs=args.n_jobs,
+                                 max_sequential_rows=args.max_sequential_rows))
+
+    table = pd.DataFrame(results)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    table.to_csv(args.output, index=False)
+
+    print("\n" + "=" * 70)
+    print("BENCHMARK RESULTS")
+    print("=" * 70)
+    print(table.to_string(index=False))
+    print(f"\n✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,160 @@
 """
 Master Data Collection Script for Vesta Energy Orchestrator
 Runs all data collection scripts and generates a comprehensive dataset for Module 3
+
+Partitioned mode (--partitioned) simulates long histories for many sites:
+the time range is cut into chunks per site, chunks are generated and
+integrated on a process pool, and every chunk is written as its own
+Parquet file (CSV if pyarrow is not installed):
+
+    data/partitioned/<dataset>/site_id=<site>/part-<chunk>.parquet
 """
 
+import io
 import os
 import sys
+import argparse
+import contextlib
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 
 # Add module3-ai to path
 sys.path.append(os.path.dirname(__file__))
 
 from collect_weather_data import WeatherDataCollector
 from collect_carbon_data import CarbonIntensityCollector
+from async_collection import collect_realtime
 from generate_energy_data import EnergyConsumptionGenerator
 from generate_sensor_data import SensorDataGenerator
 
 
+DATASETS = ['weather', 'carbon', 'energy', 'sensor', 'integrated']
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def integrate_partition(datasets: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Integrated hourly dataset for one partition (same columns as
+    MasterDataCollector.create_integrated_dataset)
+
+    The inputs are sorted by timestamp and joined with merge_asof: each
+    hour takes the latest weather, carbon and sensor values at or before
+    it, up to 59 minutes old. Gaps are filled within the partition only.
+    """
+    tolerance = pd.Timedelta(minutes=59)
+    df = datasets['energy'].sort_values('timestamp')
+
+    weather = datasets['weather']
+    weather_columns = ['timestamp', 'temperature', 'humidity'] + [
+        col for col in ['cloud_cover', 'wind_speed', 'solar_radiation_proxy', 'solar_radiation']
+        if col in weather.columns
+    ]
+    df = pd.merge_asof(df, weather[weather_columns].sort_values('timestamp'),
+                       on='timestamp', tolerance=tolerance, suffixes=('', '_weather'))
+
+    carbon = datasets['carbon'][['timestamp', 'carbon_intensity', 'renewable_percentage',
+                                 'grid_price_per_kwh']]
+    df = pd.merge_asof(df, carbon.sort_values('timestamp'), on='timestamp', tolerance=tolerance)
+
+    # Aggregate sensor data to hourly (from 5-min intervals)
+    sensor = datasets['sensor']
+    sensor_hourly = sensor.groupby(sensor['timestamp'].dt.floor('h')).agg({
+        'ldr_lux': 'mean',
+        'current_a': 'mean',
+        'power_w': 'mean',
+        'indoor_temperature_c': 'mean',
+        'indoor_humidity_pct': 'mean'
+    }).reset_index()
+    df = pd.merge_asof(df, sensor_hourly, on='timestamp', tolerance=tolerance)
+
+    # Add calculated features
+    df['energy_cost'] = df['total_energy_kwh'] * df['grid_price_per_kwh']
+    df['carbon_footprint'] = df['total_energy_kwh'] * df['carbon_intensity'] / 1000  # kg CO2
+
+    return df.ffill().bfill()
+
+
+def _write_partition(df: pd.DataFrame, output_dir: str, dataset: str, site_id: str,
+                     chunk: int, fmt: str) -> str:
+    directory = os.path.join(output_dir, dataset, f'site_id={site_id}')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'part-{chunk:05d}.{fmt}')
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def _generate_chunk(task: Dict) -> Dict:
+    """
+    Generate, integrate and write one (site, chunk) partition
+    (runs in a worker process)
+    """
+    days = task['days']
+    end = pd.Timestamp(task['end'])
+
+    # The generators draw from NumPy's global random state
+    np.random.seed(task['seed'])
+    with contextlib.redirect_stdout(io.StringIO()):
+        datasets = {
+            'weather': WeatherDataCollector().collect_historical_data(days=days),
+            'carbon': CarbonIntensityCollector().collect_historical_carbon_data(days=days),
+            'energy': EnergyConsumptionGenerator().generate_complete_dataset(days=days),
+            'sensor': SensorDataGenerator().generate_complete_sensor_dataset(days=days),
+        }
+
+    # Place the chunk on its slot of the timeline (same hour of day as
+    # generated, so daily patterns line up)
+    hourly = pd.date_range(end=end, periods=days * 24, freq='h')
+    for name in ['weather', 'carbon', 'energy']:
+        datasets[name]['timestamp'] = hourly
+    energy = datasets['energy']
+    energy['day_of_week'] = energy['timestamp'].dt.dayofweek
+    energy['is_weekend'] = energy['day_of_week'] >= 5
+    datasets['sensor']['timestamp'] = pd.date_range(
+        end=end + pd.Timedelta(minutes=55), periods=days * 24 * 12, freq='5min')
+
+    datasets['integrated'] = integrate_partition(datasets)
+
+    rows = {}
+    paths = {}
+    for name, df in datasets.items():
+        df.insert(0, 'site_id', task['site_id'])
+        paths[name] = _write_partition(df, task['output_dir'], name, task['site_id'],
+                                       task['chunk'], task['format'])
+        rows[name] = len(df)
+    return {'site_id': task['site_id'], 'chunk': task['chunk'], 'rows': rows, 'paths': paths}
+
+
+def read_partitioned(output_dir: str, dataset: str = 'integrated',
+                     sites: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a partitioned dataset back, sorted by site and timestamp"""
+    root = os.path.join(output_dir, dataset)
+    frames = []
+    for site_dir in sorted(os.listdir(root)):
+        if sites is not None and site_dir.split('=', 1)[-1] not in sites:
+            continue
+        for name in sorted(os.listdir(os.path.join(root, site_dir))):
+            path = os.path.join(root, site_dir, name)
+            if name.endswith('.parquet'):
+                frames.append(pd.read_parquet(path))
+            else:
+                frames.append(pd.read_csv(path, parse_dates=['timestamp']))
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values(['site_id', 'timestamp'], kind='stable').reset_index(drop=True)
+
+
 class MasterDataCollector:
     """
     Orchestrates all data collection and generation for the ai model
@@ -45,10 +183,15 @@ class MasterDataCollector:
             freq='h'
         )
         
+        # Current values and forecasts of both APIs are fetched concurrently
+        weather_collector = WeatherDataCollector()
+        carbon_collector = CarbonIntensityCollector()
+        realtime = collect_realtime(weather_collector, carbon_collector,
+                                    forecast_days=5, forecast_hours=24)
+        
         # 1. Weather Data
         print("\n[1/4] Collecting Weather Data...")
         print("-" * 70)
-        weather_collector = WeatherDataCollector()
         weather_historical = weather_collector.collect_historical_data(days=self.days)
         # Align timestamps
         weather_historical['timestamp'] = common_timestamps
@@ -56,17 +199,14 @@ class MasterDataCollector:
         datasets['weather'] = weather_historical
         print(f"✓ Weather data collected: {len(weather_historical)} records")
         
-        # Also get current weather and forecast
-        current_weather = weather_collector.get_current_weather()
-        forecast_weather = weather_collector.get_forecast(days=5)
-        forecast_df = pd.DataFrame(forecast_weather)
+        # Also save the weather forecast
+        forecast_df = pd.DataFrame(realtime['weather_forecast'])
         weather_collector.save_to_csv(forecast_df, 'weather_forecast.csv')
         print(f"✓ Weather forecast collected: {len(forecast_df)} records")
         
         # 2. Carbon Intensity Data
         print("\n[2/4] Collecting Carbon Intensity Data...")
         print("-" * 70)
-        carbon_collector = CarbonIntensityCollector()
         carbon_historical = carbon_collector.collect_historical_carbon_data(days=self.days)
         # Align timestamps
         carbon_historical['timestamp'] = common_timestamps
@@ -74,10 +214,8 @@ class MasterDataCollector:
         datasets['carbon'] = carbon_historical
         print(f"✓ Carbon intensity data collected: {len(carbon_historical)} records")
         
-        # Also get current and forecast
-        current_carbon = carbon_collector.get_current_carbon_intensity()
-        forecast_carbon = carbon_collector.get_forecast_carbon_intensity(hours=24)
-        forecast_carbon_df = pd.DataFrame(forecast_carbon)
+        # Also save the carbon forecast
+        forecast_carbon_df = pd.DataFrame(realtime['carbon_forecast'])
         carbon_collector.save_to_csv(forecast_carbon_df, 'carbon_forecast.csv')
         print(f"✓ Carbon forecast collected: {len(forecast_carbon_df)} records")
         
@@ -115,6 +253,72 @@ class MasterDataCollector:
         
         return datasets, integrated_df
 
+    def collect_partitioned(self,
+                            sites: int = 1,
+                            chunk_days: int = 30,
+                            max_workers: Optional[int] = None,
+                            output_dir: str = 'data/partitioned',
+                            fmt: Optional[str] = None,
+                            seed: int = 42) -> Dict:
+        """
+        Simulate self.days of data for every site as partitioned files
+        
+        The range is cut into chunks of chunk_days per site. Each chunk is
+        generated and integrated (merge_asof) in a worker process and
+        written as its own file, so memory stays bounded by one chunk and
+        the work spreads over all cores. Every chunk has its own seed, so
+        the output does not depend on the pool size.
+        
+        Args:
+            sites: Number of simulated sites (site-000, site-001, ...)
+            chunk_days: Days per partition
+            max_workers: Process pool size (default: CPU count)
+            output_dir: Root directory of the partitioned datasets
+            fmt: 'parquet' or 'csv' (default: parquet if pyarrow is installed)
+            seed: Base random seed
+            
+        Returns:
+            Dictionary with the partition count and rows per dataset
+        """
+        fmt = fmt or ('parquet' if parquet_available() else 'csv')
+        if fmt == 'parquet' and not parquet_available():
+            raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow)")
+        
+        end = datetime.now().replace(minute=0, second=0, microsecond=0)
+        chunks = []
+        remaining = self.days
+        while remaining > 0:
+            days = min(chunk_days, remaining)
+            chunks.append((end - timedelta(days=self.days - remaining), days))
+            remaining -= days
+        chunks.reverse()  # oldest first
+        
+        seeds = np.random.SeedSequence(seed).spawn(sites * len(chunks))
+        tasks = [{
+            'site_id': f'site-{site:03d}',
+            'chunk': chunk,
+            'end': chunk_end.isoformat(),
+            'days': days,
+            'seed': int(seeds[site * len(chunks) + chunk].generate_state(1)[0]),
+            'output_dir': output_dir,
+            'format': fmt,
+        } for site in range(sites) for chunk, (chunk_end, days) in enumerate(chunks)]
+        
+        print(f"Generating {self.days} days x {sites} site(s) as {len(tasks)} {fmt} partitions...")
+        max_workers = max_workers or os.cpu_count() or 1
+        if max_workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_generate_chunk, tasks))
+        else:
+            results = [_generate_chunk(task) for task in tasks]
+        
+        rows = {name: sum(r['rows'][name] for r in results) for name in DATASETS}
+        print(f"✓ {len(results)} partitions written to: {output_dir}")
+        for name in DATASETS:
+            print(f"  {name:<12} {rows[name]:>12,} records")
+        
+        return {'partitions': len(results), 'format': fmt, 'output_dir': output_dir, 'rows': rows}
+
     def create_integrated_dataset(self, datasets: dict) -> pd.DataFrame:
         """
         Combine all datasets into a single integrated dataset
@@ -243,8 +447,25 @@ def main():
     """
     Main execution function
     """
+    parser = argparse.ArgumentParser(description='Collect and generate training data')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--partitioned', action='store_true',
+                        help='Simulate chunked, partitioned data on a process pool')
+    parser.add_argument('--sites', type=int, default=1)
+    parser.add_argument('--chunk-days', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--format', choices=['parquet', 'csv'], default=None)
+    parser.add_argument('--output-dir', default='data/partitioned')
+    args = parser.parse_args()
+    
     # Collect 30 days of data by default
-    collector = MasterDataCollector(days=30)
+    collector = MasterDataCollector(days=args.days)
+    if args.partitioned:
+        collector.collect_partitioned(sites=args.sites, chunk_days=args.chunk_days,
+                                      max_workers=args.workers, output_dir=args.output_dir,
+                                      fmt=args.format)
+        print(f"All datasets saved in: {os.path.abspath(args.output_dir)}")
+        return
     datasets, integrated_df = collector.collect_all_datasets()
     
     print("Data collection completed successfully!")
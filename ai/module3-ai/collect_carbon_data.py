@@ -33,54 +33,64 @@ class CarbonIntensityCollector:
         else:
             self.use_mock = False
     
+    def current_intensity_request(self):
+        """URL, query parameters and headers of the current intensity request"""
+        return (f"{self.base_url}/carbon-intensity/latest",
+                {'zone': self.zone}, {'auth-token': self.api_key})
+    
+    def parse_current_intensity(self, data: Dict) -> Dict:
+        """Convert an Electricity Maps response to the current intensity record"""
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'zone': self.zone,
+            'carbon_intensity': data.get('carbonIntensity', 500),  # gCO2eq/kWh
+            'fossil_fuel_percentage': data.get('fossilFuelPercentage', 70),
+            'renewable_percentage': data.get('renewablePercentage', 30)
+        }
+    
     def get_current_carbon_intensity(self) -> Dict:
         """Get current carbon intensity of the electricity grid"""
         if self.use_mock:
             return self._generate_mock_current_intensity()
         
-        url = f"{self.base_url}/carbon-intensity/latest"
-        headers = {'auth-token': self.api_key}
-        params = {'zone': self.zone}
+        url, params, headers = self.current_intensity_request()
         
         try:
             response = requests.get(url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'zone': self.zone,
-                'carbon_intensity': data.get('carbonIntensity', 500),  # gCO2eq/kWh
-                'fossil_fuel_percentage': data.get('fossilFuelPercentage', 70),
-                'renewable_percentage': data.get('renewablePercentage', 30)
-            }
+            return self.parse_current_intensity(response.json())
         except Exception as e:
             print(f"Error fetching carbon intensity: {e}")
             return self._generate_mock_current_intensity()
     
+    def forecast_intensity_request(self):
+        """URL, query parameters and headers of the forecast request"""
+        return (f"{self.base_url}/carbon-intensity/forecast",
+                {'zone': self.zone}, {'auth-token': self.api_key})
+    
+    def parse_forecast_intensity(self, data: Dict, hours: int = 24) -> List[Dict]:
+        """Convert an Electricity Maps response to forecast records (first N hours)"""
+        forecast_data = []
+        for item in data.get('forecast', [])[:hours]:
+            forecast_data.append({
+                'timestamp': item['datetime'],
+                'carbon_intensity': item['carbonIntensity'],
+                'zone': self.zone
+            })
+        
+        return forecast_data
+    
     def get_forecast_carbon_intensity(self, hours: int = 24) -> List[Dict]:
         """Get forecasted carbon intensity for next N hours"""
         if self.use_mock:
             return self._generate_mock_forecast_intensity(hours)
         
-        url = f"{self.base_url}/carbon-intensity/forecast"
-        headers = {'auth-token': self.api_key}
-        params = {'zone': self.zone}
+        url, params, headers = self.forecast_intensity_request()
         
         try:
             response = requests.get(url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            
-            forecast_data = []
-            for item in data.get('forecast', [])[:hours]:
-                forecast_data.append({
-                    'timestamp': item['datetime'],
-                    'carbon_intensity': item['carbonIntensity'],
-                    'zone': self.zone
-                })
-            
-            return forecast_data
+            return self.parse_forecast_intensity(response.json(), hours)
         except Exception as e:
             print(f"Error fetching carbon forecast: {e}")
             return self._generate_mock_forecast_intensity(hours)
@@ -54,12 +54,9 @@ class WeatherDataCollector:
         self.minutely_params = minutely_params or self.DEFAULT_MINUTELY_PARAMS
         self.hourly_params = hourly_params or self.DEFAULT_HOURLY_PARAMS
     
-    def get_current_weather(self) -> Dict:
-        """Get current weather data using Open-Meteo's high-resolution 15-minute data"""
-        if self.use_mock:
-            return self._generate_mock_current_weather()
-        
-        params = {
+    def current_weather_params(self) -> Dict:
+        """Query parameters of the current weather request"""
+        return {
             'latitude': self.lat,
             'longitude': self.lon,
             # High-resolution 15-minute data for immediate optimization
@@ -69,40 +66,44 @@ class WeatherDataCollector:
             'timezone': 'auto',
             'forecast_days': 1
         }
+    
+    def parse_current_weather(self, data: Dict) -> Dict:
+        """Convert an Open-Meteo response to the current weather record"""
+        # Extract the first (current) 15-minute data point
+        minutely = data.get('minutely_15', {})
+        daily = data.get('daily', {})
+        
+        # Get current index (first value is most recent)
+        idx = 0
+        
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'temperature': minutely['temperature_2m'][idx] if 'temperature_2m' in minutely else 25.0,
+            'humidity': minutely['relative_humidity_2m'][idx] if 'relative_humidity_2m' in minutely else 65.0,
+            'shortwave_radiation': minutely['shortwave_radiation'][idx] if 'shortwave_radiation' in minutely else 0.0,
+            'direct_radiation': minutely['direct_radiation'][idx] if 'direct_radiation' in minutely else 0.0,
+            'diffuse_radiation': minutely['diffuse_radiation'][idx] if 'diffuse_radiation' in minutely else 0.0,
+            'wind_speed': minutely['wind_speed_10m'][idx] if 'wind_speed_10m' in minutely else 2.0,
+            'sunrise': daily['sunrise'][0] if 'sunrise' in daily else datetime.now().replace(hour=6, minute=0).isoformat(),
+            'sunset': daily['sunset'][0] if 'sunset' in daily else datetime.now().replace(hour=18, minute=30).isoformat()
+        }
+    
+    def get_current_weather(self) -> Dict:
+        """Get current weather data using Open-Meteo's high-resolution 15-minute data"""
+        if self.use_mock:
+            return self._generate_mock_current_weather()
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = requests.get(self.base_url, params=self.current_weather_params(), timeout=10)
             response.raise_for_status()
-            data = response.json()
-            
-            # Extract the first (current) 15-minute data point
-            minutely = data.get('minutely_15', {})
-            daily = data.get('daily', {})
-            
-            # Get current index (first value is most recent)
-            idx = 0
-            
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'temperature': minutely['temperature_2m'][idx] if 'temperature_2m' in minutely else 25.0,
-                'humidity': minutely['relative_humidity_2m'][idx] if 'relative_humidity_2m' in minutely else 65.0,
-                'shortwave_radiation': minutely['shortwave_radiation'][idx] if 'shortwave_radiation' in minutely else 0.0,
-                'direct_radiation': minutely['direct_radiation'][idx] if 'direct_radiation' in minutely else 0.0,
-                'diffuse_radiation': minutely['diffuse_radiation'][idx] if 'diffuse_radiation' in minutely else 0.0,
-                'wind_speed': minutely['wind_speed_10m'][idx] if 'wind_speed_10m' in minutely else 2.0,
-                'sunrise': daily['sunrise'][0] if 'sunrise' in daily else datetime.now().replace(hour=6, minute=0).isoformat(),
-                'sunset': daily['sunset'][0] if 'sunset' in daily else datetime.now().replace(hour=18, minute=30).isoformat()
-            }
+            return self.parse_current_weather(response.json())
         except Exception as e:
             print(f"Error fetching current weather from Open-Meteo: {e}")
             return self._generate_mock_current_weather()
     
-    def get_forecast(self, days: int = 3) -> List[Dict]:
-        """Get weather forecast for next N days using Open-Meteo"""
-        if self.use_mock:
-            return self._generate_mock_forecast(days)
-        
-        params = {
+    def forecast_params(self, days: int = 3) -> Dict:
+        """Query parameters of the forecast request"""
+        return {
             'latitude': self.lat,
             'longitude': self.lon,
             # Hourly data for longer-term planning
@@ -110,30 +111,37 @@ class WeatherDataCollector:
             'timezone': 'auto',
             'forecast_days': days
         }
+    
+    def parse_forecast(self, data: Dict) -> List[Dict]:
+        """Convert an Open-Meteo response to hourly forecast records"""
+        hourly = data.get('hourly', {})
+        times = hourly.get('time', [])
+        
+        forecast_data = []
+        for i in range(len(times)):
+            forecast_data.append({
+                'timestamp': times[i],
+                'temperature': hourly['temperature_2m'][i] if 'temperature_2m' in hourly else 25.0,
+                'humidity': hourly['relative_humidity_2m'][i] if 'relative_humidity_2m' in hourly else 65.0,
+                'cloud_cover': hourly['cloud_cover'][i] if 'cloud_cover' in hourly else 50.0,
+                'wind_speed': hourly['wind_speed_10m'][i] if 'wind_speed_10m' in hourly else 2.0,
+                'weather_code': hourly['weather_code'][i] if 'weather_code' in hourly else 0,
+                'shortwave_radiation': hourly['shortwave_radiation'][i] if 'shortwave_radiation' in hourly else 0.0,
+                'direct_radiation': hourly['direct_radiation'][i] if 'direct_radiation' in hourly else 0.0,
+                'diffuse_radiation': hourly['diffuse_radiation'][i] if 'diffuse_radiation' in hourly else 0.0
+            })
+        
+        return forecast_data
+    
+    def get_forecast(self, days: int = 3) -> List[Dict]:
+        """Get weather forecast for next N days using Open-Meteo"""
+        if self.use_mock:
+            return self._generate_mock_forecast(days)
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = requests.get(self.base_url, params=self.forecast_params(days), timeout=10)
             response.raise_for_status()
-            data = response.json()
-            
-            hourly = data.get('hourly', {})
-            times = hourly.get('time', [])
-            
-            forecast_data = []
-            for i in range(len(times)):
-                forecast_data.append({
-                    'timestamp': times[i],
-                    'temperature': hourly['temperature_2m'][i] if 'temperature_2m' in hourly else 25.0,
-                    'humidity': hourly['relative_humidity_2m'][i] if 'relative_humidity_2m' in hourly else 65.0,
-                    'cloud_cover': hourly['cloud_cover'][i] if 'cloud_cover' in hourly else 50.0,
-                    'wind_speed': hourly['wind_speed_10m'][i] if 'wind_speed_10m' in hourly else 2.0,
-                    'weather_code': hourly['weather_code'][i] if 'weather_code' in hourly else 0,
-                    'shortwave_radiation': hourly['shortwave_radiation'][i] if 'shortwave_radiation' in hourly else 0.0,
-                    'direct_radiation': hourly['direct_radiation'][i] if 'direct_radiation' in hourly else 0.0,
-                    'diffuse_radiation': hourly['diffuse_radiation'][i] if 'diffuse_radiation' in hourly else 0.0
-                })
-            
-            return forecast_data
+            return self.parse_forecast(response.json())
         except Exception as e:
             print(f"Error fetching forecast from Open-Meteo: {e}")
             return self._generate_mock_forecast(days)
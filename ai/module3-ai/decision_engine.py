@@ -16,6 +16,8 @@ import sys
 sys.path.append(os.path.dirname(__file__))
 from train_demand_model import EnergyDemandForecaster
 from optimize_sources import SourceOptimizer, EnergySource
+from battery_planner import BatteryPlanner
+from scenario_engine import ScenarioEngine
 
 
 class LoadType:
@@ -153,6 +155,7 @@ class VestaDecisionEngine:
             battery_max_discharge=2.0
         )
         self.load_manager = LoadManager(carbon_threshold=700)
+        self.scenario_engine = ScenarioEngine()
         self.decision_log = []
         
     def load_models(self) -> bool:
@@ -171,18 +174,11 @@ class VestaDecisionEngine:
         print("VESTA DECISION ENGINE - MODEL TRAINING")
         print("=" * 70)
         
-        # Load data
-        df = pd.read_csv(data_path)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        print(f"\nDataset: {len(df)} records")
-        print(f"Date range: {df['timestamp'].min()} to {df['timestamp'].max()}")
-        
-        # Train forecasting model
+        # Train forecasting model (data is streamed in chunks, not loaded whole)
         print("\n" + "-" * 70)
         print("PHASE 1: Training Demand Forecasting Model")
         print("-" * 70)
-        self.forecaster.train(df, epochs=50, batch_size=32)
+        self.forecaster.train_streaming(data_path, epochs=50, batch_size=32)
         
         # Optimizer doesn't need training (rule-based)
         print("\n" + "-" * 70)
@@ -209,62 +205,137 @@ class VestaDecisionEngine:
         
         print("\n✓ Models updated with new data!")
     
-    def make_decision(self, recent_data: pd.DataFrame, current_conditions: Dict) -> Dict:
+    def analyze_scenarios(self, forecast: np.ndarray, current_conditions: Dict,
+                          n_scenarios: int = 1000, seed: int = None,
+                          battery_charge: float = None) -> Dict:
         """
-        Make real-time energy management decision
+        Compare battery policies across sampled forecast scenarios
+        
+        Price and weather are held at their current values over the
+        forecast horizon unless 'grid_price_forecast' / 'carbon_forecast'
+        are given in the conditions.
         
         Args:
-            recent_data: Last 24 hours of data for forecasting
+            forecast: Point forecast of demand (kWh per hour)
             current_conditions: Current conditions for optimization
+            n_scenarios: Number of Monte Carlo scenarios
+            seed: Random seed
+            battery_charge: Starting charge (kWh), default the optimizer's battery
             
         Returns:
-            Decision dictionary with forecast, allocation, and metrics
+            ScenarioEngine.run result (expected / P95 cost per policy)
         """
-        # Step 1: Forecast demand for next 6 hours
-        forecast = self.forecaster.predict(recent_data)
+        n_hours = len(forecast)
+        hours = (current_conditions['hour'] + 1 + np.arange(n_hours)) % 24
+        solar = self.optimizer.solar_available_array(
+            np.full(n_hours, float(current_conditions.get('shortwave_radiation', 0))),
+            np.full(n_hours, float(current_conditions['cloud_cover'])),
+            hours
+        )
         
-        # Step 2: For the next hour, optimize source selection
-        current_power_needed = forecast[0]  # Next hour's predicted demand
+        def hourly(key, forecast_key, default):
+            values = [float(v) for v in (current_conditions.get(forecast_key) or [])[:n_hours]]
+            values += [float(current_conditions.get(key, default))] * (n_hours - len(values))
+            return np.array(values)
+        
+        self.scenario_engine.planner = BatteryPlanner.from_optimizer(self.optimizer)
+        return self.scenario_engine.run(
+            forecast,
+            hourly('grid_price', 'grid_price_forecast', 6.0),
+            hourly('carbon_intensity', 'carbon_forecast', 500),
+            solar,
+            self.optimizer.battery_current_charge if battery_charge is None else battery_charge,
+            n_scenarios=n_scenarios,
+            seed=seed
+        )
+    
+    def grid_arbitrage(self, battery_charge: float, grid_price: float) -> Tuple[str, float, float]:
+        """
+        Decide whether to sell battery energy to the grid or buy from it
+        Pure function of the battery charge and price
         
-        # Step 3: Check for Grid Arbitrage opportunity
-        grid_price = current_conditions.get('grid_price', 6.0)
-        battery_level = self.optimizer.battery_current_charge
-        battery_pct = (battery_level / self.optimizer.battery_capacity) * 100
+        Args:
+            battery_charge: Current battery charge (kWh)
+            grid_price: Current grid price (₹/kWh)
+            
+        Returns:
+            Tuple of (grid action or None, grid revenue in ₹, new battery charge)
+        """
+        battery_pct = (battery_charge / self.optimizer.battery_capacity) * 100
         
         # Grid Arbitrage thresholds
         high_price_threshold = 8.0  # ₹/kWh - sell to grid
         low_price_threshold = 4.0   # ₹/kWh - buy from grid to charge battery
         
-        grid_action = None
-        grid_revenue = 0.0
-        
         # Sell to grid if price is high and battery is well charged
         if grid_price > high_price_threshold and battery_pct > 80:
             # Calculate how much we can sell
             sellable_power = min(
                 self.optimizer.battery_max_discharge,
-                battery_level - (self.optimizer.battery_capacity * 0.5)  # Keep at least 50%
+                battery_charge - (self.optimizer.battery_capacity * 0.5)  # Keep at least 50%
             )
             if sellable_power > 0:
-                grid_action = "DISCHARGE_TO_GRID"
-                grid_revenue = sellable_power * grid_price
-                self.optimizer.battery_current_charge -= sellable_power
+                return "DISCHARGE_TO_GRID", sellable_power * grid_price, battery_charge - sellable_power
         
         # Buy from grid to charge battery if price is very low
         elif grid_price < low_price_threshold and battery_pct < 60:
             charge_amount = min(
                 2.0,  # Max 2 kW charge rate
-                self.optimizer.battery_capacity - battery_level
+                self.optimizer.battery_capacity - battery_charge
             )
             if charge_amount > 0:
-                grid_action = "CHARGE_FROM_GRID"
-                grid_revenue = -charge_amount * grid_price  # Negative = cost
-                self.optimizer.battery_current_charge += charge_amount
+                # Negative revenue = cost
+                return "CHARGE_FROM_GRID", -charge_amount * grid_price, battery_charge + charge_amount
+        
+        return None, 0.0, battery_charge
+    
+    def make_decision(self, recent_data: pd.DataFrame, current_conditions: Dict,
+                      n_scenarios: int = 0, state: Dict = None) -> Dict:
+        """
+        Make real-time energy management decision
+        
+        Args:
+            recent_data: Last 24 hours of data for forecasting
+            current_conditions: Current conditions for optimization
+            n_scenarios: If > 0, also evaluate battery policies over this many
+                         Monte Carlo scenarios ('scenario_analysis')
+            state: Battery state ({'battery_charge': kWh}) kept outside the
+                   engine. If omitted, the optimizer's own battery is used
+                   and updated.
+            
+        Returns:
+            Decision dictionary with forecast, allocation, metrics and the
+            new battery state ('battery_state')
+        """
+        external_state = state is not None
+        if not external_state:
+            state = {'battery_charge': self.optimizer.battery_current_charge}
+        
+        # Step 1: Forecast demand for next 6 hours
+        forecast = self.forecaster.predict(recent_data)
+        
+        scenario_analysis = None
+        if n_scenarios > 0:
+            scenario_analysis = self.analyze_scenarios(
+                forecast, current_conditions, n_scenarios, battery_charge=state['battery_charge']
+            )
+        
+        # Step 2: For the next hour, optimize source selection
+        current_power_needed = forecast[0]  # Next hour's predicted demand
+        
+        # Step 3: Check for Grid Arbitrage opportunity
+        grid_price = current_conditions.get('grid_price', 6.0)
+        grid_action, grid_revenue, battery_charge = self.grid_arbitrage(
+            state['battery_charge'], grid_price
+        )
         
-        allocation, metrics = self.optimizer.optimize_source(
+        allocation, metrics, new_state = self.optimizer.optimize(
+            dict(state, battery_charge=battery_charge),
             current_power_needed,
             current_conditions
         )
+        if not external_state:
+            self.optimizer.battery_current_charge = new_state['battery_charge']
         
         # Step 4: Get load shedding recommendations
         load_recommendations = self.load_manager.get_load_shedding_recommendation(
@@ -286,6 +357,8 @@ class VestaDecisionEngine:
                 'grid_revenue': float(grid_revenue)
             },
             'load_shedding': load_recommendations,
+            'scenario_analysis': scenario_analysis,
+            'battery_state': new_state,
             'recommendation': self._generate_recommendation(forecast, allocation, metrics, grid_action, grid_revenue, load_recommendations)
         }
         
@@ -4,10 +4,11 @@ Generates realistic data for predicting dust on solar panels using LDR and power
 """
 
 import os
+import argparse
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Optional
 
 
 class SolarDustDataGenerator:
@@ -22,56 +23,57 @@ class SolarDustDataGenerator:
     to predict dust accumulation percentage
     """
     
-    def __init__(self, solar_capacity: float = 3.0):
+    # First reading of a seeded dataset, unless a start is given
+    SEEDED_START = datetime(2026, 1, 1)
+    
+    def __init__(self, solar_capacity: float = 3.0, seed: Optional[int] = None):
         """
         Initialize the generator
         
         Args:
             solar_capacity: Maximum solar panel capacity in kW
+            seed: Random seed (same seed, same dataset, timestamps included)
         """
         self.solar_capacity = solar_capacity
         self.panel_area = 20  # square meters (typical for 3kW system)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
     
-    def calculate_expected_power(self, 
-                                 irradiance: float,
-                                 temperature: float,
-                                 hour: int) -> float:
+    def calculate_expected_power(self, irradiance, temperature, hour):
         """
         Calculate expected solar power output based on conditions
         
         Args:
-            irradiance: Solar irradiance proxy (0-1)
-            temperature: Ambient temperature in °C
-            hour: Hour of day (0-23)
+            irradiance: Solar irradiance proxy (0-1), scalar or array
+            temperature: Ambient temperature in °C, scalar or array
+            hour: Hour of day (0-23), scalar or array
             
         Returns:
-            Expected power output in kW
+            Expected power output in kW (same shape as the inputs)
         """
-        # Only generate during daylight hours
-        if hour < 6 or hour >= 18:
-            return 0.0
+        hour = np.asarray(hour)
         
         # Base power from irradiance
-        base_power = self.solar_capacity * irradiance
+        base_power = self.solar_capacity * np.asarray(irradiance)
         
         # Temperature coefficient (panels lose ~0.5% per °C above 25°C)
-        temp_factor = 1.0 - 0.005 * max(0, temperature - 25)
+        temp_factor = 1.0 - 0.005 * np.maximum(0, np.asarray(temperature) - 25)
         
         # Angle factor (lower efficiency at sunrise/sunset)
         optimal_hour = 12
-        angle_factor = 1.0 - 0.3 * abs(hour - optimal_hour) / 6
-        angle_factor = max(0.5, angle_factor)
+        angle_factor = np.maximum(0.5, 1.0 - 0.3 * np.abs(hour - optimal_hour) / 6)
         
-        expected_power = base_power * temp_factor * angle_factor
+        expected_power = np.maximum(0, base_power * temp_factor * angle_factor)
         
-        return max(0, expected_power)
+        # Only generate during daylight hours
+        return np.where((hour >= 6) & (hour < 18), expected_power, 0.0)
     
-    def simulate_dust_accumulation(self, days: int = 30) -> float:
+    def simulate_dust_accumulation(self, days):
         """
         Simulate dust accumulation over time
         
         Args:
-            days: Number of days since last cleaning
+            days: Days since last cleaning, scalar or array
             
         Returns:
             Dust accumulation percentage (0-100)
@@ -84,119 +86,119 @@ class SolarDustDataGenerator:
         max_dust = 80  # Maximum dust percentage
         growth_rate = 0.3  # How fast dust accumulates
         
+        days = np.asarray(days, dtype=float)
         dust_pct = max_dust / (1 + np.exp(-growth_rate * (days - 10)))
         
         # Add some randomness (weather, location variations)
-        dust_pct += np.random.normal(0, 5)
+        dust_pct = dust_pct + self.rng.normal(0, 5, days.shape)
         
         return np.clip(dust_pct, 0, 100)
     
-    def calculate_actual_power(self,
-                               expected_power: float,
-                               dust_percentage: float) -> float:
+    def calculate_actual_power(self, expected_power, dust_percentage):
         """
         Calculate actual power output considering dust
         
         Args:
-            expected_power: Expected power in clean conditions
-            dust_percentage: Dust accumulation percentage (0-100)
+            expected_power: Expected power in clean conditions, scalar or array
+            dust_percentage: Dust accumulation percentage (0-100), scalar or array
             
         Returns:
             Actual power output in kW
         """
         # Dust reduces efficiency
         # 1% dust = ~0.7% power loss (research-based)
-        efficiency_loss = dust_percentage * 0.007
+        efficiency_loss = np.asarray(dust_percentage) * 0.007
         
-        actual_power = expected_power * (1 - efficiency_loss)
+        actual_power = np.asarray(expected_power) * (1 - efficiency_loss)
         
         # Add sensor noise
-        actual_power += np.random.normal(0, 0.02)
+        actual_power = actual_power + self.rng.normal(0, 0.02, actual_power.shape)
+        
+        return np.maximum(0, actual_power)
+    
+    def simulate_days_since_cleaning(self, day_of_series: np.ndarray) -> np.ndarray:
+        """
+        Days since the panels were last cleaned (every 10-15 days)
         
-        return max(0, actual_power)
+        Cleaning times are the cumulative sum of random 10-15 day gaps from
+        the start of the series (a clean start). Each reading finds its last
+        cleaning with one binary search.
+        """
+        total_days = float(day_of_series[-1]) if len(day_of_series) else 0.0
+        gaps = self.rng.uniform(10, 15, int(total_days // 10) + 2)
+        cleanings = np.concatenate(([0.0], np.cumsum(gaps)))
+        last = cleanings[np.searchsorted(cleanings, day_of_series, side='right') - 1]
+        return day_of_series - last
     
-    def generate_solar_dust_dataset(self, days: int = 30) -> pd.DataFrame:
+    def generate_solar_dust_dataset(self, days: int = 30, rows: Optional[int] = None,
+                                    start: Optional[datetime] = None) -> pd.DataFrame:
         """
         Generate complete dataset for dust prediction
         
+        Every column is computed with array operations, so 10M rows take
+        seconds rather than minutes.
+        
         Args:
             days: Number of days to simulate
+            rows: Number of readings instead of days (144 per day, the
+                  latest `rows` readings are kept)
+            start: Midnight the simulation starts from (default: SEEDED_START
+                   for a seeded generator, otherwise it ends now)
             
         Returns:
             DataFrame with solar panel and dust data
         """
+        readings_per_day = 12 * 12  # 5-minute intervals, 6 AM - 6 PM
+        if rows is not None:
+            days = -(-rows // readings_per_day) + 1
         print(f"Generating solar panel dust accumulation data for {days} days...")
         
-        # Generate timestamps (5-minute intervals during daylight)
-        all_dates = pd.date_range(
-            end=datetime.now(),
-            periods=days * 24 * 12,
-            freq='5min'
-        )
+        # Generate timestamps (5-minute intervals during daylight); a seeded
+        # dataset does not depend on when it is generated
+        if start is None and self.seed is not None:
+            start = self.SEEDED_START
+        if start is not None:
+            all_dates = pd.date_range(start=pd.Timestamp(start).normalize(),
+                                      periods=days * 24 * 12, freq='5min')
+        else:
+            all_dates = pd.date_range(end=datetime.now(), periods=days * 24 * 12, freq='5min')
         
         # Filter to only daylight hours (6 AM - 6 PM)
         daylight_mask = (all_dates.hour >= 6) & (all_dates.hour < 18)
         dates = all_dates[daylight_mask]
+        if rows is not None:
+            dates = dates[-rows:]
+        n = len(dates)
         
         hours = dates.hour.values
-        day_of_series = np.arange(len(dates)) / (12 * 12)  # Days elapsed
+        day_of_series = np.arange(n) / readings_per_day  # Days elapsed
         
         # Generate environmental conditions
         # Solar irradiance (varies throughout day)
         hour_angle = (hours - 12) / 6  # -1 to 1
         irradiance = np.exp(-(hour_angle ** 2) / 0.5)  # Bell curve
-        irradiance += np.random.normal(0, 0.05, len(dates))
+        irradiance += self.rng.normal(0, 0.05, n)
         irradiance = np.clip(irradiance, 0, 1)
         
         # Temperature (varies throughout day)
         temp_base = 28 + 3 * np.sin(2 * np.pi * day_of_series)  # Seasonal variation
         temp_daily = 5 * np.sin(2 * np.pi * (hours - 10) / 12)  # Daily variation
-        temperature = temp_base + temp_daily + np.random.normal(0, 1, len(dates))
+        temperature = temp_base + temp_daily + self.rng.normal(0, 1, n)
         
         # LDR readings (proportional to irradiance)
         ldr_raw = (irradiance * 1023).astype(int)
         ldr_lux = irradiance * 1000  # Convert to lux
         
-        # Simulate cleaning events (every 10-15 days with randomness)
-        cleaning_schedule = []
-        next_cleaning = np.random.uniform(10, 15)
-        current_days = 0
-        
-        days_since_cleaning = []
-        for i, day in enumerate(day_of_series):
-            if day >= next_cleaning:
-                # Cleaning event
-                current_days = 0
-                next_cleaning = day + np.random.uniform(10, 15)
-            else:
-                current_days = day - (next_cleaning - np.random.uniform(10, 15))
-            
-            days_since_cleaning.append(max(0, current_days))
-        
-        days_since_cleaning = np.array(days_since_cleaning)
-        
-        # Calculate dust accumulation
-        dust_percentage = np.array([
-            self.simulate_dust_accumulation(days) 
-            for days in days_since_cleaning
-        ])
-        
-        # Calculate expected power (clean panels)
-        expected_power = np.array([
-            self.calculate_expected_power(irr, temp, hour)
-            for irr, temp, hour in zip(irradiance, temperature, hours)
-        ])
-        
-        # Calculate actual power (with dust)
-        actual_power = np.array([
-            self.calculate_actual_power(exp_pwr, dust_pct)
-            for exp_pwr, dust_pct in zip(expected_power, dust_percentage)
-        ])
+        # Cleaning events, dust and power
+        days_since_cleaning = self.simulate_days_since_cleaning(day_of_series)
+        dust_percentage = self.simulate_dust_accumulation(days_since_cleaning)
+        expected_power = self.calculate_expected_power(irradiance, temperature, hours)
+        actual_power = self.calculate_actual_power(expected_power, dust_percentage)
         
         # Calculate efficiency ratio
         efficiency_ratio = np.where(
             expected_power > 0.1,
-            actual_power / expected_power,
+            actual_power / np.maximum(expected_power, 0.1),
             1.0
         )
         
@@ -243,18 +245,29 @@ def main():
     """
     Main function to generate and save solar dust dataset
     """
+    parser = argparse.ArgumentParser(description='Generate the solar dust dataset')
+    parser.add_argument('--days', type=int, default=30, help='Days to simulate')
+    parser.add_argument('--rows', type=int, default=None,
+                        help='Number of readings instead of --days (e.g. 10000000 for load tests)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    parser.add_argument('--start', type=datetime.fromisoformat, default=None,
+                        help='Start date, e.g. 2026-01-01 (default: fixed when seeded, otherwise ending now)')
+    parser.add_argument('--output', default='solar_dust_data.csv', help='File name in data/raw/')
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("SOLAR PANEL DUST ACCUMULATION - DATASET GENERATION")
     print("=" * 70)
     
     # Initialize generator
-    generator = SolarDustDataGenerator(solar_capacity=3.0)
+    generator = SolarDustDataGenerator(solar_capacity=3.0, seed=args.seed)
     
     # Generate dataset
-    solar_dust_data = generator.generate_solar_dust_dataset(days=30)
+    solar_dust_data = generator.generate_solar_dust_dataset(days=args.days, rows=args.rows,
+                                                           start=args.start)
     
     # Save to CSV
-    output_path = generator.save_to_csv(solar_dust_data, 'solar_dust_data.csv')
+    output_path = generator.save_to_csv(solar_dust_data, args.output)
     
     # Print statistics
     print("\n" + "=" * 70)
@@ -279,7 +292,7 @@ def main():
     
     print(f"\n💰 Economic Impact:")
     print(f"  Average power loss: {solar_dust_data['power_loss_kw'].mean():.3f} kW")
-    print(f"  Total power loss (30 days): {solar_dust_data['cumulative_power_loss_kwh'].iloc[-1]:.2f} kWh")
+    print(f"  Total power loss: {solar_dust_data['cumulative_power_loss_kwh'].iloc[-1]:.2f} kWh")
     print(f"  Total revenue loss: ₹{solar_dust_data['cumulative_revenue_loss'].iloc[-1]:.2f}")
     print(f"  Average hourly loss: ₹{solar_dust_data['revenue_loss_per_hour'].mean():.2f}")
     
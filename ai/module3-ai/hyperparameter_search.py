@@ -0,0 +1,383 @@
+"""
+Hyperparameter Search for Vesta Energy Orchestrator
+Tunes the demand forecaster (LSTM) and the solar dust model in parallel.
+
+Every configuration of a search space is a trial. Trials run concurrently
+on a process pool and are scored with time-series cross-validation
+(TimeSeriesSplit: every fold validates on data after its training data).
+Demand folds leave a gap of forecast_horizon - 1 windows, so no training
+target overlaps a validation target, and scalers are fit on each fold's
+training rows only; validation data never leaks into the normalization.
+A trial whose running mean error is already prune_factor times worse
+than the best finished trial's mean over the same folds stops early. The
+best trial's fold scores are shared by all workers. The leaderboard is written to CSV/JSON and the best
+configuration is retrained on all data and saved.
+
+Usage:
+    python hyperparameter_search.py dust --workers 4
+    python hyperparameter_search.py demand --workers 2 --epochs 20 --max-trials 8
+"""
+
+import os
+import json
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+from sklearn.metrics import mean_absolute_error
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+# Search spaces (sklearn ParameterGrid format)
+DEMAND_SPACE = {
+    'lookback_hours': [12, 24, 48],
+    'lstm_units': [(64, 32), (128, 64)],
+    'dropout': [0.1, 0.2, 0.3],
+}
+
+DUST_SPACE = [
+    {
+        'model_type': ['random_forest'],
+        'n_estimators': [100, 200, 400],
+        'max_depth': [8, 15, None],
+    },
+    {
+        'model_type': ['gradient_boosting'],
+        'n_estimators': [100, 200, 400],
+        'max_depth': [3, 5],
+    },
+    {
+        'model_type': ['hist_gradient_boosting'],
+        'max_iter': [200, 400],
+        'learning_rate': [0.05, 0.1],
+        'max_leaf_nodes': [15, 31, 63],
+    },
+]
+
+DEFAULT_DATA = {
+    'demand': 'data/raw/integrated_dataset.csv',
+    'dust': 'data/raw/solar_dust_data.csv',
+}
+
+# Per-process state, set by _init_worker
+_worker = {}
+
+
+def _init_worker(kind: str, data: pd.DataFrame, best, threads: int):
+    """Runs once in every worker: keep the data and the shared best fold scores"""
+    _worker.update(kind=kind, data=data, best=best)
+    if kind == 'demand':
+        # One TensorFlow thread pool per worker would oversubscribe the CPU
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _pruned(scores: List[float], prune_factor: float) -> bool:
+    """True if a trial's running mean is far behind the best finished trial on the same folds"""
+    best = _worker['best']
+    with best.get_lock():
+        best_scores = best[:len(scores)]
+    return bool(np.all(np.isfinite(best_scores))
+                and np.mean(scores) > prune_factor * np.mean(best_scores))
+
+
+def _report(scores: List[float]):
+    """Keep a finished trial's fold scores if its mean beats the best so far"""
+    best = _worker['best']
+    with best.get_lock():
+        current = best[:]
+        if not np.all(np.isfinite(current)) or np.mean(scores) < np.mean(current):
+            best[:] = scores
+
+
+def _folds(n_samples: int, n_splits: int, gap: int = 0):
+    """Contiguous (train, validation) slices of TimeSeriesSplit, `gap` samples apart"""
+    for train, val in TimeSeriesSplit(n_splits=n_splits, gap=gap).split(np.arange(n_samples)):
+        yield slice(train[0], train[-1] + 1), slice(val[0], val[-1] + 1)
+
+
+def _evaluate_dust(params: Dict, n_splits: int, prune_factor: float, **_) -> Dict:
+    """Cross-validated MAE (% dust) of one SolarDustPredictor configuration"""
+    from train_solar_dust_model import SolarDustPredictor
+
+    params = dict(params)
+    model_type = params.pop('model_type')
+    # One core per trial: the pool already uses every core
+    predictor = SolarDustPredictor(model_type, params, models_dir=_worker['scratch'], n_jobs=1)
+    df = _worker['data'].copy()
+    _, y = predictor.prepare_features(df)
+    X = df[predictor.feature_columns].to_numpy(dtype=float)
+
+    scores = []
+    for fold, (train, val) in enumerate(_folds(len(X), n_splits)):
+        scaler = StandardScaler().fit(X[train])
+        model = predictor.fit(scaler.transform(X[train]), y[train])
+        scores.append(float(mean_absolute_error(y[val], model.predict(scaler.transform(X[val])))))
+        if fold < n_splits - 1 and _pruned(scores, prune_factor):
+            return {'fold_mae': scores, 'status': 'pruned'}
+    return {'fold_mae': scores, 'status': 'completed'}
+
+
+def _demand_fold_windows(forecaster, data: np.ndarray, n_windows: int, train: slice):
+    """
+    Scaled (X, y) windows of data, with the forecaster's scalers fit on
+    the rows read by the training windows of one fold only
+
+    Args:
+        forecaster: EnergyDemandForecaster with feature_columns set
+        data: Raw feature rows in time order
+        n_windows: Windows to build, as in prepare_data()
+        train: Slice of the training windows
+    """
+    span = forecaster.lookback_hours + forecaster.forecast_horizon
+    _, y_raw = forecaster._windows(data, n_windows, scaled=False)
+    forecaster.scaler_X = MinMaxScaler().fit(data[:train.stop - 1 + span])
+    forecaster.scaler_y = MinMaxScaler().fit(y_raw[train])
+    return forecaster._windows(data, n_windows)
+
+
+def _evaluate_demand(params: Dict, n_splits: int, prune_factor: float, epochs: int = 20) -> Dict:
+    """Cross-validated MAE (kWh) of one EnergyDemandForecaster configuration"""
+    from tensorflow.keras.callbacks import EarlyStopping
+    from train_demand_model import EnergyDemandForecaster, WindowSequence
+
+    forecaster = EnergyDemandForecaster(models_dir=_worker['scratch'], **params)
+    forecaster._select_features(_worker['data'].columns)
+    data = _worker['data'][forecaster.feature_columns].to_numpy(dtype=float)
+    n_windows = max(len(data) - forecaster.lookback_hours - forecaster.forecast_horizon, 0)
+
+    # Training window i predicts rows up to i + lookback + horizon - 1, so
+    # horizon - 1 windows are skipped before a fold's validation windows
+    gap = forecaster.forecast_horizon - 1
+
+    scores = []
+    for fold, (train, val) in enumerate(_folds(n_windows, n_splits, gap)):
+        X, y = _demand_fold_windows(forecaster, data, n_windows, train)
+        model = forecaster.build_model(input_shape=(X.shape[1], X.shape[2]))
+        model.fit(
+            WindowSequence(X[train], y[train], 32, shuffle=True),
+            epochs=epochs,
+            validation_data=WindowSequence(X[val], y[val], 32),
+            callbacks=[EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)],
+            verbose=0
+        )
+        predicted = model.predict(WindowSequence(X[val], batch_size=256), verbose=0)
+        actual = forecaster.scaler_y.inverse_transform(y[val])
+        predicted = forecaster.scaler_y.inverse_transform(predicted)
+        scores.append(float(mean_absolute_error(actual.ravel(), predicted.ravel())))
+        if fold < n_splits - 1 and _pruned(scores, prune_factor):
+            return {'fold_mae': scores, 'status': 'pruned'}
+    return {'fold_mae': scores, 'status': 'completed'}
+
+
+EVALUATORS = {
+    'demand': _evaluate_demand,
+    'dust': _evaluate_dust,
+}
+
+
+def _run_trial(task: Dict) -> Dict:
+    """Evaluate one configuration (runs in a worker process)"""
+    _worker['scratch'] = task['scratch']
+    start = time.perf_counter()
+    try:
+        result = EVALUATORS[_worker['kind']](task['params'], **task['options'])
+    except Exception as e:
+        result = {'fold_mae': [], 'status': 'failed', 'error': str(e)}
+
+    scores = result['fold_mae']
+    result['mean_mae'] = float(np.mean(scores)) if scores else float('inf')
+    if result['status'] == 'completed':
+        _report(scores)
+    return {
+        'trial': task['trial'],
+        'params': task['params'],
+        **result,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def _log_trial(row: Dict) -> Dict:
+    print(f"  trial {row['trial']:>3} {row['status']:<9} "
+          f"MAE {row['mean_mae']:.4f}  {row['params']}")
+    return row
+
+
+def _leaderboard_key(row: Dict):
+    """Completed trials by score, then pruned ones, then failures"""
+    order = {'completed': 0, 'pruned': 1, 'failed': 2}
+    return order[row['status']], row['mean_mae']
+
+
+def save_leaderboard(leaderboard: List[Dict], output_dir: str, kind: str) -> Dict[str, str]:
+    """Write the leaderboard as JSON and CSV; returns the file paths"""
+    json_path = os.path.join(output_dir, f'{kind}_leaderboard.json')
+    csv_path = os.path.join(output_dir, f'{kind}_leaderboard.csv')
+
+    with open(json_path, 'w') as f:
+        json.dump(leaderboard, f, indent=2, default=list)
+
+    rows = [{
+        'rank': rank,
+        'trial': row['trial'],
+        'status': row['status'],
+        'mean_mae': row['mean_mae'],
+        'folds_run': len(row['fold_mae']),
+        'seconds': row['seconds'],
+        **{key: value for key, value in row['params'].items()},
+    } for rank, row in enumerate(leaderboard, 1)]
+    pd.DataFrame(rows).to_csv(csv_path, index=False)
+
+    return {'json': json_path, 'csv': csv_path}
+
+
+def refit_best(kind: str, data: pd.DataFrame, params: Dict, output_dir: str,
+               epochs: int = 50) -> str:
+    """Train the best configuration on all data and save it in output_dir/<kind>_best"""
+    best_dir = os.path.join(output_dir, f'{kind}_best')
+    if kind == 'demand':
+        from train_demand_model import EnergyDemandForecaster
+        forecaster = EnergyDemandForecaster(models_dir=best_dir, **params)
+        forecaster.train(data, epochs=epochs)
+    else:
+        from train_solar_dust_model import SolarDustPredictor
+        params = dict(params)
+        predictor = SolarDustPredictor(params.pop('model_type'), params, models_dir=best_dir)
+        predictor.train(data)
+
+    with open(os.path.join(best_dir, 'best_params.json'), 'w') as f:
+        json.dump(params, f, indent=2, default=list)
+    return best_dir
+
+
+def run_search(kind: str,
+               data: pd.DataFrame,
+               space=None,
+               n_splits: int = 3,
+               max_trials: Optional[int] = None,
+               max_workers: Optional[int] = None,
+               prune_factor: float = 1.5,
+               epochs: int = 20,
+               output_dir: str = 'models/search',
+               seed: int = 42,
+               refit: bool = True) -> Dict:
+    """
+    Search hyperparameters for the 'demand' or 'dust' model
+
+    Args:
+        kind: 'demand' (EnergyDemandForecaster) or 'dust' (SolarDustPredictor)
+        data: Training data in time order
+        space: ParameterGrid-style search space (default: DEMAND_SPACE/DUST_SPACE)
+        n_splits: TimeSeriesSplit folds per trial
+        max_trials: Evaluate a random subset of this many configurations
+        max_workers: Process pool size (default: CPU count; 1 runs in-process)
+        prune_factor: Stop a trial whose running mean MAE exceeds this
+                      multiple of the best finished trial's mean on the same folds
+        epochs: Maximum epochs per fold (demand only)
+        output_dir: Where the leaderboard and best model are written
+        seed: Seed for sampling max_trials configurations
+        refit: Retrain the best configuration on all data and save it
+
+    Returns:
+        Dictionary with the sorted leaderboard, the best trial and file paths
+    """
+    if kind not in EVALUATORS:
+        raise ValueError(f"Unknown model kind: {kind}")
+    space = space or (DEMAND_SPACE if kind == 'demand' else DUST_SPACE)
+    configs = list(ParameterGrid(space))
+    if max_trials and max_trials < len(configs):
+        picked = np.random.default_rng(seed).choice(len(configs), max_trials, replace=False)
+        configs = [configs[i] for i in sorted(picked)]
+
+    os.makedirs(output_dir, exist_ok=True)
+    scratch = os.path.join(output_dir, 'scratch')
+    max_workers = max_workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // max_workers)
+
+    options = {'n_splits': n_splits, 'prune_factor': prune_factor}
+    if kind == 'demand':
+        options['epochs'] = epochs
+    tasks = [{'trial': i, 'params': params, 'options': options, 'scratch': scratch}
+             for i, params in enumerate(configs)]
+
+    # spawn: TensorFlow is not fork-safe
+    context = multiprocessing.get_context('spawn')
+    best = context.Array('d', [float('inf')] * n_splits)
+    print(f"Searching {len(tasks)} {kind} configurations on {max_workers} worker(s)...")
+
+    results = []
+    if max_workers == 1:
+        _init_worker(kind, data, best, threads)
+        for task in tasks:
+            results.append(_log_trial(_run_trial(task)))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(kind, data, best, threads)) as executor:
+            futures = [executor.submit(_run_trial, task) for task in tasks]
+            for future in as_completed(futures):
+                results.append(_log_trial(future.result()))
+
+    leaderboard = sorted(results, key=_leaderboard_key)
+    paths = save_leaderboard(leaderboard, output_dir, kind)
+    top = leaderboard[0] if leaderboard and leaderboard[0]['status'] == 'completed' else None
+
+    if top and refit:
+        paths['best_model'] = refit_best(kind, data, top['params'], output_dir, epochs=epochs)
+
+    return {
+        'kind': kind,
+        'trials': len(leaderboard),
+        'pruned': sum(row['status'] == 'pruned' for row in leaderboard),
+        'failed': sum(row['status'] == 'failed' for row in leaderboard),
+        'best': top,
+        'leaderboard': leaderboard,
+        'paths': paths,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter search')
+    parser.add_argument('kind', choices=sorted(EVALUATORS))
+    parser.add_argument('--data', help='Training CSV (default: the dataset in data/raw)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--max-trials', type=int, default=None)
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--prune-factor', type=float, default=1.5)
+    parser.add_argument('--output-dir', default='models/search')
+    parser.add_argument('--no-refit', action='store_true')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data or DEFAULT_DATA[args.kind])
+    if 'timestamp' in df.columns:
+        df = df.sort_values('timestamp').reset_index(drop=True)
+
+    result = run_search(
+        args.kind, df,
+        n_splits=args.folds,
+        max_trials=args.max_trials,
+        max_workers=args.workers,
+        prune_factor=args.prune_factor,
+        epochs=args.epochs,
+        output_dir=args.output_dir,
+        refit=not args.no_refit,
+    )
+
+    print("\n" + "=" * 70)
+    print("LEADERBOARD")
+    print("=" * 70)
+    for rank, row in enumerate(result['leaderboard'][:10], 1):
+        print(f"{rank:>3}. {row['status']:<9} MAE {row['mean_mae']:.4f}  {row['params']}")
+    print(f"\nTrials: {result['trials']} ({result['pruned']} pruned, {result['failed']} failed)")
+    for name, path in result['paths'].items():
+        print(f"✓ {name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
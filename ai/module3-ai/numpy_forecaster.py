@@ -0,0 +1,270 @@
+"""
+NumPy-only inference for the LSTM demand forecaster.
+
+`export_weights()` dumps the trained LSTM/Dense weights, the MinMax scaler
+parameters and the model configuration from the Keras artifacts into a
+single .npz file. `NumpyDemandForecaster` loads that file and reproduces
+`EnergyDemandForecaster.predict` with a plain NumPy forward pass, so the
+API can serve forecasts without importing TensorFlow.
+
+Usage:
+    python numpy_forecaster.py --models-dir ../models
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0.0, 1.0),
+}
+
+
+def _layer_weights(model_weights, layer_name: str) -> Dict[str, np.ndarray]:
+    """Collect every weight array stored under a layer's group in the .h5 file"""
+    weights = {}
+
+    def visit(name, obj):
+        if hasattr(obj, 'shape'):
+            weights[name.split('/')[-1]] = obj[()]
+
+    model_weights[layer_name].visititems(visit)
+    return weights
+
+
+def export_weights(model_path: str, scaler_path: str, config_path: str,
+                   output_path: str) -> str:
+    """
+    Export a trained Keras demand forecaster to a NumPy .npz file
+
+    Only h5py and joblib are needed here; TensorFlow is not imported.
+
+    Args:
+        model_path: Keras .h5 model (demand_forecaster.h5)
+        scaler_path: joblib file with scaler_X / scaler_y
+        config_path: JSON model configuration
+        output_path: Destination .npz file
+
+    Returns:
+        output_path
+    """
+    import h5py
+    import joblib
+
+    arrays = {}
+    layers = []
+
+    with h5py.File(model_path, 'r') as f:
+        model_config = json.loads(f.attrs['model_config'])
+        model_weights = f['model_weights']
+
+        for layer in model_config['config']['layers']:
+            kind = layer['class_name']
+            cfg = layer['config']
+            if kind not in ('LSTM', 'Dense'):
+                # InputLayer / Dropout have no effect at inference time
+                continue
+
+            index = len(layers)
+            weights = _layer_weights(model_weights, cfg['name'])
+            arrays[f'layer{index}_kernel'] = weights['kernel'].astype(np.float32)
+            arrays[f'layer{index}_bias'] = weights['bias'].astype(np.float32)
+
+            spec = {'type': kind, 'name': cfg['name'], 'activation': cfg['activation']}
+            if kind == 'LSTM':
+                arrays[f'layer{index}_recurrent_kernel'] = weights['recurrent_kernel'].astype(np.float32)
+                spec['recurrent_activation'] = cfg['recurrent_activation']
+                spec['return_sequences'] = cfg['return_sequences']
+            layers.append(spec)
+
+    scalers = joblib.load(scaler_path)
+    for name in ('scaler_X', 'scaler_y'):
+        arrays[f'{name}_scale'] = scalers[name].scale_
+        arrays[f'{name}_min'] = scalers[name].min_
+
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    config['layers'] = layers
+    arrays['config'] = np.array(json.dumps(config))
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    # Write then rename, so a worker loading the file never sees a partial export
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, output_path)
+    print(f"✓ Exported {len(layers)} layers to: {output_path}")
+    return output_path
+
+
+class NumpyDemandForecaster:
+    """
+    Drop-in replacement for EnergyDemandForecaster at inference time
+
+    Implements the Keras LSTM cell (gate order i, f, c, o) and Dense layers
+    directly in NumPy. Dropout layers are identity at inference and are
+    not exported.
+    """
+
+    def __init__(self, weights_path: str = 'models/demand_forecaster.npz'):
+        self.weights_path = weights_path
+        self.layers = []
+        self.lookback_hours = None
+        self.forecast_horizon = None
+        self.feature_columns = None
+        self.model = None
+
+    def load_model(self) -> bool:
+        """Load the exported .npz weights and configuration"""
+        try:
+            with np.load(self.weights_path) as data:
+                arrays = {key: data[key] for key in data.files}
+
+            config = json.loads(str(arrays['config']))
+            self.lookback_hours = config['lookback_hours']
+            self.forecast_horizon = config['forecast_horizon']
+            self.feature_columns = config['feature_columns']
+
+            self.layers = []
+            for index, spec in enumerate(config['layers']):
+                layer = dict(spec)
+                layer['kernel'] = arrays[f'layer{index}_kernel']
+                layer['bias'] = arrays[f'layer{index}_bias']
+                if spec['type'] == 'LSTM':
+                    layer['recurrent_kernel'] = arrays[f'layer{index}_recurrent_kernel']
+                self.layers.append(layer)
+
+            self.x_scale = arrays['scaler_X_scale']
+            self.x_min = arrays['scaler_X_min']
+            self.y_scale = arrays['scaler_y_scale']
+            self.y_min = arrays['scaler_y_min']
+
+            # Marks the forecaster as ready, mirroring EnergyDemandForecaster.model
+            self.model = self
+            print(f"✓ NumPy model loaded from: {self.weights_path}")
+            return True
+        except Exception as e:
+            print(f"✗ Failed to load NumPy model: {e}")
+            return False
+
+    @staticmethod
+    def _lstm(x: np.ndarray, layer: Dict) -> np.ndarray:
+        """Run one LSTM layer over x of shape (batch, timesteps, features)"""
+        kernel = layer['kernel']
+        recurrent_kernel = layer['recurrent_kernel']
+        activation = ACTIVATIONS[layer['activation']]
+        recurrent_activation = ACTIVATIONS[layer['recurrent_activation']]
+        units = recurrent_kernel.shape[0]
+        batch, timesteps, _ = x.shape
+
+        # Input projection for all timesteps at once
+        x_proj = x @ kernel + layer['bias']
+
+        h = np.zeros((batch, units), dtype=x_proj.dtype)
+        c = np.zeros((batch, units), dtype=x_proj.dtype)
+        outputs = []
+        for t in range(timesteps):
+            z = x_proj[:, t] + h @ recurrent_kernel
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if layer['return_sequences']:
+                outputs.append(h)
+
+        return np.stack(outputs, axis=1) if layer['return_sequences'] else h
+
+    def forward(self, X: np.ndarray) -> np.ndarray:
+        """
+        Forward pass on scaled input windows
+
+        Args:
+            X: Array of shape (batch, lookback_hours, n_features)
+
+        Returns:
+            Scaled predictions of shape (batch, forecast_horizon)
+        """
+        x = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            if layer['type'] == 'LSTM':
+                x = self._lstm(x, layer)
+            else:
+                x = ACTIVATIONS[layer['activation']](x @ layer['kernel'] + layer['bias'])
+        return x
+
+    def predict(self, recent_data: pd.DataFrame) -> np.ndarray:
+        """
+        Predict energy demand for next forecast_horizon hours
+
+        Args:
+            recent_data: DataFrame with last lookback_hours of data
+
+        Returns:
+            Array of predicted energy consumption for next forecast_horizon hours
+        """
+        return self.predict_batch([recent_data])[0]
+
+    def predict_batch(self, windows) -> np.ndarray:
+        """
+        Predict energy demand for many windows in one forward pass
+
+        Args:
+            windows: List of DataFrames with last lookback_hours of data,
+                     or array of shape (N, lookback_hours, n_features)
+
+        Returns:
+            Array of shape (N, forecast_horizon) with predicted consumption
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded. Call load_model() first.")
+
+        if isinstance(windows, np.ndarray):
+            if windows.ndim != 3 or windows.shape[1] < self.lookback_hours:
+                raise ValueError(f"Expected shape (N, >={self.lookback_hours}, n_features), got {windows.shape}")
+            data = windows[:, -self.lookback_hours:, :]
+        else:
+            stacked = []
+            for window in windows:
+                values = window[self.feature_columns].values
+                if len(values) < self.lookback_hours:
+                    raise ValueError(f"Need at least {self.lookback_hours} hours of recent data")
+                stacked.append(values[-self.lookback_hours:])
+            data = np.stack(stacked)
+
+        # MinMax scaling broadcasts over (N, lookback, features) directly
+        X = data.astype(np.float64) * self.x_scale + self.x_min
+
+        prediction_scaled = self.forward(X).astype(np.float64)
+        return (prediction_scaled - self.y_min) / self.y_scale
+
+
+def main():
+    """Export the trained Keras forecaster to NumPy weights"""
+    parser = argparse.ArgumentParser(description='Export demand forecaster weights to .npz')
+    parser.add_argument('--models-dir', default='models',
+                        help='Directory containing demand_forecaster.h5 and its scalers/config')
+    parser.add_argument('--output', default=None,
+                        help='Output .npz path (default: <models-dir>/demand_forecaster.npz)')
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(args.models_dir, 'demand_forecaster.npz')
+    export_weights(
+        os.path.join(args.models_dir, 'demand_forecaster.h5'),
+        os.path.join(args.models_dir, 'demand_forecaster_scalers.pkl'),
+        os.path.join(args.models_dir, 'demand_forecaster_config.json'),
+        output
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -195,8 +195,33 @@ class SourceOptimizer:
                        conditions: Dict) -> Tuple[List[Tuple[EnergySource, float]], Dict]:
         """
         Optimize energy source selection for given power requirement
+        Uses and updates this optimizer's battery_current_charge
         
         Args:
+            power_needed: Power required (kW)
+            conditions: Dictionary with current conditions (see optimize())
+                
+        Returns:
+            Tuple of (source allocation list, decision metrics)
+            Source allocation: [(EnergySource, kW), ...]
+        """
+        allocation, metrics, state = self.optimize(
+            {'battery_charge': self.battery_current_charge}, power_needed, conditions
+        )
+        self.battery_current_charge = state['battery_charge']
+        return allocation, metrics
+    
+    def optimize(self,
+                 state: Dict,
+                 power_needed: float,
+                 conditions: Dict) -> Tuple[List[Tuple[EnergySource, float]], Dict, Dict]:
+        """
+        Optimize energy source selection as a pure function of the battery state
+        Does not modify the optimizer, so one instance is safe to share
+        between threads and the state can live outside the process
+        
+        Args:
+            state: Battery state ({'battery_charge': kWh})
             power_needed: Power required (kW)
             conditions: Dictionary with current conditions:
                 - shortwave_radiation: W/m² (from Open-Meteo)
@@ -206,9 +231,11 @@ class SourceOptimizer:
                 - grid_price: ₹/kWh
                 
         Returns:
-            Tuple of (source allocation list, decision metrics)
+            Tuple of (source allocation list, decision metrics, new state)
             Source allocation: [(EnergySource, kW), ...]
         """
+        battery_charge = state['battery_charge']
+        
         # Calculate available power from each source
         solar_available = self.calculate_solar_available(
             conditions.get('shortwave_radiation', conditions.get('solar_radiation', 0)),  # Backward compatible
@@ -223,7 +250,7 @@ class SourceOptimizer:
         # Battery available considering health protection
         battery_available = min(
             self.battery_max_discharge,
-            max(0, self.battery_current_charge - (self.battery_capacity * discharge_limit))
+            max(0, battery_charge - (self.battery_capacity * discharge_limit))
         )
         
         # Calculate scores for each source
@@ -262,7 +289,7 @@ class SourceOptimizer:
                 battery_used = min(battery_available, remaining_power)
                 allocation.append((EnergySource.BATTERY, battery_used))
                 remaining_power -= battery_used
-                self.battery_current_charge -= battery_used
+                battery_charge -= battery_used
         
         # 3. Use grid for any remaining power
         if remaining_power > 0:
@@ -287,11 +314,11 @@ class SourceOptimizer:
             'allocation': [(s.value, f"{p:.3f}") for s, p in allocation],
             'cost': actual_cost,
             'carbon': actual_carbon,
-            'battery_charge': self.battery_current_charge,
+            'battery_charge': battery_charge,
             'scores': {k.value: v for k, v in scores.items()}
         }
         
-        return allocation, metrics
+        return allocation, metrics, dict(state, battery_charge=battery_charge)
     
     def charge_battery_from_solar(self, solar_excess: float):
         """
@@ -359,6 +386,190 @@ class SourceOptimizer:
         
         return pd.DataFrame(results)
 
+    
+    def solar_available_array(self,
+                              shortwave_radiation: np.ndarray,
+                              cloud_cover: np.ndarray,
+                              hour: np.ndarray) -> np.ndarray:
+        """
+        Vectorized calculate_solar_available over many hours
+        
+        Uses the same operation order as the scalar version so the
+        results are bit-for-bit identical.
+        """
+        panel_area = self.solar_capacity / (self.PEAK_IRRADIANCE / 1000 * self.panel_efficiency)
+        solar_power_kw = (shortwave_radiation / 1000) * panel_area * self.panel_efficiency
+        cloud_factor = 1 - (cloud_cover / 100) * 0.1
+        solar_power = np.maximum(0, np.minimum(solar_power_kw * cloud_factor, self.solar_capacity))
+        
+        daylight = (hour >= 6) & (hour < 18)
+        return np.where(daylight, solar_power, 0.0)
+    
+    def simulate(self, df: pd.DataFrame, include_allocation: bool = True) -> pd.DataFrame:
+        """
+        Vectorized equivalent of simulate_day for any number of hours
+        
+        Solar availability, source scores, discharge limits, costs and carbon
+        are computed as NumPy arrays over the whole horizon; only the battery
+        state-of-charge recurrence runs in a plain loop. Results (and the
+        final battery_current_charge) match simulate_day exactly.
+        
+        Args:
+            df: DataFrame with hourly data (any length)
+            include_allocation: Also build the per-hour allocation list
+                                (string formatting dominates long runs)
+            
+        Returns:
+            DataFrame with optimization results for each hour
+        """
+        power = df['total_energy_kwh'].to_numpy(dtype=float)
+        if 'shortwave_radiation' in df.columns:
+            radiation = df['shortwave_radiation'].to_numpy(dtype=float)
+        elif 'solar_radiation_proxy' in df.columns:
+            radiation = df['solar_radiation_proxy'].to_numpy(dtype=float) * 800
+        else:
+            radiation = np.zeros(len(df))
+        cloud_cover = df['cloud_cover'].to_numpy(dtype=float)
+        hour = df['hour'].to_numpy()
+        carbon_intensity = df['carbon_intensity'].to_numpy(dtype=float)
+        grid_price = df['grid_price_per_kwh'].to_numpy(dtype=float)
+        
+        # 1. Solar first (always best)
+        solar_available = self.solar_available_array(radiation, cloud_cover, hour)
+        solar_used = np.where((solar_available > 0) & (power > 0),
+                              np.minimum(solar_available, power), 0.0)
+        remaining = np.where(solar_used > 0, power - solar_used, power)
+        solar_excess = solar_available - solar_used
+        
+        # Battery health limit from potential profit
+        potential_profit = power * (grid_price - self.battery_cycle_cost)
+        discharge_limit = np.select(
+            [potential_profit > self.battery_degradation_cost_per_cycle * 2,
+             potential_profit > self.battery_degradation_cost_per_cycle],
+            [0.10, 0.25],
+            default=0.40
+        )
+        min_charge = self.battery_capacity * discharge_limit
+        
+        # Battery preferred over grid when its combined score is lower
+        battery_combined = (self.cost_weight * (power * self.battery_cycle_cost) +
+                            self.carbon_weight * (((power * carbon_intensity * 0.8) / 1000) * 10))
+        grid_combined = (self.cost_weight * (power * grid_price) +
+                         self.carbon_weight * (((power * carbon_intensity) / 1000) * 10))
+        prefer_battery = (remaining > 0) & (battery_combined < grid_combined)
+        
+        # 2. Battery state-of-charge recurrence (the only sequential part)
+        n_hours = len(power)
+        battery_used = np.zeros(n_hours)
+        battery_available = np.zeros(n_hours)
+        battery_charge = np.zeros(n_hours)
+        battery_charged = np.zeros(n_hours)
+        
+        charge = self.battery_current_charge
+        max_discharge = self.battery_max_discharge
+        capacity = self.battery_capacity
+        for t, (need, prefer, floor, excess) in enumerate(zip(
+                remaining.tolist(), prefer_battery.tolist(),
+                min_charge.tolist(), solar_excess.tolist())):
+            available = min(max_discharge, max(0, charge - floor))
+            battery_available[t] = available
+            if prefer and available > 0:
+                used = min(available, need)
+                battery_used[t] = used
+                charge -= used
+            battery_charge[t] = charge
+            if excess > 0:
+                charged = min(excess, capacity - charge)
+                charge += charged
+                battery_charged[t] = charged
+        self.battery_current_charge = charge
+        
+        # 3. Grid for whatever is left
+        remaining = np.where(battery_used > 0, remaining - battery_used, remaining)
+        grid_used = np.where(remaining > 0, remaining, 0.0)
+        
+        cost = (solar_used * self.solar_maintenance_cost +
+                battery_used * self.battery_cycle_cost +
+                grid_used * grid_price)
+        carbon = (solar_used * 50 +
+                  battery_used * carbon_intensity * 0.8 +
+                  grid_used * carbon_intensity)
+        
+        results = {
+            'timestamp': df['timestamp'].to_numpy(),
+            'hour': hour,
+            'power_needed': power,
+        }
+        if include_allocation:
+            results['allocation'] = [
+                [(source.value, f"{p:.3f}") for source, p in (
+                    (EnergySource.SOLAR, s), (EnergySource.BATTERY, b), (EnergySource.GRID, g)
+                ) if p > 0]
+                for s, b, g in zip(solar_used.tolist(), battery_used.tolist(), grid_used.tolist())
+            ]
+        results.update({
+            'cost': cost,
+            'carbon': carbon,
+            'battery_charge': battery_charge,
+            'battery_charged': battery_charged,
+        })
+        return pd.DataFrame(results)
+
+    def plan_horizon(self,
+                     demand,
+                     grid_price,
+                     carbon_intensity,
+                     shortwave_radiation,
+                     cloud_cover,
+                     hours,
+                     battery_charge: float = None,
+                     method: str = 'dp',
+                     terminal_price: float = None) -> Dict:
+        """
+        Plan battery use over a forecast horizon
+        
+        Uses the BatteryPlanner dynamic program and falls back to the
+        hour-by-hour greedy heuristic if planning fails. With flat prices
+        the program has nothing to shift, so method='greedy' skips it.
+        
+        Args:
+            demand: Forecast demand per hour (kWh)
+            grid_price: Grid price per hour (₹/kWh), scalar or array
+            carbon_intensity: Carbon intensity per hour (gCO2eq/kWh), scalar or array
+            shortwave_radiation: Forecast radiation per hour (W/m²), scalar or array
+            cloud_cover: Forecast cloud cover per hour (0-100), scalar or array
+            hours: Hour of day (0-23) for each step
+            battery_charge: Starting charge (kWh), default battery_current_charge
+            method: 'dp' (dynamic program) or 'greedy'
+            terminal_price: Combined value of a kWh left at the end of the
+                            horizon (see BatteryPlanner.plan)
+            
+        Returns:
+            Schedule dictionary from BatteryPlanner (see BatteryPlanner.plan)
+        """
+        from battery_planner import BatteryPlanner
+        
+        demand = np.asarray(demand, dtype=float)
+        shape = demand.shape
+        solar = self.solar_available_array(
+            np.broadcast_to(np.asarray(shortwave_radiation, dtype=float), shape),
+            np.broadcast_to(np.asarray(cloud_cover, dtype=float), shape),
+            np.broadcast_to(np.asarray(hours), shape)
+        )
+        
+        if battery_charge is None:
+            battery_charge = self.battery_current_charge
+        
+        planner = BatteryPlanner.from_optimizer(self)
+        if method == 'greedy':
+            return planner.greedy_plan(demand, grid_price, carbon_intensity, solar, battery_charge)
+        try:
+            return planner.plan(demand, grid_price, carbon_intensity, solar, battery_charge,
+                                terminal_price=terminal_price)
+        except Exception as e:
+            print(f"Battery planning failed, using greedy schedule: {e}")
+            return planner.greedy_plan(demand, grid_price, carbon_intensity, solar, battery_charge)
+
 
 def main():
     """
@@ -0,0 +1,283 @@
+"""
+Monte Carlo Scenario Engine for Vesta Energy Orchestrator
+Checks how robust a battery policy is when the forecasts turn out wrong.
+
+Demand, solar and carbon trajectories are sampled around the point
+forecasts from their residual distributions. Every candidate policy is
+then run against every scenario in one NumPy pass (arrays of shape
+policies x scenarios), which gives the expected and P95 cost of each
+policy. Large scenario counts are split into chunks that run on a
+process pool.
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from battery_planner import BatteryPlanner
+
+
+def _sample(rng: np.random.Generator, forecast: np.ndarray, residuals: Optional[np.ndarray],
+            sigma: float, n_scenarios: int) -> np.ndarray:
+    """
+    Sample trajectories around a point forecast
+
+    Past residuals (actual - forecast) are bootstrapped if given, otherwise
+    errors are normal with a standard deviation of sigma x forecast.
+    """
+    shape = (n_scenarios, len(forecast))
+    if residuals is not None and len(residuals):
+        errors = rng.choice(np.asarray(residuals, dtype=float).ravel(), size=shape)
+    else:
+        errors = rng.standard_normal(shape) * sigma * np.abs(forecast)
+    return np.maximum(forecast + errors, 0.0)
+
+
+def evaluate_policies(battery: Dict, policies: np.ndarray, demand: np.ndarray,
+                      solar: np.ndarray, carbon_intensity: np.ndarray,
+                      grid_price: np.ndarray, initial_soc: float) -> Dict:
+    """
+    Run every policy against every scenario
+
+    A policy is the planned battery flow per hour (kWh): positive values
+    discharge, negative values charge. In each scenario the flow is cut
+    to what the battery limits, the state of charge and the actual load
+    allow, so a policy never exports energy or over-drains the battery.
+
+    Args:
+        battery: BatteryPlanner parameters (see ScenarioEngine.battery)
+        policies: Array (P, T) of planned battery flows
+        demand, solar, carbon_intensity: Arrays (N, T) of scenario values
+        grid_price: Array (T,) of grid prices
+        initial_soc: Current battery charge (kWh)
+
+    Returns:
+        Dictionary with 'cost', 'carbon' and 'objective' arrays of shape (P, N)
+    """
+    n_policies = len(policies)
+    n_scenarios, n_hours = demand.shape
+    capacity = battery['battery_capacity']
+    efficiency = battery['charge_efficiency']
+    floor = capacity * battery['min_soc_fraction']
+
+    load = np.maximum(demand - solar, 0.0)
+    excess = np.maximum(solar - demand, 0.0)
+    solar_used = np.minimum(demand, solar)
+
+    soc = np.full((n_policies, n_scenarios), float(initial_soc))
+    cost = np.zeros((n_policies, n_scenarios))
+    carbon = np.zeros((n_policies, n_scenarios))
+
+    for t in range(n_hours):
+        target = policies[:, t][:, None]
+        discharge = np.clip(np.minimum(np.minimum(target, soc - floor), load[:, t]),
+                            0.0, battery['max_discharge'])
+        charge_in = np.clip(np.minimum(-target, (capacity - soc) / efficiency),
+                            0.0, battery['max_charge'])
+        from_solar = np.minimum(charge_in, excess[:, t])
+        grid = load[:, t] - discharge + (charge_in - from_solar)
+        soc = soc + charge_in * efficiency - discharge
+
+        solar_total = solar_used[:, t] + from_solar
+        cost += (grid * grid_price[t] + solar_total * battery['solar_cost'] +
+                 (charge_in + discharge) * battery['cycle_cost'])
+        carbon += grid * carbon_intensity[:, t] + solar_total * battery['solar_carbon']
+
+    # Energy left in the battery is worth the mean grid rate (as in BatteryPlanner)
+    grid_rate = (battery['cost_weight'] * grid_price +
+                 battery['carbon_weight'] * (carbon_intensity / 1000) * 10)
+    stored_value = (soc - initial_soc) * grid_rate.mean(axis=1)
+    objective = (battery['cost_weight'] * cost +
+                 battery['carbon_weight'] * (carbon / 1000) * 10 - stored_value)
+
+    return {'cost': cost, 'carbon': carbon, 'objective': objective}
+
+
+def _run_chunk(task: Dict) -> Dict:
+    """Sample and evaluate one chunk of scenarios (runs in a worker process)"""
+    rng = np.random.default_rng(task['seed'])
+    n_scenarios = task['n_scenarios']
+    demand = _sample(rng, task['demand'], task['residuals'].get('demand'),
+                     task['sigma']['demand'], n_scenarios)
+    solar = _sample(rng, task['solar'], task['residuals'].get('solar'),
+                    task['sigma']['solar'], n_scenarios)
+    carbon = _sample(rng, task['carbon_intensity'], task['residuals'].get('carbon_intensity'),
+                     task['sigma']['carbon_intensity'], n_scenarios)
+    return evaluate_policies(task['battery'], task['policies'], demand, solar, carbon,
+                             task['grid_price'], task['initial_soc'])
+
+
+class ScenarioEngine:
+    """
+    Evaluates candidate battery policies across sampled forecast scenarios
+    """
+
+    def __init__(self,
+                 planner: Optional[BatteryPlanner] = None,
+                 residuals: Optional[Dict[str, np.ndarray]] = None,
+                 demand_sigma: float = 0.15,
+                 solar_sigma: float = 0.30,
+                 carbon_sigma: float = 0.10,
+                 chunk_size: int = 2500,
+                 parallel_threshold: int = 5000,
+                 max_workers: Optional[int] = None):
+        """
+        Initialize the scenario engine
+
+        Args:
+            planner: BatteryPlanner with the battery parameters and weights
+            residuals: Past forecast errors (actual - forecast) per series:
+                       'demand', 'solar', 'carbon_intensity'
+            demand_sigma: Relative demand error when no residuals are given
+            solar_sigma: Relative solar error when no residuals are given
+            carbon_sigma: Relative carbon error when no residuals are given
+            chunk_size: Scenarios sampled and evaluated per task
+            parallel_threshold: Use the process pool above this many scenarios
+            max_workers: Process pool size (default: CPU count)
+        """
+        self.planner = planner or BatteryPlanner()
+        self.residuals = residuals or {}
+        self.sigma = {
+            'demand': demand_sigma,
+            'solar': solar_sigma,
+            'carbon_intensity': carbon_sigma,
+        }
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+
+    @property
+    def battery(self) -> Dict:
+        """Planner parameters needed to evaluate policies (picklable)"""
+        p = self.planner
+        return {
+            'battery_capacity': p.battery_capacity,
+            'max_discharge': p.max_discharge,
+            'max_charge': p.max_charge,
+            'min_soc_fraction': p.min_soc_fraction,
+            'charge_efficiency': p.charge_efficiency,
+            'cycle_cost': p.cycle_cost,
+            'solar_cost': p.solar_cost,
+            'solar_carbon': p.solar_carbon,
+            'cost_weight': p.cost_weight,
+            'carbon_weight': p.carbon_weight,
+        }
+
+    @staticmethod
+    def plan_to_policy(plan: Dict) -> np.ndarray:
+        """Battery flow per hour (discharge positive) from a BatteryPlanner schedule"""
+        return plan['discharge'] - plan['charge_from_solar'] - plan['charge_from_grid']
+
+    def candidate_policies(self, demand, grid_price, carbon_intensity, solar,
+                           initial_soc: float) -> Dict[str, np.ndarray]:
+        """Optimal plan, greedy heuristic and idle battery for the point forecast"""
+        planned = self.planner.plan(demand, grid_price, carbon_intensity, solar, initial_soc)
+        greedy = self.planner.greedy_plan(demand, grid_price, carbon_intensity, solar, initial_soc)
+        return {
+            'planned': self.plan_to_policy(planned),
+            'greedy': self.plan_to_policy(greedy),
+            'idle': np.zeros(len(demand)),
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def close(self):
+        """Shut down the process pool"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def run(self,
+            demand,
+            grid_price,
+            carbon_intensity,
+            solar,
+            initial_soc: float,
+            policies: Optional[Dict[str, np.ndarray]] = None,
+            n_scenarios: int = 1000,
+            seed: Optional[int] = None,
+            risk: str = 'expected') -> Dict:
+        """
+        Evaluate battery policies over sampled scenarios
+
+        Args:
+            demand: Point forecast of demand per hour (kWh)
+            grid_price: Grid price per hour (₹/kWh), scalar or array
+            carbon_intensity: Carbon intensity forecast (gCO2eq/kWh), scalar or array
+            solar: Solar forecast per hour (kWh), scalar or array
+            initial_soc: Current battery charge (kWh)
+            policies: Name -> battery flow per hour (default: candidate_policies())
+            n_scenarios: Number of sampled scenarios
+            seed: Random seed (results do not depend on the pool size)
+            risk: Select the best policy by 'expected' or 'p95' objective
+
+        Returns:
+            Dictionary with per-policy statistics and the best policy name
+        """
+        demand = np.asarray(demand, dtype=float)
+        shape = demand.shape
+        grid_price = np.broadcast_to(np.asarray(grid_price, dtype=float), shape).copy()
+        carbon_intensity = np.broadcast_to(np.asarray(carbon_intensity, dtype=float), shape).copy()
+        solar = np.broadcast_to(np.asarray(solar, dtype=float), shape).copy()
+
+        if policies is None:
+            policies = self.candidate_policies(demand, grid_price, carbon_intensity,
+                                               solar, initial_soc)
+        names = list(policies)
+        policy_array = np.stack([np.asarray(policies[name], dtype=float) for name in names])
+
+        # One independent random stream per chunk, so serial and parallel
+        # runs produce the same scenarios
+        sizes = [self.chunk_size] * (n_scenarios // self.chunk_size)
+        if n_scenarios % self.chunk_size:
+            sizes.append(n_scenarios % self.chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+        tasks = [{
+            'seed': chunk_seed,
+            'n_scenarios': size,
+            'demand': demand,
+            'solar': solar,
+            'carbon_intensity': carbon_intensity,
+            'grid_price': grid_price,
+            'residuals': self.residuals,
+            'sigma': self.sigma,
+            'battery': self.battery,
+            'policies': policy_array,
+            'initial_soc': float(initial_soc),
+        } for chunk_seed, size in zip(seeds, sizes)]
+
+        if n_scenarios > self.parallel_threshold and self.max_workers > 1 and len(tasks) > 1:
+            chunks = list(self._get_executor().map(_run_chunk, tasks))
+        else:
+            chunks = [_run_chunk(task) for task in tasks]
+
+        cost = np.concatenate([c['cost'] for c in chunks], axis=1)
+        carbon = np.concatenate([c['carbon'] for c in chunks], axis=1)
+        objective = np.concatenate([c['objective'] for c in chunks], axis=1)
+
+        results = {}
+        for i, name in enumerate(names):
+            results[name] = {
+                'expected_cost': float(cost[i].mean()),
+                'p95_cost': float(np.percentile(cost[i], 95)),
+                'expected_carbon': float(carbon[i].mean()),
+                'expected_objective': float(objective[i].mean()),
+                'p95_objective': float(np.percentile(objective[i], 95)),
+            }
+
+        key = 'p95_objective' if risk == 'p95' else 'expected_objective'
+        best = min(names, key=lambda name: results[name][key])
+
+        return {
+            'n_scenarios': n_scenarios,
+            'horizon': len(demand),
+            'policies': results,
+            'best_policy': best,
+            'best_flow': [float(v) for v in policies[best]],
+        }
@@ -12,7 +12,6 @@ import json
 
 # ML Libraries
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 
@@ -24,6 +23,76 @@ from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
 
 
+def read_chunks(path: str, columns: List[str] = None, chunksize: int = 100_000):
+    """
+    Yield a CSV or Parquet file as DataFrames of at most chunksize rows
+
+    Parquet needs pyarrow; CSV is read with pandas.
+    """
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def read_columns(path: str) -> List[str]:
+    """Column names of a CSV or Parquet file without reading its rows"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_tail(path: str, n_rows: int, chunksize: int = 100_000) -> pd.DataFrame:
+    """Last n_rows of a file, streamed so the whole file is never in memory"""
+    tail = None
+    for chunk in read_chunks(path, chunksize=chunksize):
+        tail = chunk if tail is None else pd.concat([tail, chunk])
+        tail = tail.tail(n_rows)
+    return tail.reset_index(drop=True)
+
+
+class WindowSequence(keras.utils.Sequence):
+    """
+    Feeds (window, target) batches to Keras without materializing all windows
+
+    X is usually a sliding_window_view, so only the windows of the current
+    batch are copied into a contiguous array. With shuffle=True the sample
+    order is reshuffled every epoch, like model.fit(X, y) does for arrays.
+    """
+    
+    def __init__(self, X: np.ndarray, y: np.ndarray = None, batch_size: int = 32,
+                 shuffle: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.X = X
+        self.y = y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.indices = np.arange(len(X))
+        self.on_epoch_end()
+    
+    def __len__(self) -> int:
+        return int(np.ceil(len(self.X) / self.batch_size))
+    
+    def __getitem__(self, index: int):
+        batch = slice(index * self.batch_size, (index + 1) * self.batch_size)
+        if self.shuffle:
+            batch = self.indices[batch]
+        X = np.ascontiguousarray(self.X[batch])
+        if self.y is None:
+            return X
+        return X, self.y[batch]
+    
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.indices)
+
+
 class EnergyDemandForecaster:
     """
     LSTM-based energy demand forecasting model
@@ -34,33 +103,71 @@ class EnergyDemandForecaster:
     - Grid conditions (carbon intensity, price)
     """
     
-    def __init__(self, lookback_hours: int = 24, forecast_horizon: int = 6):
+    def __init__(self, lookback_hours: int = 24, forecast_horizon: int = 6,
+                 models_dir: str = 'models', lstm_units: Tuple[int, int] = (128, 64),
+                 dropout: float = 0.2):
         """
         Initialize the forecaster
         
         Args:
             lookback_hours: Number of historical hours to use for prediction
             forecast_horizon: Number of hours to predict ahead
+            models_dir: Directory for the model, scalers and configuration
+            lstm_units: Units of the first and second LSTM layer
+            dropout: Dropout after each LSTM layer (half of it after the dense layer)
         """
         self.lookback_hours = lookback_hours
         self.forecast_horizon = forecast_horizon
+        self.lstm_units = tuple(lstm_units)
+        self.dropout = dropout
         self.model = None
         self.scaler_X = MinMaxScaler()
         self.scaler_y = MinMaxScaler()
         self.feature_columns = None
-        self.model_path = 'models/demand_forecaster.h5'
-        self.scaler_path = 'models/demand_forecaster_scalers.pkl'
-        self.config_path = 'models/demand_forecaster_config.json'
+        # Timestamp of the newest data the model was trained on (watermark)
+        self.trained_until = None
+        self.model_path = os.path.join(models_dir, 'demand_forecaster.h5')
+        self.scaler_path = os.path.join(models_dir, 'demand_forecaster_scalers.pkl')
+        self.config_path = os.path.join(models_dir, 'demand_forecaster_config.json')
         
         # Ensure models directory exists
-        os.makedirs('models', exist_ok=True)
+        os.makedirs(models_dir, exist_ok=True)
     
     def prepare_data(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
         Prepare data for LSTM training
         Creates sequences of lookback_hours to predict forecast_horizon ahead
+        
+        X is a read-only view of shape (N, lookback_hours, n_features) over
+        the scaled data; feed it to Keras through WindowSequence.
         """
-        # Select features for training
+        self._select_features(df.columns)
+        
+        data = df[self.feature_columns].values
+        
+        # Normalize features
+        data_scaled = self.scaler_X.fit_transform(data).astype(np.float32)
+        
+        # Create sequences as views: X[k] = data_scaled[k:k + lookback_hours]
+        # and y[k] is total_energy_kwh (index 0) for the forecast_horizon
+        # hours after that window. No window is copied, so memory stays
+        # O(rows x features) however long the history is.
+        n_samples = max(len(data_scaled) - self.lookback_hours - self.forecast_horizon, 0)
+        X = np.lib.stride_tricks.sliding_window_view(
+            data_scaled, self.lookback_hours, axis=0
+        ).transpose(0, 2, 1)[:n_samples]
+        y = np.lib.stride_tricks.sliding_window_view(
+            data[:, 0], self.forecast_horizon
+        )[self.lookback_hours:self.lookback_hours + n_samples]
+        
+        # Normalize target variable (copies only N x forecast_horizon values)
+        y = self.scaler_y.fit_transform(y)
+        
+        print(f"Prepared data shape: X={X.shape}, y={y.shape}")
+        return X, y
+    
+    def _select_features(self, columns) -> List[str]:
+        """Set feature_columns to the training features present in columns"""
         self.feature_columns = [
             'total_energy_kwh',  # Target variable (also used as feature)
             'temperature',
@@ -76,32 +183,140 @@ class EnergyDemandForecaster:
         ]
         
         # Ensure all columns exist
-        available_features = [col for col in self.feature_columns if col in df.columns]
+        available_features = [col for col in self.feature_columns if col in columns]
         if len(available_features) < len(self.feature_columns):
             print(f"Warning: Some features missing. Using {len(available_features)}/{len(self.feature_columns)}")
             self.feature_columns = available_features
+        return self.feature_columns
+    
+    def _chunk_windows(self, path: str, chunksize: int):
+        """
+        Stream a file as (data, n_windows) pairs
         
-        data = df[self.feature_columns].values
+        data holds the chunk's feature rows preceded by the rows carried
+        over from the previous chunk, so windows that cross a chunk border
+        are not lost. Windows start at rows 0..n_windows-1 of data, and the
+        sample order and count match prepare_data() on the whole file.
+        """
+        span = self.lookback_hours + self.forecast_horizon
+        carry = np.empty((0, len(self.feature_columns)))
+        for chunk in read_chunks(path, self.feature_columns, chunksize):
+            data = np.concatenate([carry, chunk[self.feature_columns].to_numpy(dtype=float)])
+            n_windows = max(len(data) - span, 0)
+            yield data, n_windows
+            carry = data[n_windows:]
+    
+    def _windows(self, data: np.ndarray, n_windows: int, scaled: bool = True) -> Tuple:
+        """(X, y) views for the first n_windows windows of data, as in prepare_data()"""
+        y = np.lib.stride_tricks.sliding_window_view(
+            data[:, 0], self.forecast_horizon
+        )[self.lookback_hours:self.lookback_hours + n_windows]
+        if not scaled:
+            return None, y
+        X = np.lib.stride_tricks.sliding_window_view(
+            self.scaler_X.transform(data).astype(np.float32), self.lookback_hours, axis=0
+        ).transpose(0, 2, 1)[:n_windows]
+        return X, self.scaler_y.transform(y).astype(np.float32)
+    
+    def fit_scalers_streaming(self, path: str, chunksize: int = 100_000) -> Dict:
+        """
+        Fit scaler_X and scaler_y chunk by chunk with partial_fit
         
-        # Normalize features
-        data_scaled = self.scaler_X.fit_transform(data)
+        Gives the same scalers as prepare_data() on the whole file while
+        holding one chunk in memory.
         
-        # Create sequences
-        X, y = [], []
-        for i in range(self.lookback_hours, len(data_scaled) - self.forecast_horizon):
-            # Input: lookback_hours of all features
-            X.append(data_scaled[i - self.lookback_hours:i])
-            # Output: total_energy_kwh for next forecast_horizon hours
-            y.append(data[i:i + self.forecast_horizon, 0])  # Index 0 is total_energy_kwh
+        Returns:
+            Dictionary with records, samples and the timestamp range
+        """
+        columns = read_columns(path)
+        self._select_features(columns)
+        self.scaler_X = MinMaxScaler()
+        self.scaler_y = MinMaxScaler()
         
-        X = np.array(X)
-        y = np.array(y)
+        records, samples, carried = 0, 0, 0
+        for data, n_windows in self._chunk_windows(path, chunksize):
+            self.scaler_X.partial_fit(data)
+            if n_windows:
+                self.scaler_y.partial_fit(self._windows(data, n_windows, scaled=False)[1])
+            records += len(data) - carried
+            samples += n_windows
+            carried = len(data) - n_windows
+        
+        start = end = None
+        if 'timestamp' in columns:
+            for chunk in read_chunks(path, ['timestamp'], chunksize):
+                start = chunk['timestamp'].iloc[0] if start is None else start
+                end = chunk['timestamp'].iloc[-1]
+        
+        return {'records': records, 'samples': samples, 'start': start, 'end': end}
+    
+    def stream_batches(self, path: str, batch_size: int = 32, start: int = 0,
+                       stop: int = None, chunksize: int = 100_000,
+                       rng: np.random.Generator = None):
+        """
+        Yield scaled (X, y) batches for samples start..stop-1 of a file
         
-        # Normalize target variable
-        y = self.scaler_y.fit_transform(y)
+        Only the current chunk and batch are in memory. Scalers must be
+        fitted first (fit_scalers_streaming or load_model). If rng is
+        given, windows are shuffled within each chunk.
+        """
+        stop = np.inf if stop is None else stop
+        offset = 0
+        pending_X, pending_y, pending = [], [], 0
+        for data, n_windows in self._chunk_windows(path, chunksize):
+            lo, hi = max(start - offset, 0), min(stop - offset, n_windows)
+            offset += n_windows
+            if lo >= hi:
+                if offset >= stop:
+                    break
+                continue
+            
+            X, y = self._windows(data, n_windows)
+            order = np.arange(lo, hi) if rng is None else rng.permutation(np.arange(lo, hi))
+            pos = 0
+            while pos < len(order):
+                take = min(batch_size - pending, len(order) - pos)
+                batch = order[pos:pos + take]
+                pending_X.append(X[batch])
+                pending_y.append(y[batch])
+                pending += take
+                pos += take
+                if pending == batch_size:
+                    yield np.concatenate(pending_X), np.concatenate(pending_y)
+                    pending_X, pending_y, pending = [], [], 0
+        
+        if pending:
+            yield np.concatenate(pending_X), np.concatenate(pending_y)
+    
+    def make_dataset(self, path: str, batch_size: int = 32, start: int = 0,
+                     stop: int = None, chunksize: int = 100_000,
+                     shuffle: bool = False) -> tf.data.Dataset:
+        """
+        tf.data pipeline over stream_batches()
         
-        print(f"Prepared data shape: X={X.shape}, y={y.shape}")
-        return X, y
+        The file is re-read every epoch; with shuffle=True every epoch uses
+        a new order within each chunk.
+        """
+        n_features = len(self.feature_columns)
+        rng = np.random.default_rng() if shuffle else None
+        dataset = tf.data.Dataset.from_generator(
+            lambda: self.stream_batches(path, batch_size, start, stop, chunksize, rng),
+            output_signature=(
+                tf.TensorSpec((None, self.lookback_hours, n_features), tf.float32),
+                tf.TensorSpec((None, self.forecast_horizon), tf.float32),
+            )
+        )
+        n_batches = int(np.ceil((stop - start) / batch_size))
+        return dataset.apply(tf.data.experimental.assert_cardinality(n_batches)).prefetch(tf.data.AUTOTUNE)
+    
+    @staticmethod
+    def _split(X: np.ndarray, y: np.ndarray, validation_split: float) -> Tuple:
+        """
+        Chronological train/validation split by slicing, so X stays a view
+        (same sizes as train_test_split(..., shuffle=False))
+        """
+        n_train = len(X) - int(np.ceil(len(X) * validation_split))
+        return X[:n_train], X[n_train:], y[:n_train], y[n_train:]
     
     def build_model(self, input_shape: Tuple) -> Sequential:
         """
@@ -112,28 +327,33 @@ class EnergyDemandForecaster:
         """
         model = Sequential([
             # First LSTM layer with return sequences
-            LSTM(128, return_sequences=True, input_shape=input_shape),
-            Dropout(0.2),
+            LSTM(self.lstm_units[0], return_sequences=True, input_shape=input_shape),
+            Dropout(self.dropout),
             
             # Second LSTM layer
-            LSTM(64, return_sequences=False),
-            Dropout(0.2),
+            LSTM(self.lstm_units[1], return_sequences=False),
+            Dropout(self.dropout),
             
             # Dense layers for prediction
             Dense(32, activation='relu'),
-            Dropout(0.1),
+            Dropout(self.dropout / 2),
             
             # Output layer: forecast_horizon predictions
             Dense(self.forecast_horizon)
         ])
         
+        self._compile(model)
+        
+        return model
+    
+    @staticmethod
+    def _compile(model: Sequential, learning_rate: float = 0.001):
+        """Compile with the training loss, metrics and an Adam optimizer"""
         model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
             loss='mse',
             metrics=['mae']
         )
-        
-        return model
     
     def train(self, df: pd.DataFrame, epochs: int = 50, batch_size: int = 32,
               validation_split: float = 0.2) -> Dict:
@@ -157,10 +377,8 @@ class EnergyDemandForecaster:
         print("\nPreparing training data...")
         X, y = self.prepare_data(df)
         
-        # Split into train and validation
-        X_train, X_val, y_train, y_val = train_test_split(
-            X, y, test_size=validation_split, shuffle=False  # No shuffle for time series
-        )
+        # Split into train and validation (no shuffle for time series)
+        X_train, X_val, y_train, y_val = self._split(X, y, validation_split)
         
         print(f"Training set: {X_train.shape[0]} samples")
         print(f"Validation set: {X_val.shape[0]} samples")
@@ -170,8 +388,97 @@ class EnergyDemandForecaster:
         self.model = self.build_model(input_shape=(X_train.shape[1], X_train.shape[2]))
         self.model.summary()
         
-        # Define callbacks
-        callbacks = [
+        callbacks = self._callbacks()
+        
+        # Train model
+        print(f"\nTraining model for {epochs} epochs...")
+        history = self.model.fit(
+            WindowSequence(X_train, y_train, batch_size, shuffle=True),
+            epochs=epochs,
+            validation_data=WindowSequence(X_val, y_val, batch_size),
+            callbacks=callbacks,
+            verbose=1
+        )
+        
+        # Evaluate on validation set
+        print("\nEvaluating model...")
+        val_predictions = self.model.predict(WindowSequence(X_val, batch_size=batch_size))
+        metrics = self._evaluate(y_val, val_predictions, X_train.shape[0], X_val.shape[0])
+        
+        # Save model and scalers
+        self.save_model()
+        
+        return {
+            'history': history.history,
+            'metrics': metrics
+        }
+    
+    def train_streaming(self, data_path: str, epochs: int = 50, batch_size: int = 32,
+                        validation_split: float = 0.2, chunksize: int = 100_000) -> Dict:
+        """
+        Train the LSTM model out of core from a CSV or Parquet file
+        
+        Scalers are fitted with partial_fit over streamed chunks, and
+        model.fit reads windows from a tf.data pipeline, so files much
+        larger than memory can be trained on. The train/validation split
+        and the results match train() on the same data.
+        
+        Args:
+            data_path: CSV or Parquet file with energy and weather data
+            epochs: Number of training epochs
+            batch_size: Batch size for training
+            validation_split: Fraction of data for validation (last samples)
+            chunksize: Rows read from the file at a time
+            
+        Returns:
+            Dictionary with training history
+        """
+        print("=" * 70)
+        print("ENERGY DEMAND FORECASTING - STREAMING MODEL TRAINING")
+        print("=" * 70)
+        
+        print(f"\nFitting scalers over {data_path} in chunks of {chunksize} rows...")
+        summary = self.fit_scalers_streaming(data_path, chunksize)
+        n_samples = summary['samples']
+        n_train = n_samples - int(np.ceil(n_samples * validation_split))
+        
+        print(f"Dataset: {summary['records']} records")
+        print(f"Date range: {summary['start']} to {summary['end']}")
+        print(f"Training set: {n_train} samples")
+        print(f"Validation set: {n_samples - n_train} samples")
+        
+        print("\nBuilding LSTM model...")
+        self.model = self.build_model(input_shape=(self.lookback_hours, len(self.feature_columns)))
+        self.model.summary()
+        
+        print(f"\nTraining model for {epochs} epochs...")
+        history = self.model.fit(
+            self.make_dataset(data_path, batch_size, 0, n_train, chunksize, shuffle=True),
+            epochs=epochs,
+            validation_data=self.make_dataset(data_path, batch_size, n_train, n_samples, chunksize),
+            callbacks=self._callbacks(),
+            verbose=1
+        )
+        
+        # Only the validation targets and predictions (N x forecast_horizon) are kept
+        print("\nEvaluating model...")
+        y_val, val_predictions = [], []
+        for X_batch, y_batch in self.stream_batches(data_path, batch_size, n_train, n_samples, chunksize):
+            val_predictions.append(self.model.predict_on_batch(X_batch))
+            y_val.append(y_batch)
+        metrics = self._evaluate(np.concatenate(y_val), np.concatenate(val_predictions),
+                                 n_train, n_samples - n_train)
+        
+        self.save_model()
+        
+        return {
+            'history': history.history,
+            'metrics': metrics
+        }
+    
+    def _callbacks(self) -> List:
+        """Early stopping, checkpointing and learning-rate schedule for fit()"""
+        return [
             EarlyStopping(
                 monitor='val_loss',
                 patience=10,
@@ -192,21 +499,10 @@ class EnergyDemandForecaster:
                 verbose=1
             )
         ]
-        
-        # Train model
-        print(f"\nTraining model for {epochs} epochs...")
-        history = self.model.fit(
-            X_train, y_train,
-            epochs=epochs,
-            batch_size=batch_size,
-            validation_data=(X_val, y_val),
-            callbacks=callbacks,
-            verbose=1
-        )
-        
-        # Evaluate on validation set
-        print("\nEvaluating model...")
-        val_predictions = self.model.predict(X_val)
+    
+    def _evaluate(self, y_val: np.ndarray, val_predictions: np.ndarray,
+                  n_train: int, n_val: int) -> Dict:
+        """Validation metrics in kWh from scaled targets and predictions"""
         val_predictions = self.scaler_y.inverse_transform(val_predictions)
         y_val_actual = self.scaler_y.inverse_transform(y_val)
         
@@ -221,8 +517,8 @@ class EnergyDemandForecaster:
             'mse': float(mse),
             'rmse': float(rmse),
             'r2': float(r2),
-            'training_samples': int(X_train.shape[0]),
-            'validation_samples': int(X_val.shape[0])
+            'training_samples': int(n_train),
+            'validation_samples': int(n_val)
         }
         
         print("\n" + "=" * 70)
@@ -233,13 +529,7 @@ class EnergyDemandForecaster:
         print(f"R² Score:                   {r2:.4f}")
         print("=" * 70)
         
-        # Save model and scalers
-        self.save_model()
-        
-        return {
-            'history': history.history,
-            'metrics': metrics
-        }
+        return metrics
     
     def retrain(self, new_data_path: str, epochs: int = 20) -> Dict:
         """
@@ -270,13 +560,14 @@ class EnergyDemandForecaster:
         # Prepare new data
         X_new, y_new = self.prepare_data(df_new)
         
+        X_train, X_val, y_train, y_val = self._split(X_new, y_new, 0.2)
+        
         # Continue training
         print(f"\nRetraining model for {epochs} additional epochs...")
         history = self.model.fit(
-            X_new, y_new,
+            WindowSequence(X_train, y_train, 32, shuffle=True),
             epochs=epochs,
-            batch_size=32,
-            validation_split=0.2,
+            validation_data=WindowSequence(X_val, y_val, 32),
             verbose=1
         )
         
@@ -290,6 +581,70 @@ class EnergyDemandForecaster:
             'new_data_samples': int(X_new.shape[0])
         }
     
+    def fine_tune(self, new_data: pd.DataFrame, replay_data: pd.DataFrame = None,
+                  replay_ratio: float = 1.0, epochs: int = 5, batch_size: int = 32,
+                  learning_rate: float = 1e-4, trained_until: str = None) -> Dict:
+        """
+        Warm-start the loaded model on new data only
+        
+        Unlike retrain(), the scalers are kept and training continues from
+        the current weights at a low learning rate. A random sample of
+        windows from older data (replay_ratio x the new windows) is mixed
+        in so the model does not forget earlier patterns.
+        
+        Args:
+            new_data: Rows since the last training run, preceded by
+                      lookback_hours rows of context
+            replay_data: Older rows to draw replay windows from
+            replay_ratio: Replay windows per new window
+            epochs: Number of fine-tuning epochs
+            batch_size: Batch size for training
+            learning_rate: Adam learning rate for fine-tuning
+            trained_until: New watermark stored with the model
+            
+        Returns:
+            Dictionary with training history and sample counts
+        """
+        if self.model is None:
+            raise ValueError("Model not trained or loaded. Train or load model first.")
+        
+        # Every complete window, so the newest row (the watermark) is a target
+        span = self.lookback_hours + self.forecast_horizon
+        data = new_data[self.feature_columns].to_numpy(dtype=float)
+        X, y = self._windows(data, max(len(data) - span + 1, 0))
+        if not len(X):
+            raise ValueError(f"Need at least {span} hours of data to fine-tune")
+        n_new = len(X)
+        
+        n_replay = 0
+        if replay_data is not None and replay_ratio > 0:
+            old = replay_data[self.feature_columns].to_numpy(dtype=float)
+            X_old, y_old = self._windows(old, max(len(old) - span + 1, 0))
+            n_replay = min(len(X_old), int(round(n_new * replay_ratio)))
+            if n_replay:
+                sample = np.sort(np.random.choice(len(X_old), n_replay, replace=False))
+                X = np.concatenate([X, X_old[sample]])
+                y = np.concatenate([y, y_old[sample]])
+        
+        print(f"Fine-tuning on {n_new} new + {n_replay} replay samples...")
+        self._compile(self.model, learning_rate)
+        history = self.model.fit(
+            WindowSequence(X, y, batch_size, shuffle=True),
+            epochs=epochs,
+            verbose=2
+        )
+        
+        if trained_until is not None:
+            self.trained_until = trained_until
+        self.save_model()
+        
+        return {
+            'history': history.history,
+            'new_samples': int(n_new),
+            'replay_samples': int(n_replay),
+            'trained_until': self.trained_until
+        }
+    
     def predict(self, recent_data: pd.DataFrame) -> np.ndarray:
         """
         Predict energy demand for next forecast_horizon hours
@@ -300,24 +655,54 @@ class EnergyDemandForecaster:
         Returns:
             Array of predicted energy consumption for next forecast_horizon hours
         """
+        return self.predict_batch([recent_data])[0]
+    
+    def _stack_windows(self, windows) -> np.ndarray:
+        """
+        Stack input windows into one (N, lookback_hours, n_features) array
+        
+        Accepts a list of DataFrames (each with at least lookback_hours rows)
+        or an already stacked array of raw feature values.
+        """
+        if isinstance(windows, np.ndarray):
+            if windows.ndim != 3 or windows.shape[1] < self.lookback_hours:
+                raise ValueError(f"Expected shape (N, >={self.lookback_hours}, n_features), got {windows.shape}")
+            return windows[:, -self.lookback_hours:, :].astype(np.float64)
+        
+        stacked = []
+        for window in windows:
+            data = window[self.feature_columns].values
+            if len(data) < self.lookback_hours:
+                raise ValueError(f"Need at least {self.lookback_hours} hours of recent data")
+            stacked.append(data[-self.lookback_hours:])
+        return np.stack(stacked).astype(np.float64)
+    
+    def predict_batch(self, windows) -> np.ndarray:
+        """
+        Predict energy demand for many sites / load profiles at once
+        
+        All windows are scaled with one vectorized transform and run through
+        the model in a single forward pass.
+        
+        Args:
+            windows: List of DataFrames with last lookback_hours of data,
+                     or array of shape (N, lookback_hours, n_features)
+            
+        Returns:
+            Array of shape (N, forecast_horizon) with predicted consumption
+        """
         if self.model is None:
             raise ValueError("Model not trained or loaded. Train or load model first.")
         
-        # Prepare input data
-        data = recent_data[self.feature_columns].values
-        data_scaled = self.scaler_X.transform(data)
+        X = self._stack_windows(windows)
+        n_windows, lookback, n_features = X.shape
         
-        # Create sequence (needs to be exactly lookback_hours)
-        if len(data_scaled) < self.lookback_hours:
-            raise ValueError(f"Need at least {self.lookback_hours} hours of recent data")
-        
-        X = data_scaled[-self.lookback_hours:].reshape(1, self.lookback_hours, -1)
+        # One scaler call over every row of every window
+        X_scaled = self.scaler_X.transform(X.reshape(-1, n_features)).reshape(n_windows, lookback, n_features)
         
         # Predict
-        prediction_scaled = self.model.predict(X, verbose=0)
-        prediction = self.scaler_y.inverse_transform(prediction_scaled)
-        
-        return prediction[0]
+        prediction_scaled = self.model.predict(X_scaled, verbose=0)
+        return self.scaler_y.inverse_transform(prediction_scaled)
     
     def save_model(self):
         """Save model, scalers, and configuration"""
@@ -334,11 +719,15 @@ class EnergyDemandForecaster:
         config = {
             'lookback_hours': self.lookback_hours,
             'forecast_horizon': self.forecast_horizon,
+            'lstm_units': list(self.lstm_units),
+            'dropout': self.dropout,
             'feature_columns': self.feature_columns,
-            'trained_date': datetime.now().isoformat()
+            'trained_date': datetime.now().isoformat(),
+            'trained_until': self.trained_until
         }
         with open(self.config_path, 'w') as f:
             json.dump(config, f, indent=2)
+
         
         print(f"\n✓ Model saved to: {self.model_path}")
         print(f"✓ Scalers saved to: {self.scaler_path}")
@@ -347,8 +736,10 @@ class EnergyDemandForecaster:
     def load_model(self) -> bool:
         """Load saved model, scalers, and configuration"""
         try:
-            # Load model
-            self.model = load_model(self.model_path)
+            # Load model (the saved compile config does not deserialize
+            # across Keras versions, so compile here instead)
+            self.model = load_model(self.model_path, compile=False)
+            self._compile(self.model)
             
             # Load scalers
             scalers = joblib.load(self.scaler_path)
@@ -361,6 +752,9 @@ class EnergyDemandForecaster:
             self.lookback_hours = config['lookback_hours']
             self.forecast_horizon = config['forecast_horizon']
             self.feature_columns = config['feature_columns']
+            self.lstm_units = tuple(config.get('lstm_units', self.lstm_units))
+            self.dropout = config.get('dropout', self.dropout)
+            self.trained_until = config.get('trained_until')
             
             print(f"✓ Model loaded from: {self.model_path}")
             return True
@@ -381,25 +775,18 @@ def main():
         print("Please run 'python module3-ai/collect_all_data.py' first to generate datasets.")
         return
     
-    print("Loading dataset...")
-    df = pd.read_csv(data_path)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    print(f"Dataset loaded: {len(df)} records")
-    print(f"Date range: {df['timestamp'].min()} to {df['timestamp'].max()}")
-    
     # Initialize forecaster
     # Predict 6 hours ahead using 24 hours of historical data
     forecaster = EnergyDemandForecaster(lookback_hours=24, forecast_horizon=6)
     
-    # Train model
-    results = forecaster.train(df, epochs=50, batch_size=32)
+    # Train model (streamed in chunks, so the dataset never has to fit in memory)
+    results = forecaster.train_streaming(data_path, epochs=50, batch_size=32)
     
     # Test prediction on recent data
     print("\n" + "=" * 70)
     print("TESTING PREDICTION")
     print("=" * 70)
-    recent_data = df.tail(24)  # Last 24 hours
+    recent_data = read_tail(data_path, 24)  # Last 24 hours
     prediction = forecaster.predict(recent_data)
     
     print("\nPredicted energy consumption for next 6 hours:")
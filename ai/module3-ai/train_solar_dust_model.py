@@ -4,16 +4,18 @@ Predicts dust accumulation on solar panels using LDR readings and power output
 """
 
 import os
+import time
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional
 import json
 
 # ML Libraries
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import (RandomForestRegressor, GradientBoostingRegressor,
+                              HistGradientBoostingRegressor)
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 
@@ -34,23 +36,58 @@ class SolarDustPredictor:
     - Cleaning recommendation (boolean)
     """
     
-    def __init__(self, model_type: str = 'random_forest'):
+    SHADOW_VOLATILITY = 0.05          # Efficiency volatility above this is a shadow/cloud
+    EFFICIENCY_LOSS_PER_DUST = 0.007  # Efficiency lost per % dust
+    REVENUE_PER_KWH = 6               # ₹/kWh
+    OPTIONAL_FEATURES = ('power_volatility', 'efficiency_volatility')  # 0.0 when missing
+    
+    # Hyperparameters per model type (override with params=...)
+    DEFAULT_PARAMS = {
+        'random_forest': {
+            'n_estimators': 100,
+            'max_depth': 15,
+            'min_samples_split': 5,
+            'min_samples_leaf': 2,
+        },
+        'gradient_boosting': {
+            'n_estimators': 100,
+            'max_depth': 5,
+            'learning_rate': 0.1,
+        },
+        # Bins features into 255 buckets: scales to millions of rows
+        'hist_gradient_boosting': {
+            'max_iter': 200,
+            'learning_rate': 0.1,
+            'max_leaf_nodes': 31,
+        },
+    }
+    
+    def __init__(self, model_type: str = 'random_forest', params: Dict = None,
+                 models_dir: str = 'models', n_jobs: int = -1):
         """
         Initialize the predictor
         
         Args:
-            model_type: 'random_forest' or 'gradient_boosting'
+            model_type: 'random_forest', 'gradient_boosting' or
+                        'hist_gradient_boosting' (large datasets)
+            params: Hyperparameters overriding DEFAULT_PARAMS[model_type]
+            models_dir: Directory for the model, scaler and configuration
+            n_jobs: CPU cores for fitting (-1: all). Random forest builds
+                    trees in parallel and histogram boosting splits each
+                    tree's work over threads; gradient_boosting is sequential.
         """
         self.model_type = model_type
+        self.params = dict(params or {})
+        self.n_jobs = n_jobs
         self.model = None
         self.scaler = StandardScaler()
         self.feature_columns = None
-        self.model_path = f'models/solar_dust_{model_type}.pkl'
-        self.scaler_path = f'models/solar_dust_scaler.pkl'
-        self.config_path = f'models/solar_dust_config.json'
+        self.model_path = os.path.join(models_dir, f'solar_dust_{model_type}.pkl')
+        self.scaler_path = os.path.join(models_dir, 'solar_dust_scaler.pkl')
+        self.config_path = os.path.join(models_dir, 'solar_dust_config.json')
         
         # Ensure models directory exists
-        os.makedirs('models', exist_ok=True)
+        os.makedirs(models_dir, exist_ok=True)
     
     def prepare_features(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -65,8 +102,9 @@ class SolarDustPredictor:
         # Calculate volatility feature for shadow vs dust differentiation
         # Dust: gradual monotonic decrease in efficiency
         # Shadow: sudden drops and recoveries (high volatility)
-        df['power_volatility'] = df['actual_power_kw'].rolling(window=6, min_periods=1).std()
-        df['efficiency_volatility'] = df['efficiency_ratio'].rolling(window=6, min_periods=1).std()
+        # (a single reading has no spread: 0.0, as in predict())
+        df['power_volatility'] = df['actual_power_kw'].rolling(window=6, min_periods=1).std().fillna(0.0)
+        df['efficiency_volatility'] = df['efficiency_ratio'].rolling(window=6, min_periods=1).std().fillna(0.0)
         
         # Define features for prediction
         self.feature_columns = [
@@ -99,34 +137,35 @@ class SolarDustPredictor:
     
     def build_model(self):
         """Build the machine learning model"""
+        if self.model_type not in self.DEFAULT_PARAMS:
+            raise ValueError(f"Unknown model type: {self.model_type}")
+        params = {**self.DEFAULT_PARAMS[self.model_type], **self.params}
+        
         if self.model_type == 'random_forest':
-            self.model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=15,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1
-            )
-        elif self.model_type == 'gradient_boosting':
-            self.model = GradientBoostingRegressor(
-                n_estimators=100,
-                max_depth=5,
-                learning_rate=0.1,
-                random_state=42
-            )
+            self.model = RandomForestRegressor(random_state=42, n_jobs=self.n_jobs, **params)
+        elif self.model_type == 'hist_gradient_boosting':
+            self.model = HistGradientBoostingRegressor(random_state=42, **params)
         else:
-            raise ValueError(f"Unknown model type: {self.model_type}")
+            self.model = GradientBoostingRegressor(random_state=42, **params)
         
         return self.model
     
+    def fit(self, X: np.ndarray, y: np.ndarray):
+        """Build a new model and fit it on prepared features using n_jobs cores"""
+        self.build_model()
+        # Histogram boosting uses OpenMP threads rather than an n_jobs argument
+        limit = self.n_jobs if self.n_jobs and self.n_jobs > 0 else None
+        with threadpool_limits(limits=limit, user_api='openmp'):
+            self.model.fit(X, y)
+        return self.model
+    
     def train(self, df: pd.DataFrame, test_size: float = 0.2) -> Dict:
         """
         Train the dust prediction model
         
         Args:
             df: DataFrame with solar panel data
-            test_size: Fraction of data for testing
+            test_size: Fraction of data for testing (the most recent readings)
             
         Returns:
             Dictionary with training metrics
@@ -135,22 +174,28 @@ class SolarDustPredictor:
         print("SOLAR DUST PREDICTION - MODEL TRAINING")
         print("=" * 70)
         
+        # Readings in time order: the rolling features and the split need it
+        if 'timestamp' in df.columns:
+            df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        
         # Prepare data
         print("\nPreparing training data...")
         X, y = self.prepare_features(df)
         
-        # Split into train and test
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=42, shuffle=True
-        )
+        # Time-ordered split: test on the latest readings, so the model is
+        # not scored on neighbours of the samples it was trained on
+        split = int(len(X) * (1 - test_size))
+        X_train, X_test = X[:split], X[split:]
+        y_train, y_test = y[:split], y[split:]
         
         print(f"Training set: {X_train.shape[0]} samples")
-        print(f"Test set: {X_test.shape[0]} samples")
+        print(f"Test set: {X_test.shape[0]} samples (most recent)")
         
         # Build and train model
-        print(f"\nTraining {self.model_type} model...")
-        self.build_model()
-        self.model.fit(X_train, y_train)
+        print(f"\nTraining {self.model_type} model (n_jobs={self.n_jobs})...")
+        start = time.perf_counter()
+        self.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
         
         # Make predictions
         print("\nEvaluating model...")
@@ -178,7 +223,8 @@ class SolarDustPredictor:
                 'r2': float(test_r2)
             },
             'training_samples': int(X_train.shape[0]),
-            'test_samples': int(X_test.shape[0])
+            'test_samples': int(X_test.shape[0]),
+            'fit_seconds': round(fit_seconds, 3)
         }
         
         print("\n" + "=" * 70)
@@ -193,6 +239,7 @@ class SolarDustPredictor:
         print(f"  MAE:  {test_mae:.2f}% dust")
         print(f"  RMSE: {test_rmse:.2f}%")
         print(f"  R²:   {test_r2:.4f}")
+        print(f"\nFit time: {fit_seconds:.2f}s")
         
         # Feature importance (for tree-based models)
         if hasattr(self.model, 'feature_importances_'):
@@ -218,71 +265,95 @@ class SolarDustPredictor:
         Differentiates between temporary shadows and permanent dust
         
         Args:
-            current_data: DataFrame with current sensor readings
+            current_data: DataFrame with current sensor readings (first row is used)
             
         Returns:
             Dictionary with predictions and recommendations
         """
-        if self.model is None:
-            raise ValueError("Model not trained or loaded. Train or load model first.")
-        
-        # Create a copy to avoid modifying the input DataFrame
-        data = current_data.copy()
+        batch = self.predict_batch(current_data.iloc[:1])
+        result = {column: values[0].item() for column, values in batch.items()}
         
-        # Calculate volatility if not present
-        if 'power_volatility' not in data.columns:
-            data['power_volatility'] = 0.0
-        if 'efficiency_volatility' not in data.columns:
-            data['efficiency_volatility'] = 0.0
-        
-        # Prepare features
-        X = data[self.feature_columns].values
-        X = self.scaler.transform(X)
-        
-        # Predict
-        dust_percentage = self.model.predict(X)[0]
-        
-        # Differentiate between shadow and dust
-        # High volatility = likely shadow/cloud
-        # Low volatility + low efficiency = likely dust
-        volatility = data['efficiency_volatility'].values[0] if 'efficiency_volatility' in data.columns else 0
+        if result['is_shadow']:
+            result['recommendation'] = (
+                f"Low efficiency detected but high volatility ({result['volatility']:.3f}). "
+                "Likely temporary shadow/cloud, not dust. No cleaning needed."
+            )
+        else:
+            result['recommendation'] = self._generate_recommendation(
+                result['dust_percentage'], result['urgency'])
+        del result['action']
+        return result
+    
+    def predict_batch(self, data: pd.DataFrame, id_column: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Predict dust for every row (e.g. every panel string of a fleet) at once
         
-        is_shadow = volatility > 0.05  # High volatility indicates temporary shadow
-        issue_type = "Shadow/Cloud" if is_shadow else "Dust"
+        All rows go through one scaler transform and one model call, and the
+        shadow/dust classification, urgency and savings are array operations.
         
-        # Generate recommendations
-        if is_shadow:
-            needs_cleaning = False
-            urgency = 'None'
-            recommendation = f"Low efficiency detected but high volatility ({volatility:.3f}). Likely temporary shadow/cloud, not dust. No cleaning needed."
-        else:
-            needs_cleaning = dust_percentage > 40
-            urgency = 'High' if dust_percentage > 60 else 'Medium' if dust_percentage > 40 else 'Low'
+        Args:
+            data: DataFrame with one row of sensor readings per panel
+            id_column: Column identifying the panel, copied to the result
             
-            # Calculate potential savings from cleaning
-            efficiency_loss = dust_percentage * 0.007
-            if 'expected_power_kw' in data.columns:
-                expected_power = data['expected_power_kw'].values[0]
-                potential_gain_kw = expected_power * efficiency_loss
-                potential_revenue_gain = potential_gain_kw * 6  # ₹6/kWh
-            else:
-                potential_gain_kw = 0
-                potential_revenue_gain = 0
+        Returns:
+            Dictionary of equal-length arrays (one entry per row):
+            dust_percentage, issue_type, is_shadow, volatility, needs_cleaning,
+            urgency, action ('none', 'monitor', 'schedule', 'clean_now'),
+            efficiency_loss_percent, potential_power_gain_kw and
+            potential_revenue_gain_per_hour
             
-            recommendation = self._generate_recommendation(dust_percentage, urgency)
-        
-        return {
-            'dust_percentage': float(dust_percentage),
-            'issue_type': issue_type,
-            'is_shadow': bool(is_shadow),
-            'volatility': float(volatility),
-            'needs_cleaning': bool(needs_cleaning),
+        Raises:
+            ValueError: a feature column other than the volatilities is missing
+        """
+        if self.model is None:
+            raise ValueError("Model not trained or loaded. Train or load model first.")
+        
+        # Volatility features default to 0 (no history for these readings);
+        # any other missing feature would silently skew the prediction
+        missing = [column for column in self.feature_columns
+                   if column not in data.columns and column not in self.OPTIONAL_FEATURES]
+        if missing:
+            raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+        
+        n = len(data)
+        zeros = np.zeros(n)
+        X = np.column_stack([
+            data[column].to_numpy(dtype=float) if column in data.columns else zeros
+            for column in self.feature_columns
+        ]) if n else np.empty((0, len(self.feature_columns)))
+        dust = self.model.predict(self.scaler.transform(X)) if n else zeros
+        
+        # High volatility = likely shadow/cloud; low volatility = dust
+        volatility = (data['efficiency_volatility'].to_numpy(dtype=float)
+                      if 'efficiency_volatility' in data.columns else zeros)
+        is_shadow = volatility > self.SHADOW_VOLATILITY
+        
+        urgency = np.select([is_shadow, dust > 60, dust > 40], ['None', 'High', 'Medium'], 'Low')
+        action = np.select([is_shadow | (dust < 20), dust < 40, dust < 60],
+                           ['none', 'monitor', 'schedule'], 'clean_now')
+        
+        # Potential savings from cleaning (none for shadows)
+        efficiency_loss = np.where(is_shadow, 0.0, dust * self.EFFICIENCY_LOSS_PER_DUST)
+        expected_power = (data['expected_power_kw'].to_numpy(dtype=float)
+                          if 'expected_power_kw' in data.columns else zeros)
+        potential_gain_kw = expected_power * efficiency_loss
+        
+        result = {}
+        if id_column is not None:
+            result[id_column] = data[id_column].to_numpy()
+        result.update({
+            'dust_percentage': dust.astype(float),
+            'issue_type': np.where(is_shadow, 'Shadow/Cloud', 'Dust'),
+            'is_shadow': is_shadow,
+            'volatility': volatility,
+            'needs_cleaning': ~is_shadow & (dust > 40),
             'urgency': urgency,
-            'efficiency_loss_percent': float(dust_percentage * 0.007 * 100) if not is_shadow else 0.0,
-            'potential_power_gain_kw': float(potential_gain_kw) if not is_shadow else 0.0,
-            'potential_revenue_gain_per_hour': float(potential_revenue_gain) if not is_shadow else 0.0,
-            'recommendation': recommendation
-        }
+            'action': action,
+            'efficiency_loss_percent': efficiency_loss * 100,
+            'potential_power_gain_kw': potential_gain_kw,
+            'potential_revenue_gain_per_hour': potential_gain_kw * self.REVENUE_PER_KWH,
+        })
+        return result
     
     def _generate_recommendation(self, dust_percentage: float, urgency: str) -> str:
         """Generate human-readable recommendation"""
@@ -306,6 +377,7 @@ class SolarDustPredictor:
         # Save configuration
         config = {
             'model_type': self.model_type,
+            'params': self.params,
             'feature_columns': self.feature_columns,
             'trained_date': datetime.now().isoformat()
         }
@@ -329,6 +401,7 @@ class SolarDustPredictor:
             with open(self.config_path, 'r') as f:
                 config = json.load(f)
             self.model_type = config['model_type']
+            self.params = config.get('params', {})
             self.feature_columns = config['feature_columns']
             
             print(f"✓ Model loaded from: {self.model_path}")
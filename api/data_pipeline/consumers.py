@@ -67,3 +67,42 @@ class SensorConsumer(AsyncWebsocketConsumer):
             'type': 'sensor_update',
             'data': event['data']
         }))
+
+
+class DecisionConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer for streaming AI output to frontend clients.
+    Pushes every new decision, forecast and peak-hour update as it is made,
+    so dashboards no longer need to poll the AI endpoints.
+    """
+
+    async def connect(self):
+        """Join the AI decisions group."""
+        self.group_name = 'ai_decisions'
+
+        await self.channel_layer.group_add(
+            self.group_name,
+            self.channel_name
+        )
+
+        await self.accept()
+        logger.info(f"Decision stream client connected: {self.channel_name}")
+
+    async def disconnect(self, close_code):
+        """Leave the AI decisions group."""
+        await self.channel_layer.group_discard(
+            self.group_name,
+            self.channel_name
+        )
+        logger.info(f"Decision stream client disconnected: {self.channel_name}")
+
+    async def decision_update(self, event):
+        """
+        Called when the DecisionPublisher broadcasts to the group.
+        The event name ('ai_decision', 'forecast_update', 'peak_hours_update')
+        becomes the message type seen by the client.
+        """
+        await self.send(text_data=json.dumps({
+            'type': event['event'],
+            'data': event['data']
+        }))
@@ -0,0 +1,94 @@
+"""
+Django management command to run the AI inference worker.
+Computes decisions in the background so /api/ai/decide/ only reads
+the latest result from Redis.
+
+A new decision is computed every --interval seconds, and sooner when
+a sensor value changes materially or a new hour starts (mqtt_listener),
+grid data is refreshed, or a client calls /api/ai/decide/?fresh=1.
+
+Usage:
+    python manage.py ai_worker
+    python manage.py ai_worker --interval 10
+"""
+import time
+import logging
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from data_pipeline.services.ai_registry import get_registry
+from data_pipeline.services.cache_manager import DecisionStore
+from data_pipeline.tasks import compute_ai_decision
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Runs the background AI inference worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.AI_DECISION_INTERVAL,
+            help='Seconds between scheduled decisions'
+        )
+        parser.add_argument(
+            '--min-interval',
+            type=float,
+            default=1.0,
+            help='Minimum seconds between decisions triggered by new data'
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=0.2,
+            help='Seconds between checks for refresh requests'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Compute a single decision and exit'
+        )
+
+    def handle(self, *args, **options):
+        """Main entry point for the command."""
+        store = DecisionStore()
+        interval = options['interval']
+        min_interval = options['min_interval']
+        heartbeat_ttl = max(30, int(interval * 3))
+
+        self.stdout.write(self.style.SUCCESS('Starting AI inference worker...'))
+        get_registry().warmup()
+
+        if options['once']:
+            self.run_decision()
+            return
+
+        last_run = None
+        try:
+            while True:
+                store.heartbeat(heartbeat_ttl)
+                now = time.monotonic()
+
+                due = last_run is None or now - last_run >= interval
+                triggered = (last_run is None or now - last_run >= min_interval) and store.pop_refresh_request()
+                if due or triggered:
+                    self.run_decision()
+                    last_run = now
+
+                time.sleep(options['poll'])
+
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nShutting down AI inference worker...'))
+
+    def run_decision(self):
+        """Compute and store one decision, logging failures instead of exiting."""
+        try:
+            entry = compute_ai_decision()
+            self.stdout.write(
+                self.style.SUCCESS(f"✓ Decision #{entry['seq']} stored")
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error computing decision: {e}'))
+            logger.error(f'AI worker error: {e}')
@@ -16,7 +16,7 @@ from asgiref.sync import async_to_sync
 import paho.mqtt.client as mqtt
 
 from data_pipeline.models import SensorReading
-from data_pipeline.services.cache_manager import SensorBufferManager
+from data_pipeline.services.cache_manager import SensorBufferManager, ForecastCache, DecisionStore
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +29,10 @@ class Command(BaseCommand):
         self.buffer_manager = SensorBufferManager()
         self.channel_layer = get_channel_layer()
         self.mqtt_client = None
+        self.last_hour_bucket = None
+        self.decision_store = DecisionStore()
+        # sensor_type -> value of the last reading that requested a decision
+        self.refresh_values = {}
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -181,6 +185,19 @@ class Command(BaseCommand):
                 timestamp=timestamp.isoformat()
             )
 
+            # First reading of a new hour changes the forecast inputs
+            hour_bucket = ForecastCache.hour_bucket(timestamp)
+            new_hour = hour_bucket != self.last_hour_bucket
+            if new_hour:
+                self.last_hour_bucket = hour_bucket
+                ForecastCache.invalidate()
+
+            # Let the AI worker react to material changes only; every
+            # decision is a DB row and an actuator command
+            if new_hour or self.is_material_change(sensor_type, value):
+                self.refresh_values[sensor_type] = value
+                self.decision_store.request_refresh()
+
             # Broadcast to WebSocket clients
             self.broadcast_sensor_data(sensor_reading)
 
@@ -196,6 +213,16 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Error processing message: {e}'))
             logger.error(f'Error processing message: {e}')
 
+    def is_material_change(self, sensor_type, value):
+        """
+        True if value moved by more than AI_REFRESH_CHANGE (relative) since
+        the last reading of this type that requested a decision.
+        """
+        last = self.refresh_values.get(sensor_type)
+        if last is None:
+            return True
+        return abs(value - last) > settings.AI_REFRESH_CHANGE * max(abs(last), 1.0)
+
     def broadcast_sensor_data(self, sensor_reading):
         """
         Broadcast sensor data to WebSocket clients via Django Channels.
@@ -6,4 +6,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     path('ws/sensors/', consumers.SensorConsumer.as_asgi()),
+    path('ws/decisions/', consumers.DecisionConsumer.as_asgi()),
 ]
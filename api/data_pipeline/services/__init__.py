@@ -1,12 +1,29 @@
 # Services module initialization
-from .electricity_maps import ElectricityMapsService
-from .weather import WeatherService
-from .cache_manager import SensorBufferManager
-from .energy_optimizer import EnergySourceOptimizer
-
-__all__ = [
-    'ElectricityMapsService',
-    'WeatherService',
-    'SensorBufferManager',
-    'EnergySourceOptimizer',
-]
+#
+# Services are imported on first attribute access (PEP 562) so that
+# importing one service, or running manage.py commands that need none,
+# does not pull in every service's dependencies.
+import importlib
+
+_SERVICES = {
+    'ElectricityMapsService': '.electricity_maps',
+    'WeatherService': '.weather',
+    'SensorBufferManager': '.cache_manager',
+    'EnergySourceOptimizer': '.energy_optimizer',
+    'ConditionsProvider': '.conditions',
+}
+
+__all__ = list(_SERVICES)
+
+
+def __getattr__(name):
+    if name in _SERVICES:
+        module = importlib.import_module(_SERVICES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -7,31 +7,58 @@ This service provides an interface for the API to call AI models for:
 - Real-time decision making
 """
 
+import copy
 import os
 import sys
-import numpy as np
-import pandas as pd
+import threading
+from types import SimpleNamespace
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-import json
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from django.conf import settings
 from django.utils import timezone
-import paho.mqtt.publish as publish
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 
-# Add AI module to path
+from .cache_manager import OptimizerStateStore, ForecastCache
+from .conditions import ConditionsProvider
+from .decision_publisher import get_decision_publisher
+from .simple_ai import SimpleEnergyForecaster
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# numpy, pandas and the AI module are imported on first use so that
+# importing this module (e.g. from manage.py commands) stays cheap
 AI_MODULE_PATH = os.path.join(settings.BASE_DIR, '..', 'ai', 'module3-ai')
-sys.path.insert(0, AI_MODULE_PATH)
 
-# Import AI components
-try:
-    from train_demand_model import EnergyDemandForecaster
-    from optimize_sources import SourceOptimizer, EnergySource
-    AI_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: AI modules not available: {e}")
-    AI_AVAILABLE = False
+_ai_modules = None
+_ai_modules_lock = threading.Lock()
+
+
+def load_ai_modules() -> Optional[SimpleNamespace]:
+    """
+    Import the AI components (NumPy-only inference; TensorFlow is not imported)
+    
+    Returns:
+        Namespace with the AI classes, or None if the AI module is unavailable
+    """
+    global _ai_modules
+    if _ai_modules is None:
+        with _ai_modules_lock:
+            if _ai_modules is None:
+                if AI_MODULE_PATH not in sys.path:
+                    sys.path.insert(0, AI_MODULE_PATH)
+                try:
+                    from numpy_forecaster import NumpyDemandForecaster, export_weights
+                    from optimize_sources import SourceOptimizer, EnergySource
+                    _ai_modules = SimpleNamespace(
+                        NumpyDemandForecaster=NumpyDemandForecaster,
+                        export_weights=export_weights,
+                        SourceOptimizer=SourceOptimizer,
+                        EnergySource=EnergySource,
+                    )
+                except ImportError as e:
+                    print(f"Warning: AI modules not available: {e}")
+                    _ai_modules = False
+    return _ai_modules or None
 
 
 class AIInferenceService:
@@ -49,41 +76,63 @@ class AIInferenceService:
     USE_SIMULATION_FILE = False
     SIMULATION_FILE_PATH = os.path.join(settings.BASE_DIR, 'data', 'simulation_sensors.csv')
     
+    # Construct absolute path to the 'ai/models' directory
+    # settings.BASE_DIR is usually '.../HyperVolt/api'
+    AI_MODELS_DIR = os.path.abspath(os.path.join(settings.BASE_DIR, '..', 'ai', 'models'))
+    MODEL_FILES = [
+        'demand_forecaster.h5',
+        'demand_forecaster_scalers.pkl',
+        'demand_forecaster_config.json',
+    ]
+    
     def __init__(self):
         """Initialize AI inference service"""
         self.forecaster = None
         self.optimizer = None
         self.models_loaded = False
+        self.model_version = 'lstm'
+        self.forecast_cache = ForecastCache(self.model_version)
+        self.state_store = OptimizerStateStore('ml')
+        self.conditions_provider = ConditionsProvider(defaults={'ldr': 0.0, 'carbon_intensity': 450.0})
         
-        if AI_AVAILABLE:
+        self.ai = load_ai_modules()
+        if self.ai:
             self._initialize_models()
 
+    @classmethod
+    def model_files(cls) -> List[str]:
+        """Absolute paths of the model artifacts this service loads"""
+        return [os.path.join(cls.AI_MODELS_DIR, name) for name in cls.MODEL_FILES]
+
     def _initialize_models(self):
         """Initialize and load AI models"""
         try:
-            # Construct absolute path to the 'ai/models' directory
-            # settings.BASE_DIR is usually '.../HyperVolt/api'
-            ai_models_dir = os.path.abspath(os.path.join(settings.BASE_DIR, '..', 'ai', 'models'))
+            ai_models_dir = self.AI_MODELS_DIR
 
             # Define specific file paths
             model_path = os.path.join(ai_models_dir, 'demand_forecaster.h5')
             scaler_path = os.path.join(ai_models_dir, 'demand_forecaster_scalers.pkl')
+            weights_path = self._weights_path()
 
             # Initialize Forecaster
-            self.forecaster = EnergyDemandForecaster(lookback_hours=24, forecast_horizon=6)
+            self.forecaster = self.ai.NumpyDemandForecaster(weights_path)
 
             if os.path.exists(model_path) and os.path.exists(scaler_path):
-                print(f"Loading AI model from: {model_path}")
-                self.forecaster.model_path = model_path
-                self.forecaster.load_model()
-                self.models_loaded = True
+                if self._weights_outdated(model_path, weights_path):
+                    self._export_weights()
+                print(f"Loading AI model from: {weights_path}")
+                self.models_loaded = self.forecaster.load_model()
+                
+                # Tie cached forecasts to this exact model file
+                self.model_version = f"lstm-{int(os.path.getmtime(model_path))}"
+                self.forecast_cache = ForecastCache(self.model_version)
             else:
                 print(f"Warning: Model files not found in {ai_models_dir}")
                 print("Please run 'python ai/module3-ai/train_demand_model.py' first.")
                 self.models_loaded = False
 
             # Initialize Optimizer
-            self.optimizer = SourceOptimizer(
+            self.optimizer = self.ai.SourceOptimizer(
                 carbon_weight=0.5, cost_weight=0.5,
                 solar_capacity=3.0, battery_capacity=10.0
             )
@@ -92,15 +141,234 @@ class AIInferenceService:
             print(f"Error initializing AI models: {e}")
             self.models_loaded = False
     
+    def _weights_path(self) -> str:
+        """NumPy export of the demand model, generated from the Keras files on load"""
+        return os.path.join(settings.AI_WEIGHTS_DIR, 'demand_forecaster.npz')
+    
+    def _weights_outdated(self, model_path: str, weights_path: str) -> bool:
+        """True if the .npz export is missing or older than the Keras model"""
+        return (not os.path.exists(weights_path)
+                or os.path.getmtime(weights_path) < os.path.getmtime(model_path))
+    
+    def _export_weights(self):
+        """Re-export the Keras model to NumPy weights (needs h5py, not TensorFlow)"""
+        self.ai.export_weights(
+            os.path.join(self.AI_MODELS_DIR, 'demand_forecaster.h5'),
+            os.path.join(self.AI_MODELS_DIR, 'demand_forecaster_scalers.pkl'),
+            os.path.join(self.AI_MODELS_DIR, 'demand_forecaster_config.json'),
+            self._weights_path()
+        )
+    
     def is_available(self) -> bool:
         """Check if AI inference is available"""
-        return AI_AVAILABLE and self.models_loaded
+        return self.ai is not None and self.models_loaded
     
-    def _update_optimizer_weights(self):
-        """Fetch latest user preferences and update optimizer weights"""
-        if not self.optimizer:
+    def warmup(self):
+        """
+        Run one inference on a zero window so the first real request
+        doesn't pay for graph tracing and kernel initialization
+        """
+        if not self.is_available():
             return
+        
+        import numpy as np
+        
+        window = np.zeros((1, self.forecaster.lookback_hours, len(self.forecaster.feature_columns)))
+        self.forecaster.forward(window)
+    
+    def _initial_state(self) -> Dict:
+        """Battery state used until one is stored"""
+        return {'battery_charge': self.optimizer.battery_current_charge}
+    
+    def _optimize(self, power_kw: float, conditions: Dict, optimizer=None) -> Tuple[List[Tuple], Dict]:
+        """
+        Run the optimizer against the battery state shared by all workers
+        
+        The optimizer itself is stateless; reading the charge, optimizing
+        and writing the new charge is one optimistic transaction.
+        optimizer defaults to the service's (unweighted) optimizer.
+        """
+        optimizer = optimizer or self.optimizer
+        
+        def step(state):
+            allocation, metrics, new_state = optimizer.optimize(state, power_kw, conditions)
+            return (allocation, metrics), new_state
+        
+        return self.state_store.update(step, default=self._initial_state())
+    
+    @staticmethod
+    def _tariff_multiplier(hours):
+        """Time-of-use multiplier of the grid price for each hour of day"""
+        import numpy as np
+        
+        multipliers = settings.GRID_TARIFF_MULTIPLIERS
+        hours = np.asarray(hours)
+        return np.select(
+            [np.isin(hours, settings.GRID_PEAK_HOURS), np.isin(hours, settings.GRID_OFFPEAK_HOURS)],
+            [multipliers['peak'], multipliers['offpeak']],
+            default=multipliers['normal']
+        )
+    
+    @staticmethod
+    def _carbon_shape(hours):
+        """
+        Typical daily grid carbon intensity (gCO2eq/kWh): higher at the
+        morning and evening peaks, lower at midday when solar is available
+        (the pattern of the synthetic training data)
+        """
+        import numpy as np
+        
+        hours = np.asarray(hours, dtype=float)
+        return (500
+                + 100 * np.exp(-((hours - 8) ** 2) / 8)
+                + 120 * np.exp(-((hours - 19) ** 2) / 8)
+                - 80 * np.exp(-((hours - 13) ** 2) / 6))
+    
+    @staticmethod
+    def _clear_sky(hours):
+        """Relative clear-sky irradiance (0-1) for each hour of day"""
+        import numpy as np
+        
+        hours = np.asarray(hours, dtype=float)
+        return np.where((hours >= 6) & (hours < 18), np.sin(np.pi * (hours - 6) / 12), 0.0)
+    
+    def _hourly_inputs(self, conditions: Dict, hours, use_forecasts: bool = True) -> Tuple:
+        """
+        Grid price, carbon intensity and radiation for each planned hour
+        
+        Hourly forecasts in the conditions ('grid_price_forecast',
+        'carbon_forecast') are used as given. Otherwise the current price
+        follows the time-of-use tariff, the current carbon intensity the
+        typical daily carbon pattern, and the current radiation the
+        clear-sky curve (so there is no solar at night).
+        """
+        import numpy as np
+        
+        n_hours = len(hours)
+        now = conditions['hour']
+        
+        def hourly(key, forecast_key, profile):
+            forecast = [float(v) for v in (conditions.get(forecast_key) or [])[:n_hours]] if use_forecasts else []
+            scale = float(conditions[key]) / float(profile(now))
+            return np.concatenate([forecast, scale * profile(hours[len(forecast):])])
+        
+        grid_price = hourly('grid_price', 'grid_price_forecast', self._tariff_multiplier)
+        carbon_intensity = hourly('carbon_intensity', 'carbon_forecast', self._carbon_shape)
+        
+        # Scale the clear-sky curve by how clear it is now; at night assume clear sky
+        # (the cloud cover forecast is applied by the optimizer)
+        clear_now = float(self._clear_sky(now))
+        if clear_now > 0.1:
+            clearness = min(conditions.get('shortwave_radiation', 0.0) / (1000.0 * clear_now), 1.0)
+        else:
+            clearness = 1.0
+        radiation = 1000.0 * clearness * self._clear_sky(hours)
+        
+        return grid_price, carbon_intensity, radiation
+    
+    def _plan_battery(self, predictions: List[Dict], conditions: Dict, optimizer=None) -> Dict:
+        """
+        Plan battery use over the forecast horizon and commit the first hour
+        
+        Prices, carbon intensity and radiation vary by hour (see
+        _hourly_inputs). Charge left at the end of the horizon is valued at
+        the day's average grid rate. If price and carbon are nonetheless
+        flat, the greedy schedule is used: with nothing to shift, the
+        dynamic program would only hold the charge at its terminal value.
+        
+        Args:
+            optimizer: Weighted optimizer for this request (default: the service's)
+        
+        Returns:
+            Schedule dictionary from SourceOptimizer.plan_horizon
+        """
+        import numpy as np
+        
+        optimizer = optimizer or self.optimizer
+        demand = np.array([p['predicted_kwh'] for p in predictions], dtype=float)
+        n_hours = len(demand)
+        
+        # predictions[0] is the coming hour
+        hours = (conditions['hour'] + 1 + np.arange(n_hours)) % 24
+        grid_price, carbon_intensity, radiation = self._hourly_inputs(conditions, hours)
+        flat = np.ptp(grid_price) < 1e-9 and np.ptp(carbon_intensity) < 1e-9
+        
+        day_price, day_carbon, _ = self._hourly_inputs(conditions, np.arange(24), use_forecasts=False)
+        terminal_price = float(optimizer.calculate_combined_score(day_price, day_carbon).mean())
+        
+        def step(state):
+            plan = optimizer.plan_horizon(
+                demand, grid_price, carbon_intensity,
+                radiation,
+                conditions['cloud_cover'],
+                hours,
+                battery_charge=state['battery_charge'],
+                method='greedy' if flat else 'dp',
+                terminal_price=terminal_price
+            )
+            return plan, dict(state, battery_charge=float(plan['soc'][1]))
+        
+        return self.state_store.update(step, default=self._initial_state())
+    
+    def _allocation_from_plan(self, plan: Dict) -> Tuple[List[Tuple], Dict]:
+        """Source allocation and metrics for the first hour of a battery plan"""
+        EnergySource = self.ai.EnergySource
+        grid_to_load = plan['grid'][0] - plan['charge_from_grid'][0]
+        allocation = [
+            (source, float(power)) for source, power in (
+                (EnergySource.SOLAR, plan['solar_used'][0]),
+                (EnergySource.BATTERY, plan['discharge'][0]),
+                (EnergySource.GRID, grid_to_load),
+            ) if power > 1e-9
+        ]
+        metrics = {
+            'cost': float(plan['cost'][0]),
+            'carbon': float(plan['carbon'][0]),
+            'battery_charge': float(plan['soc'][1]),
+        }
+        return allocation, metrics
+    
+    def get_conditions(self) -> Dict:
+        """Get the conditions the optimizer currently sees"""
+        return self._get_current_conditions()
+    
+    def get_status(self) -> Dict:
+        """Get AI service status"""
+        battery_charge = self.state_store.get_battery_charge(
+            default=self.optimizer.battery_current_charge if self.optimizer else 0.0
+        )
+        battery_capacity = self.optimizer.battery_capacity if self.optimizer else 10.0
+        
+        return {
+            'available': self.is_available(),
+            'models_loaded': self.models_loaded,
+            'capabilities': {
+                'demand_forecasting': self.is_available(),
+                'source_optimization': self.optimizer is not None,
+                'peak_detection': self.is_available(),
+                'decision_making': self.is_available()
+            },
+            'current_conditions': self.get_conditions(),
+            'battery_status': {
+                'charge_kwh': battery_charge,
+                'percentage': (battery_charge / battery_capacity) * 100,
+                'capacity': battery_capacity
+            },
+            'timestamp': timezone.now().isoformat()
+        }
+    
+    def _weighted_optimizer(self):
+        """
+        Per-request copy of the optimizer weighted by the latest user preferences
+
+        The optimizer belongs to the process-wide service and is shared by
+        concurrent requests, so it is never mutated; the weights are set on
+        a shallow copy instead.
+        """
+        if not self.optimizer:
+            return self.optimizer
 
+        optimizer = copy.copy(self.optimizer)
         try:
             from ..models import UserPreferences
             
@@ -119,12 +387,12 @@ class AIInferenceService:
                     cost_weight = float(cost_value) / 100.0
                 carbon_weight = 1.0 - cost_weight  # Inversely proportional
 
-            # Update the optimizer instance directly
-            self.optimizer.cost_weight = cost_weight
-            self.optimizer.carbon_weight = carbon_weight
+            optimizer.cost_weight = cost_weight
+            optimizer.carbon_weight = carbon_weight
             
         except Exception as e:
             print(f"Error updating weights: {e}")
+        return optimizer
     
     def forecast_demand(self, hours_ahead: int = 6) -> Dict:
         """
@@ -143,8 +411,12 @@ class AIInferenceService:
             }
         
         try:
-            # Get recent data from database
-            recent_data = self._get_recent_data_for_forecasting()
+            import pandas as pd
+            
+            # Completed hours only, so the input (and the fingerprint) stays
+            # the same for the whole hour while readings keep arriving
+            bucket = ForecastCache.hour_bucket()
+            recent_data = self._get_recent_data_for_forecasting(bucket)
             
             if recent_data is None or len(recent_data) < 24:
                 return {
@@ -152,21 +424,36 @@ class AIInferenceService:
                     'available': False
                 }
             
-            # Make prediction
-            forecast = self.forecaster.predict(recent_data)
+            # Make prediction (once per hour bucket and input window)
+            fingerprint = ForecastCache.fingerprint(
+                pd.util.hash_pandas_object(recent_data, index=False).values.tobytes()
+            )
+            forecast = self.forecast_cache.get_or_compute(
+                bucket, self.forecaster.forecast_horizon, fingerprint,
+                lambda: [float(v) for v in self.forecaster.predict(recent_data)]
+            )
             
             # Prepare response
+            now = timezone.now()
+            predictions = []
+            for i in range(min(hours_ahead, len(forecast))):
+                future_time = bucket + timedelta(hours=i + 1)
+                predictions.append({
+                    'hour': i + 1,
+                    'predicted_kwh': float(forecast[i]),
+                    'timestamp': future_time.isoformat(),
+                    'hour_of_day': future_time.hour,
+                    'is_peak_hour': future_time.hour in SimpleEnergyForecaster.PEAK_HOURS
+                })
+            peak_hours = [p for p in predictions if p['is_peak_hour']]
+            
             return {
-                'timestamp': timezone.now().isoformat(),
+                'timestamp': now.isoformat(),
                 'forecast_horizon': hours_ahead,
-                'predictions': [
-                    {
-                        'hour': i + 1,
-                        'predicted_kwh': float(forecast[i]),
-                        'timestamp': (timezone.now() + timedelta(hours=i+1)).isoformat()
-                    }
-                    for i in range(min(hours_ahead, len(forecast)))
-                ],
+                'predictions': predictions,
+                'peak_hours': peak_hours,
+                'next_peak': peak_hours[0] if peak_hours else None,
+                'recommendation': SimpleEnergyForecaster()._get_peak_recommendation(peak_hours),
                 'available': True,
                 'model_type': 'lstm'
             }
@@ -177,6 +464,88 @@ class AIInferenceService:
                 'available': False
             }
     
+    def forecast_demand_batch(self, contexts: List[Dict], hours_ahead: int = 6) -> Dict:
+        """
+        Forecast demand for many sites / load profiles in one forward pass
+        
+        Args:
+            contexts: List of {'id': ..., 'history': [row, ...]} where each
+                      row maps feature column -> value for one hour. Contexts
+                      without history use this site's recent data.
+            hours_ahead: Number of hours to return per context
+            
+        Returns:
+            Dictionary with one forecast per context
+        """
+        if not self.is_available():
+            return {
+                'error': 'AI models not available',
+                'available': False
+            }
+        
+        try:
+            import pandas as pd
+            
+            site_data = None
+            windows, ids, errors = [], [], []
+            for index, context in enumerate(contexts):
+                context_id = context.get('id', index)
+                history = context.get('history')
+                if history:
+                    window = pd.DataFrame(history)
+                else:
+                    if site_data is None:
+                        site_data = self._get_recent_data_for_forecasting()
+                    window = site_data
+                
+                missing = [] if window is None else [
+                    col for col in self.forecaster.feature_columns if col not in window.columns
+                ]
+                if window is None or len(window) < self.forecaster.lookback_hours or missing:
+                    errors.append({
+                        'id': context_id,
+                        'error': f'Need {self.forecaster.lookback_hours} hours of history'
+                                 + (f' (missing: {", ".join(missing)})' if missing else '')
+                    })
+                    continue
+                windows.append(window)
+                ids.append(context_id)
+            
+            forecasts = []
+            if windows:
+                # One scaler transform and one forward pass for every context
+                predictions = self.forecaster.predict_batch(windows)
+                now = timezone.now()
+                for context_id, forecast in zip(ids, predictions):
+                    horizon = forecast[:hours_ahead]
+                    forecasts.append({
+                        'id': context_id,
+                        'predictions': [
+                            {
+                                'hour': i + 1,
+                                'predicted_kwh': float(kwh),
+                                'timestamp': (now + timedelta(hours=i + 1)).isoformat()
+                            }
+                            for i, kwh in enumerate(horizon)
+                        ],
+                        'total_kwh': round(float(horizon.sum()), 3)
+                    })
+            
+            return {
+                'timestamp': timezone.now().isoformat(),
+                'forecast_horizon': hours_ahead,
+                'forecasts': forecasts,
+                'errors': errors,
+                'available': True,
+                'model_type': 'lstm'
+            }
+            
+        except Exception as e:
+            return {
+                'error': f'Batch forecasting failed: {str(e)}',
+                'available': False
+            }
+    
     def recommend_source(self, load_name: str, load_priority: int, 
                         load_power: float, current_conditions: Optional[Dict] = None) -> Dict:
         """
@@ -199,8 +568,8 @@ class AIInferenceService:
             }
         
         try:
-            # STEP 1: Update weights before optimizing
-            self._update_optimizer_weights()
+            # STEP 1: Weight this request's optimizer by the user preferences
+            optimizer = self._weighted_optimizer()
             
             # Get current conditions if not provided
             if current_conditions is None:
@@ -210,10 +579,7 @@ class AIInferenceService:
             power_kw = load_power / 1000.0
             
             # Use optimizer to recommend source
-            allocation, metrics = self.optimizer.optimize_source(
-                power_kw,
-                current_conditions
-            )
+            allocation, metrics = self._optimize(power_kw, current_conditions, optimizer)
             
             # Extract primary source
             primary_source = allocation[0][0].value if allocation else 'grid'
@@ -260,8 +626,8 @@ class AIInferenceService:
             }
         
         try:
-            # Update weights before optimization
-            self._update_optimizer_weights()
+            # Weight this request's optimizer by the user preferences
+            optimizer = self._weighted_optimizer()
             
             # Get forecast
             forecast_result = self.forecast_demand()
@@ -275,11 +641,15 @@ class AIInferenceService:
             # Get predicted demand for next hour
             next_hour_demand = forecast_result['predictions'][0]['predicted_kwh']
             
-            # Optimize source allocation
-            allocation, metrics = self.optimizer.optimize_source(
-                next_hour_demand,
-                conditions
-            )
+            # Plan the battery over the whole forecast so it isn't drained
+            # right before a peak; fall back to the single-hour optimizer
+            try:
+                plan = self._plan_battery(forecast_result['predictions'], conditions, optimizer)
+                allocation, metrics = self._allocation_from_plan(plan)
+            except Exception as e:
+                print(f"Battery planning unavailable: {e}")
+                plan = None
+                allocation, metrics = self._optimize(next_hour_demand, conditions, optimizer)
             
             # Build comprehensive decision
             decision = {
@@ -292,6 +662,7 @@ class AIInferenceService:
                     'carbon': float(metrics['carbon']),
                     'battery_charge': float(metrics['battery_charge'])
                 },
+                'battery_plan': self._summarize_plan(plan) if plan else None,
                 'recommendation': self._generate_recommendation(
                     forecast_result['predictions'],
                     allocation,
@@ -302,7 +673,7 @@ class AIInferenceService:
             
             # --- NEW: Connectivity Update ---
             # Publish decision to MQTT so hardware (ESP32/Pi) acts on it
-            self._publish_decision_to_mqtt(decision['current_decision'])
+            self._publish_decision_to_mqtt(decision)
             
             return decision
             
@@ -312,197 +683,213 @@ class AIInferenceService:
                 'available': False
             }
 
-    def _publish_decision_to_mqtt(self, decision_data: Dict):
+    @staticmethod
+    def _summarize_plan(plan: Dict) -> Dict:
+        """JSON-friendly view of a battery plan"""
+        charge = plan['charge_from_solar'] + plan['charge_from_grid']
+        return {
+            'method': plan['method'],
+            'soc_kwh': [round(float(v), 3) for v in plan['soc']],
+            'charge_kwh': [round(float(v), 3) for v in charge],
+            'discharge_kwh': [round(float(v), 3) for v in plan['discharge']],
+            'grid_kwh': [round(float(v), 3) for v in plan['grid']],
+            'total_cost': round(plan['total_cost'], 2),
+            'total_carbon': round(plan['total_carbon'], 1),
+        }
+
+    def _publish_decision_to_mqtt(self, decision: Dict):
         """Publish AI decision to MQTT AND WebSockets"""
         try:
-            # 1. MQTT Publish (Existing code)
-            allocations = decision_data.get('source_allocation', [])
+            allocations = decision['current_decision'].get('source_allocation', [])
             if not allocations:
                 return
 
             primary_source = allocations[0][0]
 
-            payload = {
-                'command': 'switch_source',
-                'source': primary_source,
-                'details': decision_data,
-                'timestamp': timezone.now().isoformat()
-            }
-
-            # [Existing MQTT Code ...]
-            publish.single(
-                "HyperVolt/commands/control",
-                payload=json.dumps(payload),
-                hostname="localhost",
-                port=1883
-            )
-            print(f"✓ Published AI decision to MQTT: {primary_source}")
-
-            # 2. NEW: WebSocket Broadcast (To Frontend)
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                "sensors",  # Broadcast to the 'sensors' group (dashboard listeners)
-                {
-                    "type": "sensor.update",  # Re-using existing handler in consumers.py
-                    "data": {
-                        "type": "ai_decision",
-                        "payload": payload
-                    }
-                }
-            )
-            print(f"✓ Broadcasted AI decision to Frontend")
+            # Reuses one persistent MQTT connection and pushes the decision
+            # to ws/decisions/ subscribers
+            get_decision_publisher().publish_decision(decision, primary_source)
+            print(f"✓ Published AI decision: {primary_source}")
 
         except Exception as e:
             print(f"Failed to publish AI decision: {e}")
 
 
     def trigger_retraining(self) -> Dict:
-        """Triggers the AI retraining process"""
+        """
+        Run incremental retraining in this process (blocking)
+        
+        The API enqueues data_pipeline.tasks.retrain_demand_model instead,
+        so training runs in a Django-Q worker; see retrain_incremental().
+        """
         if not self.is_available():
             return {'success': False, 'error': 'AI Module not loaded'}
-            
-        try:
-            # 1. Export recent DB data to CSV for training
-            csv_path = self._export_db_to_csv()
-            
-            if not csv_path:
-                return {'success': False, 'error': 'Failed to export data for training'}
-            
-            # 2. Initialize the engine wrapper (which handles retraining)
-            try:
-                from decision_engine import VestaDecisionEngine
-                engine = VestaDecisionEngine()
-                
-                # 3. Run retraining
-                engine.retrain_on_new_data(csv_path)
-                
-                # 4. Reload the updated model into memory
-                self.forecaster.load_model()
-                
-                return {'success': True, 'message': 'Model retrained and reloaded'}
-            except ImportError:
-                return {'success': False, 'error': 'VestaDecisionEngine not available'}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        return self.retrain_incremental()
 
-    def _export_db_to_csv(self) -> Optional[str]:
-        """Helper to dump SensorReading/GridData to CSV for training"""
+    def retrain_incremental(self, replay_days: int = 30, replay_ratio: float = 1.0,
+                            epochs: int = 5) -> Dict:
+        """
+        Fine-tune the demand model on hourly data newer than its watermark
+        
+        The watermark is the last hour the model was trained on (stored as
+        'trained_until' in demand_forecaster_config.json). Only completed
+        hours after it are rolled up from the database. Training continues
+        from the current weights, with a replay sample from the replay_days
+        before the watermark. The new model files are picked up by every
+        API process through AIServiceRegistry's reload check.
+        
+        Needs TensorFlow, so it should run in a worker process.
+        
+        Returns:
+            dict: {'success', 'status', 'previous_watermark', 'watermark', ...}
+        """
+        if self.ai is None:
+            return {'success': False, 'status': 'failed', 'error': 'AI Module not loaded'}
+        
         try:
-            from ..models import SensorReading, GridData
-            
-            # Create export directory if it doesn't exist
-            export_dir = os.path.join(settings.BASE_DIR, '..', 'ai', 'data', 'raw')
-            os.makedirs(export_dir, exist_ok=True)
-            
-            csv_path = os.path.join(export_dir, 'latest_training.csv')
-            
-            # Get last 30 days of data
-            end_time = timezone.now()
-            start_time = end_time - timedelta(days=30)
-            
-            # Fetch sensor data
-            sensor_readings = SensorReading.objects.filter(
-                timestamp__gte=start_time,
-                timestamp__lte=end_time
-            ).values('timestamp', 'sensor_type', 'value')
-            
-            if not sensor_readings:
-                return None
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(list(sensor_readings))
-            
-            # Pivot and structure for training
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['hour_key'] = df['timestamp'].dt.floor('H')
-            
-            df_pivot = df.pivot_table(
-                index='hour_key',
-                columns='sensor_type',
-                values='value',
-                aggfunc='mean'
-            ).reset_index()
-            
-            # Add time features
-            df_pivot['hour'] = df_pivot['hour_key'].dt.hour
-            df_pivot['day_of_week'] = df_pivot['hour_key'].dt.dayofweek
-            df_pivot['is_weekend'] = df_pivot['day_of_week'] >= 5
-            
-            # Save to CSV
-            df_pivot.to_csv(csv_path, index=False)
-            
-            return csv_path
-            
-        except Exception as e:
-            print(f"Error exporting data to CSV: {e}")
+            import pandas as pd
+            from train_demand_model import EnergyDemandForecaster
+        except ImportError as e:
+            return {'success': False, 'status': 'failed', 'error': f'Training dependencies missing: {e}'}
+        
+        forecaster = EnergyDemandForecaster(models_dir=self.AI_MODELS_DIR)
+        if not forecaster.load_model():
+            return {'success': False, 'status': 'failed', 'error': 'No trained model to fine-tune'}
+        
+        # Only completed hours; the current hour is still being filled
+        end_time = timezone.now().replace(minute=0, second=0, microsecond=0)
+        if forecaster.trained_until:
+            watermark = pd.Timestamp(forecaster.trained_until)
+            if watermark.tzinfo is None:
+                watermark = watermark.tz_localize(end_time.tzinfo)
+        else:
+            # Model trained offline: treat the last replay_days as new data
+            watermark = pd.Timestamp(end_time - timedelta(days=replay_days))
+        
+        context = timedelta(hours=forecaster.lookback_hours - 1)
+        new_data = self._hourly_rollups(watermark - context, end_time, exclusive_end=True)
+        new_hours = 0 if new_data is None else int((new_data['hour_key'] > watermark).sum())
+        
+        result = {
+            'previous_watermark': forecaster.trained_until,
+            'new_hours': new_hours,
+        }
+        if new_hours <= forecaster.forecast_horizon:
+            return {**result, 'success': True, 'status': 'skipped',
+                    'watermark': forecaster.trained_until,
+                    'message': 'Not enough new hourly data since the last training run'}
+        
+        replay_data = None
+        if forecaster.trained_until:
+            replay_data = self._hourly_rollups(watermark - timedelta(days=replay_days),
+                                               watermark + timedelta(hours=1), exclusive_end=True)
+        
+        new_watermark = new_data['hour_key'].iloc[-1].isoformat()
+        training = forecaster.fine_tune(
+            new_data, replay_data, replay_ratio=replay_ratio, epochs=epochs,
+            trained_until=new_watermark
+        )
+        
+        return {
+            **result,
+            'success': True,
+            'status': 'succeeded',
+            'watermark': new_watermark,
+            'new_samples': training['new_samples'],
+            'replay_samples': training['replay_samples'],
+            'loss': float(training['history']['loss'][-1]),
+        }
+
+    def _hourly_rollups(self, start_time, end_time, exclusive_end: bool = False) -> Optional['pd.DataFrame']:
+        """
+        Hourly means of the sensor readings, with the model's input columns
+        
+        Args:
+            start_time: First reading to include
+            end_time: Last reading to include
+            exclusive_end: Leave out readings at end_time itself
+        
+        Returns:
+            DataFrame sorted by hour_key, or None if there are no readings
+        """
+        import pandas as pd
+        
+        from ..models import SensorReading
+        
+        end_filter = 'timestamp__lt' if exclusive_end else 'timestamp__lte'
+        readings = SensorReading.objects.filter(
+            timestamp__gte=start_time,
+            **{end_filter: end_time}
+        ).values('timestamp', 'sensor_type', 'value')
+
+        if not readings:
             return None
+
+        # Convert to DataFrame
+        df_raw = pd.DataFrame(list(readings))
+        
+        # Convert timestamp to hour (to group by hour)
+        df_raw['timestamp'] = pd.to_datetime(df_raw['timestamp'])
+        df_raw['hour_key'] = df_raw['timestamp'].dt.floor('h')  # Group by Hour
+        
+        # Pivot table: Rows=Time, Columns=SensorTypes
+        # We take the mean value if there are multiple readings per hour
+        df_pivot = df_raw.pivot_table(
+            index='hour_key', 
+            columns='sensor_type', 
+            values='value', 
+            aggfunc='mean'
+        ).reset_index()
+        
+        # Rename columns to match what AI model expects
+        # Ensure your hardware pushes these names or rename here:
+        # e.g., 'dht_temp' -> 'temperature', 'acs712_current' -> 'total_energy_kwh'
+        column_map = {
+            'temperature': 'temperature',
+            'humidity': 'humidity',
+            'ldr': 'solar_radiation_proxy',  # LDR maps to solar proxy
+            'current': 'total_energy_kwh'    # Approximating energy from current
+        }
+        df_pivot.rename(columns=column_map, inplace=True)
+        
+        # Fill missing columns with defaults if a sensor is broken/missing
+        required_cols = ['temperature', 'humidity', 'total_energy_kwh', 'solar_radiation_proxy']
+        for col in required_cols:
+            if col not in df_pivot.columns:
+                df_pivot[col] = 0.0  # Or reasonable default
+        
+        # Add derived features required by model
+        df_pivot['hour'] = df_pivot['hour_key'].dt.hour
+        df_pivot['day_of_week'] = df_pivot['hour_key'].dt.dayofweek
+        df_pivot['is_weekend'] = df_pivot['day_of_week'] >= 5
+        df_pivot['is_peak_hour'] = df_pivot['hour'].isin(SimpleEnergyForecaster.PEAK_HOURS)
+        
+        # Hardcoded external factors (unless you store Weather/Carbon history)
+        # ideally, these should also come from a GridData history query
+        df_pivot['cloud_cover'] = 30.0 
+        df_pivot['carbon_intensity'] = 450.0
+        df_pivot['grid_price'] = 6.0
+        df_pivot['grid_price_per_kwh'] = 6.0
+        df_pivot['occupancy_factor'] = 1.0
+
+        return df_pivot.sort_values('hour_key').reset_index(drop=True)
     
-    def _get_recent_data_for_forecasting(self) -> Optional[pd.DataFrame]:
+    def _get_recent_data_for_forecasting(self, bucket=None) -> Optional['pd.DataFrame']:
         """
-        Fetch and structure recent 24 hours of sensor data for AI input
+        Fetch and structure the 24 completed hours of sensor data before
+        bucket (default: the current hour) for AI input
         """
         try:
-            from ..models import SensorReading
-            
-            # Time range
-            end_time = timezone.now()
+            # Time range: [bucket - 24h, bucket), the current hour is still filling
+            end_time = bucket or ForecastCache.hour_bucket()
             start_time = end_time - timedelta(hours=24)
             
-            # Fetch all readings in the window
-            readings = SensorReading.objects.filter(
-                timestamp__gte=start_time,
-                timestamp__lte=end_time
-            ).values('timestamp', 'sensor_type', 'value')
-
-            if not readings:
+            df_pivot = self._hourly_rollups(start_time, end_time, exclusive_end=True)
+            if df_pivot is None:
                 return None
 
-            # Convert to DataFrame
-            df_raw = pd.DataFrame(list(readings))
-            
-            # Convert timestamp to hour (to group by hour)
-            df_raw['timestamp'] = pd.to_datetime(df_raw['timestamp'])
-            df_raw['hour_key'] = df_raw['timestamp'].dt.floor('H')  # Group by Hour
-            
-            # Pivot table: Rows=Time, Columns=SensorTypes
-            # We take the mean value if there are multiple readings per hour
-            df_pivot = df_raw.pivot_table(
-                index='hour_key', 
-                columns='sensor_type', 
-                values='value', 
-                aggfunc='mean'
-            ).reset_index()
-            
-            # Rename columns to match what AI model expects
-            # Ensure your hardware pushes these names or rename here:
-            # e.g., 'dht_temp' -> 'temperature', 'acs712_current' -> 'total_energy_kwh'
-            column_map = {
-                'temperature': 'temperature',
-                'humidity': 'humidity',
-                'ldr': 'solar_radiation_proxy',  # LDR maps to solar proxy
-                'current': 'total_energy_kwh'    # Approximating energy from current
-            }
-            df_pivot.rename(columns=column_map, inplace=True)
-            
-            # Fill missing columns with defaults if a sensor is broken/missing
-            required_cols = ['temperature', 'total_energy_kwh', 'solar_radiation_proxy']
-            for col in required_cols:
-                if col not in df_pivot.columns:
-                    df_pivot[col] = 0.0  # Or reasonable default
-            
-            # Add derived features required by model
-            df_pivot['hour'] = df_pivot['hour_key'].dt.hour
-            df_pivot['day_of_week'] = df_pivot['hour_key'].dt.dayofweek
-            df_pivot['is_weekend'] = df_pivot['day_of_week'] >= 5
-            
-            # Hardcoded external factors (unless you store Weather/Carbon history)
-            # ideally, these should also come from a GridData history query
-            df_pivot['cloud_cover'] = 30.0 
-            df_pivot['carbon_intensity'] = 450.0
-            df_pivot['grid_price'] = 6.0
-
-            # Sort and return last 24 rows
-            df_final = df_pivot.sort_values('hour_key').tail(24)
+            # Last 24 rows
+            df_final = df_pivot.tail(24)
             
             return df_final if len(df_final) >= 12 else None  # Allow partial data (min 12h)
             
@@ -534,6 +921,8 @@ class AIInferenceService:
             return self._get_fallback_conditions()
 
         try:
+            import pandas as pd
+            
             df = pd.read_csv(self.SIMULATION_FILE_PATH)
             
             # Convert simple CSV rows to a dictionary
@@ -560,29 +949,23 @@ class AIInferenceService:
             return self._get_fallback_conditions()
 
     def _read_conditions_from_db(self) -> Dict:
-        """Reads the latest values from the Django Database (Real Sensors)"""
-        from ..models import GridData, SensorReading
-        
-        temp_sensor = SensorReading.objects.filter(sensor_type='temperature').order_by('-timestamp').first()
-        ldr_sensor = SensorReading.objects.filter(sensor_type='ldr').order_by('-timestamp').first()
-        carbon_data = GridData.objects.filter(data_type='carbon_intensity').order_by('-timestamp').first()
+        """
+        Reads the latest values of the real sensors from the Hot Path cache,
+        falling back to the Django Database for anything missing
+        """
+        latest = self.conditions_provider.get_conditions()
         
         conditions = {
-            'hour': timezone.now().hour,
-            'temperature': float(temp_sensor.value) if temp_sensor else 25.0,
-            'shortwave_radiation': 0.0,
-            'cloud_cover': 30.0,
-            'carbon_intensity': 450.0,
-            'grid_price': 6.0,
-            'source': 'REAL_SENSORS'
+            'hour': latest['hour'],
+            'temperature': latest['temperature'],
+            # Map LDR (0-4095) to Solar Radiation (0-1000 W/m2)
+            'shortwave_radiation': (latest['ldr'] / 4095.0) * 1000.0,
+            'cloud_cover': latest.get('cloud_cover') if latest.get('cloud_cover') is not None else 30.0,
+            'carbon_intensity': latest['carbon_intensity'],
+            'grid_price': latest['grid_price'],
+            'source': 'REAL_SENSORS',
+            'staleness': latest['staleness'],
         }
-        
-        if ldr_sensor:
-            conditions['shortwave_radiation'] = (float(ldr_sensor.value) / 4095.0) * 1000.0
-            
-        if carbon_data and carbon_data.metadata:
-            conditions['carbon_intensity'] = carbon_data.metadata.get('carbon_intensity', 450.0)
-            conditions['grid_price'] = carbon_data.metadata.get('grid_price', 6.0)
 
         conditions['solar_radiation'] = conditions['shortwave_radiation'] / 1000.0
         return conditions
@@ -0,0 +1,137 @@
+"""
+Process-wide registry for the AI service.
+
+DRF builds a new viewset for every request, so the service (and the
+models it loads) lives here instead: it is built once per worker,
+warmed up with a dummy inference and rebuilt when the model files on
+disk change. Optimizer state is kept in Redis by the services
+themselves so that every worker sees the same battery charge.
+"""
+import os
+import time
+import logging
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AIServiceRegistry:
+    """
+    Holds the single AI service instance for this process.
+
+    The backend is chosen by settings.AI_SERVICE_BACKEND:
+        'simple' - SimpleAIService (no TensorFlow required)
+        'ml'     - AIInferenceService, falling back to 'simple' if the
+                   trained models cannot be loaded
+
+    While degraded to 'simple', the ML model files are watched as well, so
+    the ML backend is tried again as soon as models are trained.
+    """
+
+    def __init__(self, backend=None, check_interval=None):
+        self.backend = backend or getattr(settings, 'AI_SERVICE_BACKEND', 'simple')
+        self.check_interval = (
+            check_interval if check_interval is not None
+            else getattr(settings, 'AI_MODEL_RELOAD_CHECK_INTERVAL', 30)
+        )
+        self._service = None
+        self.degraded = False
+        self._mtimes = {}
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+
+    def _build_service(self):
+        """Instantiate the configured backend."""
+        self.degraded = False
+        if self.backend == 'ml':
+            from .ai_inference import AIInferenceService
+            service = AIInferenceService()
+            if service.is_available():
+                return service
+            logger.warning("ML models unavailable, falling back to SimpleAIService")
+            self.degraded = True
+
+        from .simple_ai import SimpleAIService
+        return SimpleAIService()
+
+    def _snapshot_mtimes(self, service):
+        """Modification times of the model files the service depends on."""
+        paths = list(service.model_files())
+        if self.degraded:
+            from .ai_inference import AIInferenceService
+            paths += AIInferenceService.model_files()
+
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _load(self):
+        service = self._build_service()
+        self._mtimes = self._snapshot_mtimes(service)
+        self._last_check = time.monotonic()
+        self._service = service
+        logger.info(f"Loaded AI service: {type(service).__name__}")
+        return service
+
+    def _models_changed(self):
+        """Return True if any model file was replaced since the last load."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        return self._snapshot_mtimes(self._service) != self._mtimes
+
+    def get_service(self):
+        """Return the shared service, loading or reloading it if needed."""
+        service = self._service
+        if service is not None and not self._models_changed():
+            return service
+
+        with self._lock:
+            if self._service is None:
+                return self._load()
+            if self._snapshot_mtimes(self._service) != self._mtimes:
+                logger.info("Model files changed on disk, reloading AI service")
+                self._load()
+                self.warmup()
+            return self._service
+
+    def reload(self):
+        """Force the service (and its models) to be rebuilt."""
+        with self._lock:
+            self._load()
+            self.warmup()
+            return self._service
+
+    def warmup(self):
+        """Load the service and run one inference so the first request is fast."""
+        service = self.get_service()
+        try:
+            service.warmup()
+        except Exception as e:
+            logger.error(f"AI service warmup failed: {e}")
+        return service
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide AIServiceRegistry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = AIServiceRegistry()
+    return _registry
+
+
+def get_ai_service():
+    """Return the shared AI service for this process."""
+    return get_registry().get_service()
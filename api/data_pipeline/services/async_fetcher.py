@@ -0,0 +1,121 @@
+"""
+Pooled async HTTP client for JSON APIs.
+
+Requests share one keep-alive aiohttp session. Connection errors,
+timeouts, 429 and 5xx responses are retried with jittered exponential
+backoff; other HTTP errors fail immediately. Retries are logged with the
+URL only, since query parameters may hold API keys.
+
+This module only needs aiohttp (no Django), so the AI module's real-time
+collection (ai/module3-ai/async_collection.py) imports it as well.
+"""
+import random
+import asyncio
+import logging
+import aiohttp
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limited or a transient server error
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def describe_error(error: BaseException) -> str:
+    """Short error description without the request URL (query parameters may hold API keys)."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return f"HTTP {error.status} {error.message}"
+    return f"{type(error).__name__}: {error}"
+
+
+class AsyncFetcher:
+    """
+    Pooled HTTP client for JSON APIs.
+
+    Use as an async context manager; every request made inside it shares
+    one connection pool, and connections are kept alive between requests
+    and retries.
+    """
+
+    def __init__(self, timeout: float = 10.0, retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 8.0, limit: int = 20, keepalive_timeout: float = 30.0):
+        """
+        Args:
+            timeout: Seconds allowed per request (connect + read)
+            retries: Retries after a connection error, timeout, 429 or 5xx
+            backoff: Base of the exponential backoff between retries (seconds)
+            max_backoff: Upper bound of a single backoff
+            limit: Maximum open connections in the pool
+            keepalive_timeout: Seconds an idle connection is kept open
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    def retry_delay(self, attempt: int) -> float:
+        """Full jitter: uniform between 0 and the exponential backoff (capped)."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def get_json(self, url: str, params: Optional[Dict] = None,
+                       headers: Optional[Dict] = None):
+        """
+        GET a JSON document, retrying transient failures.
+
+        Raises:
+            aiohttp.ClientError or asyncio.TimeoutError once the retries
+            are used up (or at once for a non-retryable HTTP error)
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.session.get(url, params=params, headers=headers) as response:
+                    if response.status not in RETRY_STATUSES or attempt >= self.retries:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                    reason = f"HTTP {response.status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise
+                reason = describe_error(e)
+
+            delay = self.retry_delay(attempt)
+            attempt += 1
+            logger.warning(f"GET {url} failed ({reason}), retry {attempt}/{self.retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def fetch_all(self, requests: Dict[str, Tuple]) -> Dict:
+        """
+        Run every request concurrently.
+
+        Args:
+            requests: dict name -> (url, params, headers)
+
+        Returns:
+            dict name -> decoded JSON, or the exception the request raised
+        """
+        names = list(requests)
+        results = await asyncio.gather(
+            *(self.get_json(*requests[name]) for name in names),
+            return_exceptions=True
+        )
+        return dict(zip(names, results))
@@ -3,9 +3,15 @@ Cache management utilities for the Hot Path.
 Implements a sliding window buffer for the latest sensor readings.
 """
 import json
+import math
+import time
+import threading
+import hashlib
 import logging
+from datetime import datetime
 from django.core.cache import cache
 from django.conf import settings
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
@@ -51,10 +57,21 @@ class SensorBufferManager:
         if len(buffer) > self.buffer_size:
             buffer = buffer[-self.buffer_size:]
         
-        # Save back to cache (expire after 1 hour)
-        cache.set(key, buffer, 3600)
+        # Save back to cache (expire after 1 hour), together with the
+        # per-type latest value read by ConditionsProvider
+        cache.set_many({
+            key: buffer,
+            f"{self.key_prefix}:latest:{sensor_type}": {**reading, 'sensor_id': sensor_id},
+        }, 3600)
         
         logger.debug(f"Added reading to buffer {key}: {reading}")
+        
+        # Solar output readings also advance the rolling dust features
+        if sensor_type in SolarFeatureStore.CURRENT_SENSORS:
+            try:
+                SolarFeatureStore().update(sensor_id, value, timestamp)
+            except Exception as e:
+                logger.error(f"Failed to update solar features for {sensor_id}: {e}")
 
     def get_latest_readings(self, sensor_type, sensor_id, count=None):
         """
@@ -119,3 +136,645 @@ class SensorBufferManager:
             'max_value': max(values),
             'avg_value': sum(values) / len(values)
         }
+
+
+class RollingStats:
+    """
+    Mean and sample standard deviation of the last `window` values.
+
+    Values sit in a ring buffer. Adding one updates the running mean and
+    sum of squared deviations (Welford) for the new value and the value it
+    evicts, so an update is O(1) whatever the window. The state is a plain
+    dict (to_dict/from_dict) so it can be cached.
+    """
+
+    def __init__(self, window, values=None, head=0, mean=0.0, m2=0.0):
+        self.window = window
+        self.values = list(values or [])
+        self.head = head
+        self.mean = mean
+        self.m2 = m2
+
+    @classmethod
+    def from_dict(cls, window, state):
+        return cls(window, **state) if state else cls(window)
+
+    def to_dict(self):
+        return {'values': self.values, 'head': self.head, 'mean': self.mean, 'm2': self.m2}
+
+    def _with(self, x):
+        """(count, mean, m2) after adding x, without changing the state."""
+        n = len(self.values)
+        if n < self.window:
+            delta = x - self.mean
+            mean = self.mean + delta / (n + 1)
+            return n + 1, mean, self.m2 + delta * (x - mean)
+        old = self.values[self.head]
+        mean = self.mean + (x - old) / n
+        return n, mean, max(0.0, self.m2 + (x - old) * (x - mean + old - self.mean))
+
+    def add(self, x):
+        n, self.mean, self.m2 = self._with(x)
+        if n > len(self.values):
+            self.values.append(x)
+        else:
+            self.values[self.head] = x
+            self.head = (self.head + 1) % self.window
+
+    @staticmethod
+    def _std(n, m2):
+        # pandas rolling(...).std() with min_periods=1, NaN filled with 0.0
+        return math.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+
+    @property
+    def std(self):
+        return self._std(len(self.values), self.m2)
+
+    def std_with(self, x):
+        """Standard deviation if x were added (the window including x)."""
+        n, _, m2 = self._with(x)
+        return self._std(n, m2)
+
+
+class SolarFeatureStore:
+    """
+    Rolling solar features for live dust detection, updated on ingest.
+
+    Every solar current reading is turned into actual power (with the
+    latest voltage reading) and an efficiency ratio against the power the
+    latest light and temperature readings should give, as in
+    generate_solar_dust_data.py. Readings are averaged per
+    SOLAR_FEATURE_INTERVAL seconds, the cadence of the training data, and
+    power_volatility/efficiency_volatility are the standard deviations over
+    the last SOLAR_VOLATILITY_WINDOW intervals, the current one included,
+    like rolling(window=6).std() in SolarDustPredictor.prepare_features().
+
+    days_since_cleaning counts from the panel's last recorded cleaning
+    (record_cleaning(), POST /api/ai/dust/cleaned/), else from
+    SOLAR_LAST_CLEANED, else from the first reading seen for the panel.
+
+    The state and the latest feature row are cached per panel (the current
+    sensor's id) next to the sensor buffers, so dust inference reads one
+    key per panel and never re-reads history. Updates assume one ingest
+    process per panel (the MQTT listener).
+    """
+
+    CURRENT_SENSORS = ('current',)
+    LIGHT_SENSORS = ('ldr', 'light')  # lux / raw 10-bit ADC (ESP32 publishes 'light')
+
+    def __init__(self):
+        self.key_prefix = settings.SENSOR_BUFFER_KEY_PREFIX
+        self.capacity_kw = getattr(settings, 'SOLAR_PANEL_CAPACITY_KW', 3.0)
+        self.interval = getattr(settings, 'SOLAR_FEATURE_INTERVAL', 300)
+        self.window = getattr(settings, 'SOLAR_VOLATILITY_WINDOW', 6)
+        self.ttl = getattr(settings, 'SOLAR_FEATURE_TTL', 24 * 3600)
+
+    def _key(self, panel_id):
+        return f"{self.key_prefix}:solar_features:{panel_id}"
+
+    def _cleaned_key(self, panel_id):
+        return f"{self.key_prefix}:solar_cleaned:{panel_id}"
+
+    @staticmethod
+    def _parse_time(value):
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    def record_cleaning(self, panel_id, cleaned_at=None):
+        """Store when a panel was cleaned (default: now); returns the time."""
+        cleaned_at = self._parse_time(cleaned_at or timezone.now())
+        cache.set(self._cleaned_key(panel_id), cleaned_at.isoformat(), None)
+        return cleaned_at
+
+    @property
+    def _panels_key(self):
+        return f"{self.key_prefix}:solar_features:panels"
+
+    def _latest_key(self, sensor_type):
+        return f"{self.key_prefix}:latest:{sensor_type}"
+
+    def expected_power(self, lux, temperature, hour):
+        """Clean-panel output (kW) for the light level, as in the dust data generator."""
+        if hour < 6 or hour >= 18:
+            return 0.0
+        irradiance = min(max(lux / 1000.0, 0.0), 1.0)
+        temp_factor = 1.0 - 0.005 * max(0.0, temperature - 25)
+        angle_factor = max(0.5, 1.0 - 0.3 * abs(hour - 12) / 6)
+        return self.capacity_kw * irradiance * temp_factor * angle_factor
+
+    def _conditions(self):
+        """Latest voltage, light (lux) and temperature from the hot path."""
+        sensors = ('voltage', 'temperature') + self.LIGHT_SENSORS
+        found = cache.get_many([self._latest_key(t) for t in sensors])
+        latest = {t: found.get(self._latest_key(t)) for t in sensors}
+
+        lux = 0.0
+        if latest['ldr']:
+            lux = float(latest['ldr']['value'])
+        elif latest['light']:
+            lux = float(latest['light']['value']) * 1000.0 / 1023.0
+        voltage = float(latest['voltage']['value']) if latest['voltage'] else 0.0
+        temperature = float(latest['temperature']['value']) if latest['temperature'] else 25.0
+        return voltage, lux, temperature
+
+    def update(self, panel_id, current_ma, timestamp):
+        """
+        Add a solar current reading (mA) and return the panel's feature row.
+
+        Args:
+            panel_id: Current sensor id
+            current_ma: Panel current in milliamps (as the ESP32 publishes it)
+            timestamp: datetime or ISO timestamp of the reading
+        """
+        timestamp = self._parse_time(timestamp)
+
+        voltage, lux, temperature = self._conditions()
+        hour = timezone.localtime(timestamp).hour
+        actual = voltage * float(current_ma) / 1000.0 / 1000.0
+        expected = self.expected_power(lux, temperature, hour)
+        efficiency = actual / expected if expected > self.capacity_kw / 30 else 1.0
+
+        key = self._key(panel_id)
+        found = cache.get_many([key, self._cleaned_key(panel_id)])
+        state = found.get(key)
+        if state is None:
+            panels = cache.get(self._panels_key) or []
+            if panel_id not in panels:
+                cache.set(self._panels_key, panels + [panel_id], None)
+            state = {'bucket': None, 'count': 0, 'power_sum': 0.0, 'efficiency_sum': 0.0,
+                     'first_seen': timestamp.isoformat()}
+
+        cleaned_at = (found.get(self._cleaned_key(panel_id))
+                      or getattr(settings, 'SOLAR_LAST_CLEANED', None)
+                      or state.get('first_seen', timestamp.isoformat()))
+        days_since_cleaning = max((timestamp - self._parse_time(cleaned_at)).total_seconds() / 86400, 0.0)
+
+        power_stats = RollingStats.from_dict(self.window, state.get('power'))
+        efficiency_stats = RollingStats.from_dict(self.window, state.get('efficiency'))
+
+        # A new interval closes the previous one into the rolling windows
+        bucket = int(timestamp.timestamp() // self.interval) if self.interval else None
+        if state['count'] and (bucket is None or bucket > state['bucket']):
+            power_stats.add(state['power_sum'] / state['count'])
+            efficiency_stats.add(state['efficiency_sum'] / state['count'])
+            state.update(count=0, power_sum=0.0, efficiency_sum=0.0)
+        if state['count'] == 0:
+            state['bucket'] = bucket
+        state['count'] += 1
+        state['power_sum'] += actual
+        state['efficiency_sum'] += efficiency
+
+        features = {
+            'panel_id': panel_id,
+            'timestamp': timestamp.isoformat(),
+            'hour': hour,
+            'solar_irradiance': min(max(lux / 1000.0, 0.0), 1.0),
+            'temperature_c': temperature,
+            'ldr_lux': lux,
+            'expected_power_kw': expected,
+            'actual_power_kw': state['power_sum'] / state['count'],
+            'efficiency_ratio': state['efficiency_sum'] / state['count'],
+            'power_volatility': power_stats.std_with(state['power_sum'] / state['count']),
+            'efficiency_volatility': efficiency_stats.std_with(state['efficiency_sum'] / state['count']),
+            'days_since_cleaning': days_since_cleaning,
+        }
+        state.update(power=power_stats.to_dict(), efficiency=efficiency_stats.to_dict(),
+                     features=features)
+        cache.set(key, state, self.ttl)
+        return features
+
+    def get_features(self, panel_ids=None):
+        """Latest feature row per panel (all known panels by default), in one round trip."""
+        try:
+            if panel_ids is None:
+                panel_ids = cache.get(self._panels_key) or []
+            found = cache.get_many([self._key(p) for p in panel_ids])
+        except Exception as e:
+            logger.error(f"Failed to read solar features: {e}")
+            return []
+        return [found[self._key(p)]['features'] for p in panel_ids if self._key(p) in found]
+
+
+class OptimizerStateStore:
+    """
+    Persists optimizer state (battery charge) in Redis.
+
+    Every worker process reads and writes the same state, so the battery
+    level survives across requests, workers and restarts. update() is an
+    optimistic read-modify-write (WATCH/MULTI/EXEC): if another worker
+    changes the state between the read and the write, the transaction is
+    retried against the new value, so concurrent decisions never overwrite
+    each other. Without Redis (tests, local development) a process-wide
+    lock gives the same guarantee inside one process.
+    """
+
+    MAX_RETRIES = 20
+    _local_lock = threading.Lock()
+
+    def __init__(self, namespace='simple'):
+        self.key = f"ai_state:{namespace}:battery"
+
+    @staticmethod
+    def _redis():
+        """Raw Redis client behind the default cache, or None for other backends."""
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            return None
+
+    @staticmethod
+    def _decode(raw, default):
+        if raw is None:
+            return default
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        return json.loads(raw) if isinstance(raw, str) else raw
+
+    def get_state(self, default=None):
+        """Return the stored state dict, or default if unset."""
+        try:
+            client = self._redis()
+            raw = client.get(cache.make_key(self.key)) if client else cache.get(self.key)
+        except Exception as e:
+            logger.error(f"Failed to read optimizer state: {e}")
+            return default
+        return self._decode(raw, default)
+
+    def update(self, step, default):
+        """
+        Atomically apply step(state) -> (result, new_state) and return result.
+
+        step may run more than once when workers conflict, so it must not
+        have side effects. new_state gets an incremented 'version'.
+
+        Args:
+            step: Pure function of the current state dict
+            default: State to start from if none is stored yet
+
+        Raises:
+            redis.exceptions.RedisError: Redis is unreachable or failed
+            RuntimeError: the state kept changing for MAX_RETRIES attempts
+        """
+        def apply(state):
+            state = dict(state)
+            result, new_state = step(state)
+            new_state = dict(new_state, version=state.get('version', 0) + 1)
+            return result, new_state
+
+        client = self._redis()
+        if client is None:
+            with self._local_lock:
+                result, new_state = apply(self.get_state(default))
+                cache.set(self.key, new_state, None)
+            return result
+
+        from redis.exceptions import RedisError, WatchError
+
+        key = cache.make_key(self.key)
+        try:
+            with client.pipeline() as pipe:
+                for _ in range(self.MAX_RETRIES):
+                    try:
+                        pipe.watch(key)
+                        result, new_state = apply(self._decode(pipe.get(key), default))
+                        pipe.multi()
+                        pipe.set(key, json.dumps(new_state))
+                        pipe.execute()
+                        return result
+                    except WatchError:
+                        continue
+        except RedisError as e:
+            # No fallback: a decision from the default state would be
+            # returned as if it were real while the write is lost
+            logger.error(f"Failed to update optimizer state: {e}")
+            raise
+        raise RuntimeError(f"Optimizer state {self.key} kept changing, gave up after {self.MAX_RETRIES} attempts")
+
+    def get_battery_charge(self, default=None):
+        """Return the stored battery charge (kWh), or default if unset."""
+        state = self.get_state()
+        return default if state is None else float(state['battery_charge'])
+
+    def set_battery_charge(self, charge):
+        """Overwrite the battery charge (kWh)."""
+        self.update(lambda state: (None, dict(state, battery_charge=float(charge))), default={})
+
+
+class ForecastCache:
+    """
+    Memoizes demand forecasts for the current hour.
+
+    Inputs only change hourly, so a forecast is stored under
+    (model version, hour bucket, horizon, input fingerprint) and shared
+    by /ai/forecast/, /ai/peak_hours/ and /ai/decide/. A global generation
+    counter is bumped by invalidate() when new hourly data lands, which
+    orphans every stored forecast at once.
+    """
+
+    GENERATION_KEY = 'forecast:generation'
+
+    def __init__(self, model_version, ttl=None):
+        self.model_version = model_version
+        self.ttl = ttl if ttl is not None else getattr(settings, 'FORECAST_CACHE_TTL', 3600)
+
+    @staticmethod
+    def hour_bucket(now=None):
+        """Start of the hour the forecast belongs to."""
+        now = now or timezone.now()
+        return now.replace(minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def fingerprint(*parts):
+        """Short stable hash of the forecast inputs."""
+        digest = hashlib.sha1()
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else repr(part).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def _generation(self):
+        try:
+            return cache.get(self.GENERATION_KEY, 0)
+        except Exception as e:
+            logger.error(f"Failed to read forecast generation: {e}")
+            return 0
+
+    def _key(self, bucket, horizon, fingerprint):
+        return (
+            f"forecast:{self.model_version}:{self._generation()}:"
+            f"{bucket.strftime('%Y%m%d%H')}:{horizon}:{fingerprint}"
+        )
+
+    def get_or_compute(self, bucket, horizon, fingerprint, compute):
+        """
+        Return the cached forecast for these inputs, computing and storing
+        it on a miss. Cache errors fall through to a direct computation.
+        """
+        key = self._key(bucket, horizon, fingerprint)
+        try:
+            value = cache.get(key)
+        except Exception as e:
+            logger.error(f"Failed to read forecast cache: {e}")
+            value = None
+
+        if value is not None:
+            logger.debug(f"Forecast cache hit: {key}")
+            return value
+
+        value = compute()
+        try:
+            cache.set(key, value, self.ttl)
+        except Exception as e:
+            logger.error(f"Failed to store forecast: {e}")
+        return value
+
+    @classmethod
+    def invalidate(cls):
+        """Drop every cached forecast (called when new hourly data lands)."""
+        try:
+            cache.incr(cls.GENERATION_KEY)
+        except ValueError:
+            cache.add(cls.GENERATION_KEY, 1, None)
+        except Exception as e:
+            logger.error(f"Failed to invalidate forecasts: {e}")
+        logger.info("Invalidated cached forecasts")
+
+
+class ContextSnapshotCache:
+    """
+    Versioned snapshot of EnergySourceOptimizer.gather_context().
+
+    Model signals bump a version counter whenever energy sources, grid
+    data or preferences change (see signals.py). A snapshot is current
+    while its version matches. Sensor readings arrive every few seconds,
+    so they only mark the snapshot dirty; it stays current until the
+    oldest unseen reading is more than sensor_debounce seconds old. Callers
+    that pass max_age also accept an outdated snapshot up to that many
+    seconds old, which saves the five-plus queries of a rebuild.
+    """
+
+    VERSION_KEY = 'optimizer_context:version'
+    SNAPSHOT_KEY = 'optimizer_context:snapshot'
+    SENSOR_DIRTY_KEY = 'optimizer_context:sensor_dirty_since'
+
+    def __init__(self, ttl=None, sensor_debounce=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'OPTIMIZER_CONTEXT_TTL', 300)
+        self.sensor_debounce = (sensor_debounce if sensor_debounce is not None
+                                else getattr(settings, 'OPTIMIZER_SENSOR_DEBOUNCE', 10))
+
+    def _read(self):
+        """Current version, stored snapshot and sensor dirty time in one round trip."""
+        try:
+            found = cache.get_many([self.VERSION_KEY, self.SNAPSHOT_KEY, self.SENSOR_DIRTY_KEY])
+        except Exception as e:
+            logger.error(f"Failed to read context snapshot: {e}")
+            return 0, None, None
+        return (found.get(self.VERSION_KEY, 0), found.get(self.SNAPSHOT_KEY),
+                found.get(self.SENSOR_DIRTY_KEY))
+
+    def _is_current(self, snapshot, version, dirty_since):
+        if snapshot['version'] != version:
+            return False
+        if dirty_since is None or dirty_since < snapshot['built_at']:
+            return True
+        return time.time() - dirty_since <= self.sensor_debounce
+
+    def get_or_build(self, build, max_age=None):
+        """
+        Return a cached context if it is usable, otherwise build and store one.
+
+        Args:
+            build: Callable returning a fresh context dict
+            max_age: Seconds an outdated snapshot may be used for
+                     (None: only a current snapshot is used)
+        """
+        version, snapshot, dirty_since = self._read()
+        if snapshot is not None:
+            if self._is_current(snapshot, version, dirty_since):
+                return snapshot['context']
+            if max_age is not None and time.time() - snapshot['built_at'] <= max_age:
+                logger.debug("Using outdated context snapshot within max_age")
+                return snapshot['context']
+
+        # The version is read before building, so a write that lands during
+        # the build leaves this snapshot outdated rather than wrongly current
+        built_at = time.time()
+        if dirty_since is not None:
+            try:
+                cache.delete(self.SENSOR_DIRTY_KEY)
+            except Exception as e:
+                logger.error(f"Failed to clear context snapshot dirty mark: {e}")
+        context = build()
+        try:
+            cache.set(self.SNAPSHOT_KEY, {
+                'version': version,
+                'built_at': built_at,
+                'context': context,
+            }, self.ttl)
+        except Exception as e:
+            logger.error(f"Failed to store context snapshot: {e}")
+        return context
+
+    @classmethod
+    def invalidate(cls):
+        """Mark the current snapshot as outdated (called from model signals)."""
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.add(cls.VERSION_KEY, 1, None)
+        except Exception as e:
+            logger.error(f"Failed to invalidate context snapshot: {e}")
+
+    @classmethod
+    def mark_sensor_dirty(cls):
+        """Record the first sensor reading the snapshot has not seen (called from model signals)."""
+        try:
+            cache.add(cls.SENSOR_DIRTY_KEY, time.time(), None)
+        except Exception as e:
+            logger.error(f"Failed to mark context snapshot dirty: {e}")
+
+
+class DecisionStore:
+    """
+    Latest AI decision, computed by the inference worker (ai_worker).
+
+    The worker writes every decision here together with a sequence number;
+    /ai/decide/ and /ai/latest/ only read it. Clients that need a fresh
+    decision request a refresh and wait for the sequence number to move.
+    """
+
+    LATEST_KEY = 'ai_decision:latest'
+    SEQ_KEY = 'ai_decision:seq'
+    REFRESH_KEY = 'ai_decision:refresh_requested'
+    HEARTBEAT_KEY = 'ai_decision:worker_heartbeat'
+
+    def save(self, decision):
+        """Store a new decision and return its entry."""
+        try:
+            seq = cache.incr(self.SEQ_KEY)
+        except ValueError:
+            cache.add(self.SEQ_KEY, 1, None)
+            seq = cache.get(self.SEQ_KEY, 1)
+
+        entry = {
+            'seq': seq,
+            'computed_at': timezone.now().isoformat(),
+            'decision': decision,
+        }
+        try:
+            cache.set(self.LATEST_KEY, entry, None)
+        except Exception as e:
+            logger.error(f"Failed to store AI decision: {e}")
+        return entry
+
+    def get_latest(self):
+        """Return the latest entry ({'seq', 'computed_at', 'decision'}) or None."""
+        try:
+            return cache.get(self.LATEST_KEY)
+        except Exception as e:
+            logger.error(f"Failed to read AI decision: {e}")
+            return None
+
+    def request_refresh(self):
+        """Ask the worker to compute a new decision as soon as possible."""
+        cache.set(self.REFRESH_KEY, 1, 300)
+
+    def pop_refresh_request(self):
+        """Return True (and clear the flag) if a refresh was requested."""
+        if cache.get(self.REFRESH_KEY):
+            cache.delete(self.REFRESH_KEY)
+            return True
+        return False
+
+    def heartbeat(self, ttl):
+        """Mark the worker as alive for the next ttl seconds."""
+        cache.set(self.HEARTBEAT_KEY, timezone.now().isoformat(), ttl)
+
+    def worker_alive(self):
+        """True if an inference worker has checked in recently."""
+        return cache.get(self.HEARTBEAT_KEY) is not None
+
+    def wait_for_newer(self, seq, timeout, poll_interval=0.1):
+        """
+        Long-poll until an entry newer than seq is stored.
+
+        Returns:
+            The newer entry, or None if timeout expired first.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            entry = self.get_latest()
+            if entry and entry['seq'] > seq:
+                return entry
+            time.sleep(poll_interval)
+        return None
+
+
+class RetrainingJobStore:
+    """
+    Status of background retraining jobs, keyed by job id.
+
+    The API creates a job and enqueues the work on Django-Q; the task
+    updates the job as it runs and clients poll /ai/retrain/<job_id>/.
+    LOCK_KEY makes sure only one retraining runs at a time.
+    """
+
+    KEY_PREFIX = 'ai_retrain:job'
+    LOCK_KEY = 'ai_retrain:lock'
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'AI_RETRAIN_JOB_TTL', 24 * 3600)
+
+    def _key(self, job_id):
+        return f"{self.KEY_PREFIX}:{job_id}"
+
+    def create(self, job_id):
+        """Register a queued job and return it."""
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'queued_at': timezone.now().isoformat(),
+        }
+        cache.set(self._key(job_id), job, self.ttl)
+        return job
+
+    def update(self, job_id, **fields):
+        """Merge fields into a job and return it."""
+        job = cache.get(self._key(job_id)) or {'job_id': job_id}
+        job.update(fields)
+        try:
+            cache.set(self._key(job_id), job, self.ttl)
+        except Exception as e:
+            logger.error(f"Failed to store retraining job {job_id}: {e}")
+        return job
+
+    def get(self, job_id):
+        """
+        Return the job, or None if it is unknown or expired.
+
+        A running job past its deadline was killed (Django-Q timeout or a
+        crashed worker) before it could report; it is marked failed.
+        """
+        try:
+            job = cache.get(self._key(job_id))
+        except Exception as e:
+            logger.error(f"Failed to read retraining job {job_id}: {e}")
+            return None
+        if job and job.get('status') == 'running' and job.get('deadline'):
+            deadline = datetime.fromisoformat(job['deadline'])
+            if timezone.now() > deadline:
+                job = self.update(job_id, status='failed', finished_at=job['deadline'],
+                                  error='Retraining did not finish before its deadline')
+        return job
+
+    def acquire(self, job_id, timeout):
+        """Take the retraining lock for job_id; False if another job holds it."""
+        return cache.add(self.LOCK_KEY, job_id, timeout)
+
+    def release(self, job_id):
+        """Release the lock if job_id holds it."""
+        if cache.get(self.LOCK_KEY) == job_id:
+            cache.delete(self.LOCK_KEY)
@@ -0,0 +1,239 @@
+"""
+Current conditions for AI inference, read from the Hot Path.
+
+Sensor values come from the per-type "latest" entries that
+SensorBufferManager maintains, and grid values (carbon intensity,
+weather) from the grid context written by the scheduled fetch tasks.
+Everything is read in one get_many() round trip; the database is only
+queried for fields missing from the cache or stale there, and at most
+once per CONDITIONS_RECHECK_AFTER for each field.
+"""
+import logging
+from datetime import datetime
+from django.core.cache import cache
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+GRID_CONTEXT_KEY_PREFIX = 'grid_context'
+
+SENSOR_FIELDS = ['temperature', 'humidity', 'ldr', 'current', 'voltage']
+GRID_FIELDS = ['carbon_intensity', 'weather']
+
+
+def grid_context_key(data_type):
+    """Cache key for the latest GridData entry of a type."""
+    return f"{GRID_CONTEXT_KEY_PREFIX}:{data_type}"
+
+
+def set_grid_context(data_type, value, metadata=None, timestamp=None):
+    """
+    Cache the latest grid value (called after GridData is saved).
+
+    Args:
+        data_type: GridData.data_type ('carbon_intensity', 'weather', ...)
+        value: Numeric value
+        metadata: Optional metadata dict (e.g. grid_price)
+        timestamp: datetime or ISO string (default: now)
+    """
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+    entry = {
+        'value': float(value),
+        'metadata': metadata or {},
+        'timestamp': timestamp or timezone.now().isoformat(),
+    }
+    try:
+        cache.set(grid_context_key(data_type), entry, settings.GRID_CONTEXT_TTL)
+    except Exception as e:
+        logger.error(f"Failed to cache grid context {data_type}: {e}")
+
+
+class ConditionsProvider:
+    """
+    Assembles current conditions for the AI services.
+
+    get_conditions() returns a flat dict of values (sensor types, carbon
+    intensity, grid price, hour) plus 'staleness', which reports for each
+    field where the value came from ('cache', 'database' or 'default'),
+    its age in seconds and whether it is older than the allowed maximum.
+    """
+
+    DEFAULTS = {
+        'temperature': 25.0,
+        'humidity': 50.0,
+        'ldr': 2000,
+        'current': 1.0,
+        'voltage': 230.0,
+        'carbon_intensity': 450,
+        'grid_price': 6.0,
+    }
+
+    def __init__(self, defaults=None):
+        self.defaults = {**self.DEFAULTS, **(defaults or {})}
+        self.key_prefix = settings.SENSOR_BUFFER_KEY_PREFIX
+
+    def _sensor_key(self, sensor_type):
+        return f"{self.key_prefix}:latest:{sensor_type}"
+
+    def _checked_key(self, field):
+        return f"{self.key_prefix}:conditions_checked:{field}"
+
+    def _read_cache(self):
+        """
+        Read every sensor and grid entry in one round trip.
+
+        Returns (entries, checked): the cached entries by field, and the
+        fields whose DB lookup ran less than CONDITIONS_RECHECK_AFTER ago.
+        """
+        keys = {self._sensor_key(t): t for t in SENSOR_FIELDS}
+        keys.update({grid_context_key(t): t for t in GRID_FIELDS})
+        checked_keys = {self._checked_key(t): t for t in SENSOR_FIELDS + GRID_FIELDS}
+        try:
+            found = cache.get_many(list(keys) + list(checked_keys))
+        except Exception as e:
+            logger.error(f"Hot path read failed: {e}")
+            return {}, set()
+        entries = {keys[key]: entry for key, entry in found.items() if key in keys}
+        checked = {checked_keys[key] for key in found if key in checked_keys}
+        return entries, checked
+
+    def _read_database(self, fields):
+        """Fetch the latest DB entry for each field (fields without rows are left out)."""
+        from ..models import SensorReading, GridData
+
+        entries = {}
+        try:
+            for sensor_type in fields:
+                if sensor_type in SENSOR_FIELDS:
+                    reading = SensorReading.objects.filter(
+                        sensor_type=sensor_type
+                    ).order_by('-timestamp').first()
+                    if reading:
+                        entries[sensor_type] = {
+                            'value': float(reading.value),
+                            'timestamp': reading.timestamp.isoformat(),
+                            'sensor_id': reading.sensor_id,
+                        }
+                else:
+                    grid = GridData.objects.filter(
+                        data_type=sensor_type
+                    ).order_by('-timestamp').first()
+                    if grid:
+                        entries[sensor_type] = {
+                            'value': float(grid.value),
+                            'metadata': grid.metadata or {},
+                            'timestamp': grid.timestamp.isoformat(),
+                        }
+        except Exception as e:
+            logger.error(f"Database read error: {e}")
+        return entries
+
+    def _backfill(self, fields, entries):
+        """
+        Cache DB entries and remember which fields were looked up.
+
+        Sensor entries only live for SENSOR_STALE_AFTER, so readings that
+        bypass the hot path (REST ingest) are picked up once the cached
+        value is stale. The lookup marker keeps fields without (newer) rows
+        from costing a query on every call.
+        """
+        try:
+            sensors = {self._sensor_key(t): e for t, e in entries.items() if t in SENSOR_FIELDS}
+            grid = {grid_context_key(t): e for t, e in entries.items() if t in GRID_FIELDS}
+            if sensors:
+                cache.set_many(sensors, settings.SENSOR_STALE_AFTER)
+            if grid:
+                cache.set_many(grid, settings.GRID_CONTEXT_TTL)
+            cache.set_many({self._checked_key(t): True for t in fields},
+                           settings.CONDITIONS_RECHECK_AFTER)
+        except Exception as e:
+            logger.error(f"Failed to backfill hot path: {e}")
+
+    @staticmethod
+    def _max_age(field):
+        return settings.SENSOR_STALE_AFTER if field in SENSOR_FIELDS else settings.GRID_STALE_AFTER
+
+    @staticmethod
+    def _age_seconds(entry, now):
+        try:
+            timestamp = datetime.fromisoformat(entry['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+        return max(0.0, (now - timestamp).total_seconds())
+
+    def get_conditions(self):
+        """Return current conditions with per-field staleness information."""
+        now = timezone.now()
+        cached, checked = self._read_cache()
+        entries = {t: (e, 'cache') for t, e in cached.items()}
+
+        def outdated(field):
+            age = self._age_seconds(cached[field], now)
+            return age is None or age > self._max_age(field)
+
+        # Missing and stale fields go to the DB, which may hold newer rows
+        # that never reached the hot path, unless looked up recently.
+        lookup = [t for t in SENSOR_FIELDS + GRID_FIELDS
+                  if t not in checked and (t not in cached or outdated(t))]
+        if lookup:
+            newer = {}
+            for t, e in self._read_database(lookup).items():
+                cached_age = self._age_seconds(cached[t], now) if t in cached else None
+                if cached_age is None or self._age_seconds(e, now) < cached_age:
+                    newer[t] = e
+                    entries[t] = (e, 'database')
+            self._backfill(lookup, newer)
+
+        conditions = {'hour': now.hour}
+        staleness = {}
+
+        def record(field, entry, origin, max_age):
+            age = self._age_seconds(entry, now)
+            staleness[field] = {
+                'source': origin,
+                'age_seconds': round(age, 1) if age is not None else None,
+                'stale': age is None or age > max_age,
+            }
+
+        for sensor_type in SENSOR_FIELDS:
+            if sensor_type in entries:
+                entry, origin = entries[sensor_type]
+                conditions[sensor_type] = float(entry['value'])
+                record(sensor_type, entry, origin, settings.SENSOR_STALE_AFTER)
+            else:
+                conditions[sensor_type] = self.defaults[sensor_type]
+                staleness[sensor_type] = {'source': 'default', 'age_seconds': None, 'stale': True}
+
+        if 'carbon_intensity' in entries:
+            entry, origin = entries['carbon_intensity']
+            conditions['carbon_intensity'] = float(entry['value'])
+            conditions['grid_price'] = float(
+                entry.get('metadata', {}).get('grid_price', self.defaults['grid_price'])
+            )
+            record('carbon_intensity', entry, origin, settings.GRID_STALE_AFTER)
+        else:
+            conditions['carbon_intensity'] = self.defaults['carbon_intensity']
+            conditions['grid_price'] = self.defaults['grid_price']
+            staleness['carbon_intensity'] = {'source': 'default', 'age_seconds': None, 'stale': True}
+
+        if 'weather' in entries:
+            entry, origin = entries['weather']
+            conditions['cloud_cover'] = entry.get('metadata', {}).get('cloud_cover')
+            record('weather', entry, origin, settings.GRID_STALE_AFTER)
+
+        origins = {info['source'] for info in staleness.values()}
+        if origins == {'cache'}:
+            conditions['source'] = 'hot_path'
+        elif origins == {'default'}:
+            conditions['source'] = 'defaults'
+        elif 'cache' not in origins:
+            conditions['source'] = 'database'
+        else:
+            conditions['source'] = 'mixed'
+
+        conditions['staleness'] = staleness
+        return conditions
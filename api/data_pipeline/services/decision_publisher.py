@@ -0,0 +1,157 @@
+"""
+Publisher for AI decisions.
+Keeps a single MQTT connection open for hardware commands and pushes
+decisions, forecasts and peak-hour updates to WebSocket clients.
+"""
+import json
+import logging
+import os
+import threading
+from django.conf import settings
+from django.utils import timezone
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+logger = logging.getLogger(__name__)
+
+# Channels group joined by DecisionConsumer (ws/decisions/)
+DECISIONS_GROUP = 'ai_decisions'
+
+
+class DecisionPublisher:
+    """
+    Process-wide publisher for AI output.
+
+    The MQTT client is connected once and driven by paho's background
+    network thread, so each decision is a single PUBLISH on an already
+    open socket instead of a new TCP connection.
+    """
+
+    def __init__(self):
+        self.command_topic = f"{settings.MQTT_TOPIC_PREFIX}/commands/control"
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        """Create and connect the MQTT client on first use."""
+        # paho is only needed once a decision is actually published
+        import paho.mqtt.client as mqtt
+
+        with self._lock:
+            if self._client is None:
+                # One publisher per process (web workers, ai_worker): a
+                # shared client id would make the broker drop the other
+                # sessions on every connect
+                client = mqtt.Client(
+                    mqtt.CallbackAPIVersion.VERSION2,
+                    client_id=f"{settings.MQTT_CLIENT_ID}_decisions_{os.getpid()}",
+                    protocol=mqtt.MQTTv5
+                )
+                if settings.MQTT_USERNAME:
+                    client.username_pw_set(
+                        settings.MQTT_USERNAME,
+                        settings.MQTT_PASSWORD
+                    )
+                client.reconnect_delay_set(min_delay=1, max_delay=30)
+                client.connect_async(
+                    settings.MQTT_BROKER_HOST,
+                    settings.MQTT_BROKER_PORT,
+                    keepalive=60
+                )
+                client.loop_start()
+                self._client = client
+                logger.info(
+                    f"Decision publisher connecting to "
+                    f"{settings.MQTT_BROKER_HOST}:{settings.MQTT_BROKER_PORT}"
+                )
+            return self._client
+
+    def publish_command(self, source, details, timestamp=None):
+        """
+        Publish a switch_source command for the hardware.
+
+        Uses QoS 1 so commands issued while the broker connection is
+        being (re)established are queued rather than dropped.
+        """
+        payload = {
+            'command': 'switch_source',
+            'source': source,
+            'details': details,
+            'timestamp': timestamp or timezone.now().isoformat()
+        }
+
+        try:
+            info = self._get_client().publish(
+                self.command_topic,
+                payload=json.dumps(payload),
+                qos=1
+            )
+            if info.rc != 0:  # MQTT_ERR_SUCCESS
+                logger.warning(f"MQTT publish queued with rc={info.rc}")
+            logger.info(f"Published AI decision to MQTT: {source}")
+        except Exception as e:
+            logger.error(f"MQTT publish failed: {e}")
+
+        return payload
+
+    def broadcast(self, event_type, data):
+        """
+        Push an update to every client connected to ws/decisions/.
+
+        Args:
+            event_type: 'ai_decision', 'forecast_update' or 'peak_hours_update'
+            data: JSON-serializable payload
+        """
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        try:
+            async_to_sync(channel_layer.group_send)(
+                DECISIONS_GROUP,
+                {
+                    'type': 'decision_update',
+                    'event': event_type,
+                    'data': data,
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to broadcast {event_type}: {e}")
+
+    def publish_decision(self, decision, source):
+        """
+        Send a decision to the hardware (MQTT) and the dashboard (WebSocket).
+
+        Args:
+            decision: Full decision dictionary returned by the AI service
+            source: Primary energy source selected by the decision
+        """
+        payload = self.publish_command(
+            source,
+            decision.get('current_decision', {}),
+            decision.get('timestamp')
+        )
+        self.broadcast('ai_decision', decision)
+        return payload
+
+    def close(self):
+        """Stop the network thread and disconnect."""
+        with self._lock:
+            if self._client is not None:
+                self._client.loop_stop()
+                self._client.disconnect()
+                self._client = None
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_decision_publisher():
+    """Return the process-wide DecisionPublisher."""
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = DecisionPublisher()
+    return _publisher
@@ -19,6 +19,32 @@ class ElectricityMapsService:
         self.api_key = settings.ELECTRICITY_MAPS_API_KEY
         self.zone = settings.LOCATION_ZONE
 
+    def build_request(self):
+        """
+        URL, query parameters and headers of the latest carbon intensity request.
+        """
+        url = f"{self.BASE_URL}/carbon-intensity/latest"
+        headers = {
+            "auth-token": self.api_key
+        }
+        params = {
+            "zone": self.zone
+        }
+        return url, params, headers
+
+    def parse_response(self, data):
+        """
+        Convert an Electricity Maps response to our carbon intensity record.
+        """
+        return {
+            'carbon_intensity': data.get('carbonIntensity'),
+            'unit': 'gCO2eq/kWh',
+            'zone': self.zone,
+            'timestamp': data.get('datetime'),
+            'fossil_free_percentage': data.get('fossilFreePercentage'),
+            'renewable_percentage': data.get('renewablePercentage'),
+        }
+
     def get_carbon_intensity(self):
         """
         Fetch current carbon intensity for the configured zone.
@@ -31,26 +57,11 @@ class ElectricityMapsService:
             return None
 
         try:
-            url = f"{self.BASE_URL}/carbon-intensity/latest"
-            headers = {
-                "auth-token": self.api_key
-            }
-            params = {
-                "zone": self.zone
-            }
-
+            url, params, headers = self.build_request()
             response = requests.get(url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
 
-            data = response.json()
-            return {
-                'carbon_intensity': data.get('carbonIntensity'),
-                'unit': 'gCO2eq/kWh',
-                'zone': self.zone,
-                'timestamp': data.get('datetime'),
-                'fossil_free_percentage': data.get('fossilFreePercentage'),
-                'renewable_percentage': data.get('renewablePercentage'),
-            }
+            return self.parse_response(response.json())
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch carbon intensity: {e}")
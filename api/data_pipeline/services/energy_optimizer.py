@@ -18,8 +18,11 @@ from data_pipeline.models import (
     SensorReading, 
     GridData, 
     AIDecision,
-    UserPreferences
+    UserPreferences,
+    Load
 )
+from .cache_manager import ContextSnapshotCache
+from .load_distribution import LoadDistributionSolver, ASSIGNED, DEFERRED, UNSERVED
 
 logger = logging.getLogger(__name__)
 
@@ -49,17 +52,39 @@ class EnergySourceOptimizer:
         'grid': 50,        # Middle ground (depends on carbon intensity)
     }
     
-    def __init__(self):
+    def __init__(self, max_age=None):
+        """
+        Args:
+            max_age (float): Seconds a cached context may lag behind the
+                database (None: only use a snapshot that is still current)
+        """
         self.context = {}
+        self.max_age = max_age
+        self.snapshot_cache = ContextSnapshotCache()
     
-    def gather_context(self):
+    def gather_context(self, max_age=None):
         """
         Gather all relevant context for energy optimization decision.
         
+        The context is served from a versioned snapshot in the cache and
+        only rebuilt from the database when it is outdated.
+        
+        Args:
+            max_age (float): Override the optimizer's max_age for this call
+        
         Returns:
             dict: Context including sensor data, weather, carbon intensity, etc.
         """
-        context = {
+        context = self.snapshot_cache.get_or_build(
+            self._build_context,
+            self.max_age if max_age is None else max_age
+        )
+        self.context = context
+        return context
+    
+    def _build_context(self):
+        """Query every context source (sensors, weather, carbon, sources, preferences)."""
+        return {
             'timestamp': timezone.now().isoformat(),
             'energy_sources': self._get_energy_source_status(),
             'weather': self._get_weather_context(),
@@ -67,9 +92,6 @@ class EnergySourceOptimizer:
             'sensor_data': self._get_sensor_data(),
             'user_preferences': self._get_user_preferences(),
         }
-        
-        self.context = context
-        return context
     
     def _get_energy_source_status(self):
         """Get current status of all energy sources."""
@@ -212,25 +234,21 @@ class EnergySourceOptimizer:
         
         return recommendation
     
-    def _rule_based_optimization(self, available_sources, load_name, load_priority, load_power, context):
+    def _source_scores(self, context):
         """
-        Basic rule-based optimization logic.
-        Module 3 (AI) will replace or enhance this with ML-based decisions.
+        Score every known source from the context alone.
         
-        Rules:
-        1. If solar available and sunny, prefer solar
-        2. If grid down, prefer battery for high-priority loads
-        3. If grid carbon high, prefer clean sources
-        4. Otherwise, use source preference order
+        Returns:
+            tuple: (scores, reasons, battery_bonus) where scores and reasons
+            are keyed by source type and battery_bonus is the extra score
+            the battery gets for high-priority loads.
         """
-        reasoning_parts = []
         scores = {}
+        reasons = {}
         
-        # Score each available source
-        for source in available_sources:
+        for source in context['energy_sources']:
             score = self.SOURCE_PREFERENCES.get(source, 0)
-            
-            # Adjust score based on context
+            source_reasons = []
             
             # Solar bonus if sunny
             if source == 'solar':
@@ -239,30 +257,55 @@ class EnergySourceOptimizer:
                     cloud_cover = weather.get('cloud_cover', 100)
                     if cloud_cover < 30:
                         score += 20
-                        reasoning_parts.append("Clear weather favors solar")
+                        source_reasons.append("Clear weather favors solar")
                     elif cloud_cover < 60:
                         score += 10
-                        reasoning_parts.append("Partly cloudy, solar still viable")
+                        source_reasons.append("Partly cloudy, solar still viable")
                 
                 # Check LDR sensor
                 ldr_data = context.get('sensor_data', {}).get('ldr')
                 if ldr_data and ldr_data['value'] > 500:
                     score += 15
-                    reasoning_parts.append("High light intensity detected")
+                    source_reasons.append("High light intensity detected")
             
             # Grid penalty if high carbon intensity
             if source == 'grid':
                 carbon = context.get('carbon_intensity')
                 if carbon and carbon['value'] > 500:  # High carbon
                     score -= 30
-                    reasoning_parts.append("High grid carbon intensity")
+                    source_reasons.append("High grid carbon intensity")
                 elif carbon and carbon['value'] < 300:  # Low carbon
                     score += 20
-                    reasoning_parts.append("Low grid carbon intensity")
+                    source_reasons.append("Low grid carbon intensity")
+            
+            scores[source] = score
+            reasons[source] = source_reasons
+        
+        return scores, reasons, 15
+    
+    def _rule_based_optimization(self, available_sources, load_name, load_priority, load_power, context):
+        """
+        Basic rule-based optimization logic.
+        Module 3 (AI) will replace or enhance this with ML-based decisions.
+        
+        Rules:
+        1. If solar available and sunny, prefer solar
+        2. If grid down, prefer battery for high-priority loads
+        3. If grid carbon high, prefer clean sources
+        4. Otherwise, use source preference order
+        """
+        base_scores, source_reasons, battery_bonus = self._source_scores(context)
+        reasoning_parts = []
+        scores = {}
+        
+        # Score each available source
+        for source in available_sources:
+            score = base_scores[source]
+            reasoning_parts.extend(source_reasons[source])
             
             # Battery consideration for high-priority loads
             if source == 'battery' and load_priority >= self.PRIORITY_HIGH:
-                score += 15
+                score += battery_bonus
                 reasoning_parts.append("Battery prioritized for critical loads")
             
             scores[source] = score
@@ -286,68 +329,201 @@ class EnergySourceOptimizer:
             'algorithm': 'rule_based',  # Module 3 will set this to 'ml' or 'hybrid'
         }
     
+    def recommend_sources_for_loads(self, loads, record=True):
+        """
+        Recommend energy sources for many loads at once.
+        
+        Context is gathered once and every load is scored against every
+        source in one NumPy pass (loads x sources), giving the same result
+        as calling recommend_source_for_load() for each load. All decisions
+        are written with a single bulk_create.
+        
+        Args:
+            loads (list): Dicts with 'load_name', 'load_priority', 'load_power'
+            record (bool): Store the decisions as AIDecision rows
+        
+        Returns:
+            dict: {'timestamp', 'recommendations': [...], 'context'}
+        """
+        import numpy as np
+        
+        context = self.gather_context()
+        base_scores, source_reasons, battery_bonus = self._source_scores(context)
+        
+        sources = list(context['energy_sources'])
+        status = context['energy_sources']
+        priority = np.array([load.get('load_priority', self.PRIORITY_MEDIUM) for load in loads], dtype=float)
+        power = np.array([load.get('load_power', 0) or 0 for load in loads], dtype=float)
+        
+        # Source capacity check for every (load, source) pair
+        usable = np.array([bool(status[s]['available'] and status[s]['capacity']) for s in sources])
+        capacity = np.array([status[s]['capacity'] or 0 for s in sources], dtype=float)
+        output = np.array([status[s]['current_output'] or 0 for s in sources], dtype=float)
+        feasible = usable[None, :] & (output[None, :] + power[:, None] <= capacity[None, :])
+        
+        is_battery = np.array([s == 'battery' for s in sources])
+        high_priority = priority >= self.PRIORITY_HIGH
+        scores = (np.array([base_scores[s] for s in sources], dtype=np.int64)[None, :]
+                  + battery_bonus * (is_battery[None, :] & high_priority[:, None]))
+        
+        # argmax picks the first of equal scores, like max() over the dict
+        best = np.where(feasible, scores, np.iinfo(np.int64).min).argmax(axis=1)
+        
+        recommendations = []
+        for i, load in enumerate(loads):
+            load_name = load['load_name']
+            if not feasible[i].any():
+                recommendations.append({
+                    'recommended_source': None,
+                    'load_name': load_name,
+                    'reasoning': 'No energy sources available with sufficient capacity',
+                    'confidence': 1.0,
+                    'fallback_to_grid': True,
+                })
+                continue
+            
+            available = [s for s, ok in zip(sources, feasible[i]) if ok]
+            reasoning_parts = []
+            for source in available:
+                reasoning_parts.extend(source_reasons[source])
+                if source == 'battery' and high_priority[i]:
+                    reasoning_parts.append("Battery prioritized for critical loads")
+            
+            recommended_source = sources[best[i]]
+            recommendations.append({
+                'recommended_source': recommended_source,
+                'load_name': load_name,
+                'load_priority': load.get('load_priority', self.PRIORITY_MEDIUM),
+                'load_power': load.get('load_power', 0),
+                'reasoning': f"Selected {recommended_source} for {load_name}. " + " ".join(reasoning_parts[:3]),
+                'confidence': 0.7,
+                'scores': {s: int(scores[i, j]) for j, s in enumerate(sources) if feasible[i, j]},
+                'algorithm': 'rule_based',
+            })
+        
+        if record:
+            try:
+                AIDecision.objects.bulk_create([
+                    self._build_decision(rec) for rec in recommendations
+                    if rec['recommended_source'] is not None
+                ])
+            except Exception as e:
+                logger.error(f"Error recording decisions: {e}")
+        
+        return {
+            'timestamp': context['timestamp'],
+            'recommendations': recommendations,
+            'context': context,
+        }
+    
+    def _build_decision(self, recommendation):
+        """Unsaved AIDecision for a recommendation."""
+        return AIDecision(
+            decision_type='power_source',
+            decision={
+                'recommended_source': recommendation['recommended_source'],
+                'load_name': recommendation.get('load_name'),
+                'load_priority': recommendation.get('load_priority'),
+                'load_power': recommendation.get('load_power'),
+                'scores': recommendation.get('scores', {}),
+                'algorithm': recommendation.get('algorithm', 'rule_based'),
+            },
+            confidence=recommendation.get('confidence', 0.5),
+            reasoning=recommendation['reasoning'],
+            applied=False,  # Module 1 (Hardware) will set this to True when applied
+        )
+    
     def _record_decision(self, recommendation):
         """Record the energy optimization decision."""
         try:
-            AIDecision.objects.create(
-                decision_type='power_source',
-                decision={
-                    'recommended_source': recommendation['recommended_source'],
-                    'load_name': recommendation.get('load_name'),
-                    'load_priority': recommendation.get('load_priority'),
-                    'load_power': recommendation.get('load_power'),
-                    'scores': recommendation.get('scores', {}),
-                    'algorithm': recommendation.get('algorithm', 'rule_based'),
-                },
-                confidence=recommendation.get('confidence', 0.5),
-                reasoning=recommendation['reasoning'],
-                applied=False,  # Module 1 (Hardware) will set this to True when applied
-            )
+            self._build_decision(recommendation).save()
         except Exception as e:
             logger.error(f"Error recording decision: {e}")
     
     def get_optimal_source_distribution(self):
         """
-        Get optimal distribution of loads across available sources.
+        Get optimal distribution of active loads across available sources.
         
-        This is a placeholder for Module 3 (AI) to implement more sophisticated
-        load balancing and optimization algorithms.
+        Loads are read as plain value rows and handed to
+        LoadDistributionSolver: sources are filled best score first, loads
+        in priority order, without exceeding source capacity. Running loads
+        with a minimum runtime stay on their current source, and deferrable
+        loads only go to sources scoring at least PRIORITY_MEDIUM.
         
         Returns:
-            dict: Distribution plan with sources and assigned loads
+            dict: Assignment per load, usage per source, deferred and
+            unserved loads
         """
+        import numpy as np
+        
         context = self.gather_context()
+        base_scores, _, _ = self._source_scores(context)
+        status = context['energy_sources']
+        
+        # Same usability rule as recommend_sources_for_loads()
+        sources = [s for s in status if status[s]['available'] and status[s]['capacity']]
+        index = {source: i for i, source in enumerate(sources)}
+        
+        rows = list(Load.objects.filter(is_active=True).values_list(
+            'id', 'name', 'priority', 'rated_power', 'can_defer', 'min_runtime', 'current_source'
+        ))
+        ids, names, priority, power, can_defer, min_runtime, current = (
+            zip(*rows) if rows else ((),) * 7
+        )
+        pinned = [
+            index.get(source, -1) if runtime > 0 else -1
+            for source, runtime in zip(current, min_runtime)
+        ]
         
-        # For now, return simple recommendations
-        # Module 3 will implement sophisticated optimization here
+        solver = LoadDistributionSolver(defer_threshold=self.PRIORITY_MEDIUM)
+        result = solver.solve(
+            {
+                'power': np.array(power, dtype=float),
+                'priority': np.array(priority, dtype=float),
+                'can_defer': np.array(can_defer, dtype=bool),
+                'pinned': np.array(pinned, dtype=np.int64),
+            },
+            sources,
+            [base_scores[s] for s in sources],
+            [[status[s]['capacity'] for s in sources]],
+        )
         
-        distribution = {
+        assignments = []
+        for i, load_id in enumerate(ids):
+            source = int(result['source'][i])
+            assignments.append({
+                'load_id': load_id,
+                'load_name': names[i],
+                'priority': priority[i],
+                'rated_power': power[i],
+                'source': sources[source] if source >= 0 else None,
+                'status': str(result['status'][i]),
+            })
+        
+        load_counts = np.bincount(result['source'][result['source'] >= 0], minlength=len(sources))
+        source_usage = {}
+        for j, source in enumerate(sources):
+            capacity = float(result['capacity'][0, j])
+            used = float(result['used'][0, j])
+            source_usage[source] = {
+                'capacity': capacity,
+                'assigned_power': round(used, 2),
+                'load_count': int(load_counts[j]),
+                'utilization': round(used / capacity, 4) if capacity else 0.0,
+                'score': base_scores[source],
+            }
+        
+        return {
             'timestamp': context['timestamp'],
-            'available_sources': list(context['energy_sources'].keys()),
-            'recommendations': [
-                {
-                    'load_category': 'HVAC',
-                    'priority': self.PRIORITY_HIGH,
-                    'recommended_source': 'solar',
-                    'fallback_source': 'battery',
-                },
-                {
-                    'load_category': 'Lighting',
-                    'priority': self.PRIORITY_MEDIUM,
-                    'recommended_source': 'grid',
-                    'fallback_source': 'solar',
-                },
-                {
-                    'load_category': 'Entertainment',
-                    'priority': self.PRIORITY_LOW,
-                    'recommended_source': 'grid',
-                    'fallback_source': 'battery',
-                },
-            ],
-            'note': 'Basic rule-based distribution. Module 3 will enhance with ML optimization.',
+            'available_sources': sources,
+            'assignments': assignments,
+            'sources': source_usage,
+            'assigned': sum(a['status'] == ASSIGNED for a in assignments),
+            'deferred': [a['load_name'] for a in assignments if a['status'] == DEFERRED],
+            'unserved': [a['load_name'] for a in assignments if a['status'] == UNSERVED],
+            'solve_time_ms': round(result['solve_time_ms'], 3),
+            'algorithm': 'greedy_prefix+knapsack',
         }
-        
-        return distribution
     
     def should_switch_source(self, current_source, load_name, load_priority):
         """
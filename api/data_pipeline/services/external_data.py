@@ -0,0 +1,99 @@
+"""
+Concurrent refresh of the external data sources.
+
+Every configured API (Electricity Maps, OpenWeatherMap) is requested at
+once over one pooled keep-alive aiohttp session, so a refresh takes as
+long as the slowest API instead of the sum of all of them. Connection
+errors, timeouts, 429 and 5xx responses are retried with jittered
+exponential backoff; other HTTP errors fail immediately. The client
+(async_fetcher) is shared with the AI module's real-time collection.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from .async_fetcher import AsyncFetcher as BaseAsyncFetcher, describe_error
+from .electricity_maps import ElectricityMapsService
+from .weather import WeatherService
+
+logger = logging.getLogger(__name__)
+
+SOURCES = {
+    'carbon_intensity': ElectricityMapsService,
+    'weather': WeatherService,
+}
+
+
+class AsyncFetcher(BaseAsyncFetcher):
+    """async_fetcher.AsyncFetcher with the EXTERNAL_API_* settings as defaults."""
+
+    def __init__(self, timeout: Optional[float] = None, retries: Optional[int] = None,
+                 backoff: Optional[float] = None, **options):
+        super().__init__(
+            timeout=settings.EXTERNAL_API_TIMEOUT if timeout is None else timeout,
+            retries=settings.EXTERNAL_API_RETRIES if retries is None else retries,
+            backoff=settings.EXTERNAL_API_BACKOFF if backoff is None else backoff,
+            **options,
+        )
+
+
+async def refresh_external_data_async(services: Optional[Dict] = None,
+                                      fetcher: Optional[AsyncFetcher] = None) -> Dict:
+    """
+    Fetch every external source concurrently.
+
+    Args:
+        services: dict name -> service with api_key, build_request() and
+                  parse_response() (default: one of each SOURCES)
+        fetcher: Open AsyncFetcher to reuse (default: a new one per call)
+
+    Returns:
+        dict name -> parsed record, or None where the API key is not
+        configured or the request failed
+    """
+    if services is None:
+        services = {name: service_class() for name, service_class in SOURCES.items()}
+
+    results = {name: None for name in services}
+    pending = {}
+    for name, service in services.items():
+        if service.api_key:
+            pending[name] = service
+        else:
+            logger.warning(f"{name}: API key not configured")
+    if not pending:
+        return results
+
+    requests = {name: service.build_request() for name, service in pending.items()}
+    if fetcher is None:
+        async with AsyncFetcher() as fetcher:
+            responses = await fetcher.fetch_all(requests)
+    else:
+        responses = await fetcher.fetch_all(requests)
+
+    for name, response in responses.items():
+        if isinstance(response, BaseException):
+            logger.error(f"Failed to fetch {name}: {describe_error(response)}")
+            continue
+        try:
+            results[name] = pending[name].parse_response(response)
+        except Exception as e:
+            logger.error(f"Unexpected {name} response: {e}")
+    return results
+
+
+def refresh_external_data(services: Optional[Dict] = None, **fetcher_options) -> Dict:
+    """
+    Synchronous entry point for tasks and scripts (runs its own event loop).
+
+    Args:
+        services: see refresh_external_data_async()
+        **fetcher_options: AsyncFetcher options (timeout, retries, backoff, ...)
+    """
+    async def run():
+        async with AsyncFetcher(**fetcher_options) as fetcher:
+            return await refresh_external_data_async(services, fetcher)
+
+    return asyncio.run(run())
@@ -5,7 +5,6 @@ Provides energy demand forecasting and source optimization
 """
 
 import os
-import json
 import math
 import random
 from datetime import datetime, timedelta
@@ -13,11 +12,8 @@ from typing import Dict, List, Tuple, Optional
 from django.conf import settings
 from django.utils import timezone
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
+from .cache_manager import OptimizerStateStore, ForecastCache
+from .conditions import ConditionsProvider
 
 
 class SimpleEnergyForecaster:
@@ -40,13 +36,17 @@ class SimpleEnergyForecaster:
     def __init__(self):
         self.model_ready = True
     
-    def forecast(self, hours_ahead: int = 6) -> List[Dict]:
+    def forecast(self, hours_ahead: int = 6, start: Optional[datetime] = None) -> List[Dict]:
         """
         Forecast energy demand for next N hours
         Returns list of predictions with timestamps
+        
+        Args:
+            hours_ahead: Number of hours to forecast
+            start: Time the forecast is made from (default: now)
         """
         predictions = []
-        now = timezone.now()
+        now = start or timezone.now()
         
         for i in range(hours_ahead):
             future_time = now + timedelta(hours=i + 1)
@@ -55,9 +55,10 @@ class SimpleEnergyForecaster:
             # Base demand from pattern
             base_demand = self.HOURLY_PATTERNS.get(hour, 1.0)
             
-            # Add some variation (±15%) - deterministic based on time
-            random.seed(int(future_time.timestamp()) % 100)
-            variation = random.uniform(0.85, 1.15)
+            # Add some variation (±15%) - deterministic per forecast hour,
+            # using a local RNG so the global random state is left alone
+            rng = random.Random(int(future_time.timestamp()) // 3600)
+            variation = rng.uniform(0.85, 1.15)
             
             predicted_kwh = round(base_demand * variation, 3)
             is_peak = hour in self.PEAK_HOURS
@@ -73,12 +74,20 @@ class SimpleEnergyForecaster:
         
         return predictions
     
+    def fingerprint(self) -> str:
+        """Hash of everything the forecast depends on besides time"""
+        return ForecastCache.fingerprint(sorted(self.HOURLY_PATTERNS.items()), self.PEAK_HOURS)
+    
     def identify_peak_hours(self, hours_ahead: int = 24) -> Dict:
         """
         Identify upcoming peak hours in the forecast period
         """
-        forecast = self.forecast(hours_ahead)
-        
+        return self.summarize_peaks(self.forecast(hours_ahead))
+    
+    def summarize_peaks(self, forecast: List[Dict]) -> Dict:
+        """
+        Extract peak and high-demand hours from an existing forecast
+        """
         peak_hours = [p for p in forecast if p['is_peak_hour']]
         high_demand_hours = [p for p in forecast if p['predicted_kwh'] > 1.5]
         
@@ -148,7 +157,7 @@ class SimpleSourceOptimizer:
                        power_needed: float,
                        conditions: Dict) -> Tuple[List[Tuple[str, float]], Dict]:
         """
-        Optimize energy source selection
+        Optimize energy source selection against this instance's battery
         
         Args:
             power_needed: Power required in kW
@@ -157,6 +166,31 @@ class SimpleSourceOptimizer:
         Returns:
             (source_allocation, metrics)
         """
+        allocation, metrics, state = self.optimize(
+            {'battery_charge': self.battery_charge}, power_needed, conditions
+        )
+        self.battery_charge = state['battery_charge']
+        return allocation, metrics
+    
+    def optimize(self,
+                 state: Dict,
+                 power_needed: float,
+                 conditions: Dict) -> Tuple[List[Tuple[str, float]], Dict, Dict]:
+        """
+        Optimize energy source selection as a pure function of the battery state
+        
+        Nothing on the optimizer is modified, so one instance can serve
+        concurrent requests.
+        
+        Args:
+            state: Battery state ({'battery_charge': kWh})
+            power_needed: Power required in kW
+            conditions: Dict with hour, ldr, temperature, etc.
+        
+        Returns:
+            (source_allocation, metrics, new_state)
+        """
+        battery_charge = state['battery_charge']
         hour = conditions.get('hour', timezone.now().hour)
         ldr = conditions.get('ldr', 0)
         carbon_intensity = conditions.get('carbon_intensity', 500)
@@ -164,7 +198,7 @@ class SimpleSourceOptimizer:
         
         # Calculate available power from each source
         solar_available = self.calculate_solar_available(ldr, hour)
-        battery_available = min(self.battery_max_discharge, self.battery_charge * 0.8)
+        battery_available = min(self.battery_max_discharge, battery_charge * 0.8)
         
         allocation = []
         remaining = power_needed
@@ -187,7 +221,7 @@ class SimpleSourceOptimizer:
                 allocation.append(('battery', round(battery_used, 3)))
                 remaining -= battery_used
                 # Ensure battery charge never goes below zero
-                self.battery_charge = max(0, self.battery_charge - battery_used)
+                battery_charge = max(0, battery_charge - battery_used)
                 total_cost += battery_used * self.costs['battery']
                 total_carbon += battery_used * self.carbon['battery']
         
@@ -200,22 +234,22 @@ class SimpleSourceOptimizer:
         # Recharge battery from excess solar
         if solar_available > power_needed:
             excess = solar_available - power_needed
-            charge_amount = min(excess, self.battery_capacity - self.battery_charge)
+            charge_amount = min(excess, self.battery_capacity - battery_charge)
             # Ensure battery charge never exceeds capacity
-            self.battery_charge = min(self.battery_capacity, self.battery_charge + charge_amount)
+            battery_charge = min(self.battery_capacity, battery_charge + charge_amount)
         
         metrics = {
             'total_power': power_needed,
             'solar_available': round(solar_available, 3),
             'battery_available': round(battery_available, 3),
-            'battery_charge': round(self.battery_charge, 2),
-            'battery_percentage': round((self.battery_charge / self.battery_capacity) * 100, 1),
+            'battery_charge': round(battery_charge, 2),
+            'battery_percentage': round((battery_charge / self.battery_capacity) * 100, 1),
             'cost': round(total_cost, 2),
             'carbon': round(total_carbon, 1),
             'primary_source': allocation[0][0] if allocation else 'grid'
         }
         
-        return allocation, metrics
+        return allocation, metrics, dict(state, battery_charge=battery_charge)
     
     def get_recommendation(self, allocation: List[Tuple[str, float]], 
                           metrics: Dict, conditions: Dict) -> str:
@@ -249,63 +283,68 @@ class SimpleAIService:
     Main AI Service combining forecasting and optimization
     """
     
+    MODEL_VERSION = 'statistical-v1'
+    
     def __init__(self):
         self.forecaster = SimpleEnergyForecaster()
         self.optimizer = SimpleSourceOptimizer()
+        self.forecast_cache = ForecastCache(self.MODEL_VERSION)
+        self.conditions_provider = ConditionsProvider()
+        self.state_store = OptimizerStateStore('simple')
         self.models_loaded = True  # Always ready
     
     def is_available(self) -> bool:
         return True
     
+    def model_files(self) -> List[str]:
+        """Files the service was loaded from (none for the rule-based service)"""
+        return []
+    
+    def warmup(self):
+        """Exercise the forecast and optimizer paths once before serving traffic"""
+        self.forecaster.forecast(1)
+        self.optimizer.calculate_solar_available(2000, 12)
+    
+    def _optimize(self, power_kw: float, conditions: Dict) -> Tuple[List[Tuple[str, float]], Dict]:
+        """
+        Run the optimizer against the shared battery state.
+        The read-optimize-write cycle is one optimistic transaction on the
+        cache, so concurrent requests in any worker see a consistent battery.
+        """
+        def step(state):
+            allocation, metrics, new_state = self.optimizer.optimize(state, power_kw, conditions)
+            return (allocation, metrics), new_state
+        
+        return self.state_store.update(
+            step, default={'battery_charge': self.optimizer.battery_charge}
+        )
+    
     def get_conditions(self) -> Dict:
-        """Get current conditions from database"""
+        """Get current conditions (Hot Path cache, then database)"""
         return self._read_from_database()
     
     def _read_from_database(self) -> Dict:
-        """Read conditions from Django database"""
-        from ..models import SensorReading, GridData
-        
-        conditions = self._get_defaults()
-        conditions['source'] = 'database'
-        
-        try:
-            # Get latest sensor readings
-            for sensor_type in ['temperature', 'humidity', 'ldr', 'current', 'voltage']:
-                reading = SensorReading.objects.filter(
-                    sensor_type=sensor_type
-                ).order_by('-timestamp').first()
-                if reading:
-                    conditions[sensor_type] = float(reading.value)
-            
-            # Get latest carbon intensity
-            carbon = GridData.objects.filter(
-                data_type='carbon_intensity'
-            ).order_by('-timestamp').first()
-            if carbon:
-                conditions['carbon_intensity'] = float(carbon.value)
-        except Exception as e:
-            print(f"Database read error: {e}")
-        
-        return conditions
-    
-    def _get_defaults(self) -> Dict:
-        """Default conditions when all else fails"""
-        return {
-            'hour': timezone.now().hour,
-            'temperature': 25.0,
-            'humidity': 50.0,
-            'ldr': 2000,
-            'current': 1.0,
-            'voltage': 230.0,
-            'carbon_intensity': 450,
-            'grid_price': 6.0,
-            'source': 'defaults'
-        }
+        """
+        Read conditions from the Hot Path cache, falling back to the
+        Django database for anything missing
+        """
+        return self.conditions_provider.get_conditions()
     
     def forecast_demand(self, hours_ahead: int = 6) -> Dict:
-        """Forecast energy demand"""
-        predictions = self.forecaster.forecast(hours_ahead)
-        peak_info = self.forecaster.identify_peak_hours(hours_ahead)
+        """
+        Forecast energy demand
+        
+        The full FORECAST_MAX_HORIZON is computed once per hour and cached;
+        each caller gets a slice of it.
+        """
+        max_horizon = max(hours_ahead, settings.FORECAST_MAX_HORIZON)
+        bucket = ForecastCache.hour_bucket()
+        full_forecast = self.forecast_cache.get_or_compute(
+            bucket, max_horizon, self.forecaster.fingerprint(),
+            lambda: self.forecaster.forecast(max_horizon, start=bucket)
+        )
+        predictions = full_forecast[:hours_ahead]
+        peak_info = self.forecaster.summarize_peaks(predictions)
         
         return {
             'timestamp': timezone.now().isoformat(),
@@ -318,6 +357,41 @@ class SimpleAIService:
             'model_type': 'statistical_pattern'
         }
     
+    def forecast_demand_batch(self, contexts: List[Dict], hours_ahead: int = 6) -> Dict:
+        """
+        Forecast demand for many sites / load profiles in one call
+        
+        Each context is {'id': ..., 'scale': float}, where scale is the
+        profile's demand relative to the typical household pattern. The
+        shared hourly forecast is computed once and scaled for every context.
+        """
+        import numpy as np
+        
+        base = self.forecast_demand(hours_ahead)['predictions']
+        base_kwh = np.array([p['predicted_kwh'] for p in base])
+        
+        scales = np.array([float(c.get('scale', 1.0)) for c in contexts])
+        demand = np.round(np.outer(scales, base_kwh), 3)
+        
+        forecasts = []
+        for index, context in enumerate(contexts):
+            forecasts.append({
+                'id': context.get('id', index),
+                'predictions': [
+                    {**p, 'predicted_kwh': float(kwh)}
+                    for p, kwh in zip(base, demand[index])
+                ],
+                'total_kwh': round(float(demand[index].sum()), 3)
+            })
+        
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'forecast_horizon': hours_ahead,
+            'forecasts': forecasts,
+            'available': True,
+            'model_type': 'statistical_pattern'
+        }
+    
     def recommend_source(self, load_name: str = "Default Load",
                         load_priority: int = 50,
                         load_power: float = 1000) -> Dict:
@@ -325,7 +399,7 @@ class SimpleAIService:
         conditions = self.get_conditions()
         power_kw = load_power / 1000.0
         
-        allocation, metrics = self.optimizer.optimize_source(power_kw, conditions)
+        allocation, metrics = self._optimize(power_kw, conditions)
         recommendation = self.optimizer.get_recommendation(allocation, metrics, conditions)
         
         return {
@@ -361,7 +435,7 @@ class SimpleAIService:
         next_hour_demand = forecast_result['predictions'][0]['predicted_kwh']
         
         # Optimize source allocation
-        allocation, metrics = self.optimizer.optimize_source(next_hour_demand, conditions)
+        allocation, metrics = self._optimize(next_hour_demand, conditions)
         recommendation = self.optimizer.get_recommendation(allocation, metrics, conditions)
         
         # Build decision
@@ -390,30 +464,22 @@ class SimpleAIService:
         return decision
     
     def _publish_decision(self, decision: Dict):
-        """Publish decision to MQTT for hardware"""
+        """Publish decision to MQTT for hardware and to ws/decisions/ clients"""
         try:
-            import paho.mqtt.publish as publish
-            
-            payload = {
-                'command': 'switch_source',
-                'source': decision['current_decision']['primary_source'],
-                'details': decision['current_decision'],
-                'timestamp': decision['timestamp']
-            }
-            
-            publish.single(
-                "HyperVolt/commands/control",
-                payload=json.dumps(payload),
-                hostname="localhost",
-                port=1883
-            )
-            print(f"✓ Published AI decision to MQTT: {payload['source']}")
+            from .decision_publisher import get_decision_publisher
+
+            source = decision['current_decision']['primary_source']
+            get_decision_publisher().publish_decision(decision, source)
+            print(f"✓ Published AI decision to MQTT: {source}")
         except Exception as e:
             print(f"MQTT publish failed (expected if broker not running): {e}")
     
     def get_status(self) -> Dict:
         """Get AI service status"""
         conditions = self.get_conditions()
+        battery_charge = self.state_store.get_battery_charge(
+            default=self.optimizer.battery_charge
+        )
         
         return {
             'available': True,
@@ -426,8 +492,8 @@ class SimpleAIService:
             },
             'current_conditions': conditions,
             'battery_status': {
-                'charge_kwh': self.optimizer.battery_charge,
-                'percentage': (self.optimizer.battery_charge / self.optimizer.battery_capacity) * 100,
+                'charge_kwh': battery_charge,
+                'percentage': (battery_charge / self.optimizer.battery_capacity) * 100,
                 'capacity': self.optimizer.battery_capacity
             },
             'solar_capacity': self.optimizer.solar_capacity,
@@ -0,0 +1,102 @@
+"""
+Live solar dust detection.
+
+Runs SolarDustPredictor.predict_batch() over the rolling feature rows that
+SolarFeatureStore keeps up to date on ingest, for every panel at once.
+Nothing is read from the database and no history is replayed.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+from django.utils import timezone
+
+from .ai_inference import AI_MODULE_PATH, AIInferenceService
+from .cache_manager import SolarFeatureStore
+
+logger = logging.getLogger(__name__)
+
+
+class SolarDustMonitor:
+    """
+    Scores the latest solar features of every panel with the dust model.
+
+    The model is loaded on first use from the AI models directory; its
+    type is read from solar_dust_config.json.
+    """
+
+    MODELS_DIR = AIInferenceService.AI_MODELS_DIR
+
+    def __init__(self, models_dir=None, feature_store=None):
+        self.models_dir = models_dir or self.MODELS_DIR
+        self.feature_store = feature_store or SolarFeatureStore()
+        self.predictor = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Load the trained predictor, or None if it is unavailable."""
+        if self.predictor is None:
+            with self._lock:
+                if self.predictor is None:
+                    if AI_MODULE_PATH not in sys.path:
+                        sys.path.insert(0, AI_MODULE_PATH)
+                    try:
+                        from train_solar_dust_model import SolarDustPredictor
+                        with open(os.path.join(self.models_dir, 'solar_dust_config.json')) as f:
+                            model_type = json.load(f)['model_type']
+                        predictor = SolarDustPredictor(model_type, models_dir=self.models_dir)
+                        if predictor.load_model():
+                            self.predictor = predictor
+                    except Exception as e:
+                        logger.error(f"Solar dust model unavailable: {e}")
+        return self.predictor
+
+    def is_available(self) -> bool:
+        return self._load() is not None
+
+    def predict(self, panel_ids: Optional[List[str]] = None) -> Dict:
+        """
+        Dust predictions for the given panels (default: every known panel).
+
+        Returns:
+            dict: 'timestamp', 'panels' (count) and 'predictions', a dict of
+            columns (panel_id, dust_percentage, is_shadow, urgency, action,
+            ..., feature_timestamp) with one entry per panel
+        """
+        predictor = self._load()
+        if predictor is None:
+            raise RuntimeError('Solar dust model not trained or not found')
+
+        import pandas as pd
+
+        rows = self.feature_store.get_features(panel_ids)
+        predictions = {}
+        if rows:
+            features = pd.DataFrame(rows)
+            batch = predictor.predict_batch(features, id_column='panel_id')
+            predictions = {column: values.tolist() for column, values in batch.items()}
+            predictions['power_volatility'] = features['power_volatility'].tolist()
+            predictions['feature_timestamp'] = features['timestamp'].tolist()
+
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'model_type': predictor.model_type,
+            'panels': len(rows),
+            'predictions': predictions,
+        }
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_dust_monitor() -> SolarDustMonitor:
+    """Process-wide SolarDustMonitor (the model is loaded once per worker)."""
+    global _monitor
+    if _monitor is None:
+        with _monitor_lock:
+            if _monitor is None:
+                _monitor = SolarDustMonitor()
+    return _monitor
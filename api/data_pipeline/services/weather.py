@@ -20,6 +20,37 @@ class WeatherService:
         self.lat = settings.LOCATION_LAT
         self.lon = settings.LOCATION_LON
 
+    def build_request(self):
+        """
+        URL, query parameters and headers of the current weather request.
+        """
+        url = f"{self.BASE_URL}/weather"
+        params = {
+            "lat": self.lat,
+            "lon": self.lon,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+        return url, params, {}
+
+    def parse_response(self, data):
+        """
+        Convert an OpenWeatherMap response to our weather record.
+        """
+        weather = data.get('weather', [{}])[0]
+        main = data.get('main', {})
+        clouds = data.get('clouds', {})
+        
+        return {
+            'temperature': main.get('temp'),
+            'humidity': main.get('humidity'),
+            'cloud_cover': clouds.get('all'),
+            'weather_condition': weather.get('main'),
+            'description': weather.get('description'),
+            'unit': 'metric',
+            'timestamp': datetime.now().isoformat(),
+        }
+
     def get_current_weather(self):
         """
         Fetch current weather data for the configured location.
@@ -32,31 +63,11 @@ class WeatherService:
             return None
 
         try:
-            url = f"{self.BASE_URL}/weather"
-            params = {
-                "lat": self.lat,
-                "lon": self.lon,
-                "appid": self.api_key,
-                "units": "metric"
-            }
-
-            response = requests.get(url, params=params, timeout=10)
+            url, params, headers = self.build_request()
+            response = requests.get(url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
 
-            data = response.json()
-            weather = data.get('weather', [{}])[0]
-            main = data.get('main', {})
-            clouds = data.get('clouds', {})
-            
-            return {
-                'temperature': main.get('temp'),
-                'humidity': main.get('humidity'),
-                'cloud_cover': clouds.get('all'),
-                'weather_condition': weather.get('main'),
-                'description': weather.get('description'),
-                'unit': 'metric',
-                'timestamp': datetime.now().isoformat(),
-            }
+            return self.parse_response(response.json())
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch weather data: {e}")
@@ -0,0 +1,22 @@
+"""
+Signal handlers that keep cached snapshots consistent with the database.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import EnergySource, GridData, UserPreferences, SensorReading
+from .services.cache_manager import ContextSnapshotCache
+
+
+@receiver([post_save, post_delete], sender=EnergySource)
+@receiver([post_save, post_delete], sender=GridData)
+@receiver([post_save, post_delete], sender=UserPreferences)
+def invalidate_optimizer_context(sender, **kwargs):
+    """Any change to the optimizer's inputs outdates the context snapshot."""
+    ContextSnapshotCache.invalidate()
+
+
+@receiver([post_save, post_delete], sender=SensorReading)
+def mark_optimizer_context_dirty(sender, **kwargs):
+    """Sensor readings arrive every few seconds; they outdate the snapshot debounced."""
+    ContextSnapshotCache.mark_sensor_dirty()
@@ -7,10 +7,94 @@ from django.utils import timezone
 
 from .models import GridData
 from .services import ElectricityMapsService, WeatherService
+from .services.conditions import set_grid_context
 
 logger = logging.getLogger(__name__)
 
 
+def _save_carbon_intensity(data):
+    """Store a carbon intensity record and publish it as the grid context."""
+    grid_data = GridData.objects.create(
+        data_type='carbon_intensity',
+        value=data['carbon_intensity'],
+        unit=data['unit'],
+        zone=data['zone'],
+        metadata={
+            'fossil_free_percentage': data.get('fossil_free_percentage'),
+            'renewable_percentage': data.get('renewable_percentage'),
+        },
+        timestamp=timezone.now()
+    )
+    
+    set_grid_context('carbon_intensity', grid_data.value, grid_data.metadata, grid_data.timestamp)
+    
+    logger.info(f"Saved carbon intensity: {grid_data}")
+    return grid_data
+
+
+def _save_weather(data):
+    """Store a weather record and publish it as the grid context."""
+    grid_data = GridData.objects.create(
+        data_type='weather',
+        value=data['temperature'],
+        unit='celsius',
+        metadata={
+            'humidity': data.get('humidity'),
+            'cloud_cover': data.get('cloud_cover'),
+            'weather_condition': data.get('weather_condition'),
+            'description': data.get('description'),
+        },
+        timestamp=timezone.now()
+    )
+    
+    set_grid_context('weather', grid_data.value, grid_data.metadata, grid_data.timestamp)
+    
+    logger.info(f"Saved weather data: {data['temperature']}°C, {data.get('description')}")
+    return grid_data
+
+
+def fetch_external_data():
+    """
+    Fetch carbon intensity and weather data concurrently.
+    One refresh takes as long as the slowest API rather than the sum of
+    both; this task replaces the separate carbon and weather schedules.
+    """
+    from .services.cache_manager import DecisionStore
+    from .services.external_data import refresh_external_data
+    
+    try:
+        carbon_service = ElectricityMapsService()
+        weather_service = WeatherService()
+        
+        data = refresh_external_data({
+            'carbon_intensity': carbon_service,
+            'weather': weather_service,
+        })
+        
+        # Fall back to mock data for sources without an API key or that failed
+        carbon = data['carbon_intensity']
+        if carbon is None:
+            logger.warning("Using mock carbon intensity data")
+            carbon = carbon_service.get_mock_carbon_intensity()
+        weather = data['weather']
+        if weather is None:
+            logger.warning("Using mock weather data")
+            weather = weather_service.get_mock_weather()
+        
+        _save_carbon_intensity(carbon)
+        _save_weather(weather)
+        
+        # New grid prices/carbon intensity: decide again without waiting
+        DecisionStore().request_refresh()
+        
+        return (f"Successfully fetched carbon intensity: {carbon['carbon_intensity']} {carbon['unit']}, "
+                f"weather: {weather['temperature']}°C")
+        
+    except Exception as e:
+        logger.error(f"Failed to fetch external data: {e}")
+        raise
+
+
 def fetch_carbon_intensity():
     """
     Fetch current carbon intensity from Electricity Maps API.
@@ -25,20 +109,7 @@ def fetch_carbon_intensity():
             logger.warning("Using mock carbon intensity data")
             data = service.get_mock_carbon_intensity()
         
-        # Save to database
-        grid_data = GridData.objects.create(
-            data_type='carbon_intensity',
-            value=data['carbon_intensity'],
-            unit=data['unit'],
-            zone=data['zone'],
-            metadata={
-                'fossil_free_percentage': data.get('fossil_free_percentage'),
-                'renewable_percentage': data.get('renewable_percentage'),
-            },
-            timestamp=timezone.now()
-        )
-        
-        logger.info(f"Saved carbon intensity: {grid_data}")
+        _save_carbon_intensity(data)
         return f"Successfully fetched carbon intensity: {data['carbon_intensity']} {data['unit']}"
         
     except Exception as e:
@@ -60,21 +131,7 @@ def fetch_weather_data():
             logger.warning("Using mock weather data")
             data = service.get_mock_weather()
         
-        # Save temperature
-        GridData.objects.create(
-            data_type='weather',
-            value=data['temperature'],
-            unit='celsius',
-            metadata={
-                'humidity': data.get('humidity'),
-                'cloud_cover': data.get('cloud_cover'),
-                'weather_condition': data.get('weather_condition'),
-                'description': data.get('description'),
-            },
-            timestamp=timezone.now()
-        )
-        
-        logger.info(f"Saved weather data: {data['temperature']}°C, {data.get('description')}")
+        _save_weather(data)
         return f"Successfully fetched weather: {data['temperature']}°C"
         
     except Exception as e:
@@ -108,3 +165,83 @@ def cleanup_old_data():
     except Exception as e:
         logger.error(f"Failed to cleanup old data: {e}")
         raise
+
+
+def compute_ai_decision():
+    """
+    Compute a new AI decision and store it as the latest result.
+    Runs in the ai_worker management command on a schedule or when new
+    data arrives; can also be enqueued with Django-Q (async_task).
+    
+    Returns:
+        dict: The stored entry ({'seq', 'computed_at', 'decision'})
+    """
+    from .models import AIDecision
+    from .services.ai_registry import get_ai_service
+    from .services.cache_manager import DecisionStore
+    
+    try:
+        result = get_ai_service().make_decision()
+        
+        # Record the decision
+        try:
+            AIDecision.objects.create(
+                decision_type='general',
+                timestamp=timezone.now(),
+                decision=result,
+                confidence=0.85,
+                applied=True,
+                reasoning=result.get('recommendation', '')
+            )
+        except Exception as e:
+            logger.warning(f"Could not record decision: {e}")
+        
+        entry = DecisionStore().save(result)
+        logger.info(f"Computed AI decision #{entry['seq']}")
+        return entry
+        
+    except Exception as e:
+        logger.error(f"Failed to compute AI decision: {e}")
+        raise
+
+
+def retrain_demand_model(job_id):
+    """
+    Fine-tune the demand model on data newer than its watermark.
+    Enqueued by POST /api/ai/retrain/ (async_task) so that training runs
+    in a Django-Q worker; progress is reported through RetrainingJobStore.
+    
+    Returns:
+        dict: The finished job
+    """
+    from datetime import timedelta
+    from django.conf import settings
+    from .services.ai_inference import AIInferenceService
+    from .services.cache_manager import RetrainingJobStore
+    
+    store = RetrainingJobStore()
+    if not store.acquire(job_id, settings.AI_RETRAIN_TIMEOUT):
+        return store.update(job_id, status='skipped', finished_at=timezone.now().isoformat(),
+                            message='Another retraining job is running')
+    
+    started_at = timezone.now()
+    # Django-Q kills the task at AI_RETRAIN_TIMEOUT without running the
+    # handlers below; the deadline lets readers mark such a job failed
+    deadline = started_at + timedelta(seconds=settings.AI_RETRAIN_TIMEOUT)
+    store.update(job_id, status='running', started_at=started_at.isoformat(),
+                 deadline=deadline.isoformat())
+    try:
+        result = AIInferenceService().retrain_incremental(
+            replay_days=settings.AI_RETRAIN_REPLAY_DAYS
+        )
+        job = store.update(job_id, status=result.pop('status'), result=result,
+                           finished_at=timezone.now().isoformat())
+        logger.info(f"Retraining job {job_id}: {job['status']}")
+        return job
+    
+    except Exception as e:
+        logger.error(f"Retraining job {job_id} failed: {e}")
+        return store.update(job_id, status='failed', error=str(e),
+                            finished_at=timezone.now().isoformat())
+    finally:
+        store.release(job_id)
@@ -1,3 +1,1519 @@
-from django.test import TestCase
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from data_pipeline.consumers import DecisionConsumer
+from data_pipeline.services.ai_registry import AIServiceRegistry
+from data_pipeline.services.cache_manager import DecisionStore, ForecastCache
+from data_pipeline.services.decision_publisher import DecisionPublisher
+from data_pipeline.services.simple_ai import SimpleAIService
+
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+}
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class DecisionStreamTests(TestCase):
+    """ws/decisions/ receives whatever the DecisionPublisher broadcasts."""
+
+    def test_broadcast_reaches_connected_client(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(DecisionConsumer.as_asgi(), '/ws/decisions/')
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            await get_channel_layer().group_send('ai_decisions', {
+                'type': 'decision_update',
+                'event': 'forecast_update',
+                'data': {'forecast_horizon': 6},
+            })
+            message = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return message
+
+        message = async_to_sync(scenario)()
+        self.assertEqual(message['type'], 'forecast_update')
+        self.assertEqual(message['data'], {'forecast_horizon': 6})
+
+    def test_publisher_broadcast_uses_decision_group(self):
+        async def scenario():
+            layer = get_channel_layer()
+            channel = await layer.new_channel()
+            await layer.group_add('ai_decisions', channel)
+            return layer, channel
+
+        layer, channel = async_to_sync(scenario)()
+        DecisionPublisher().broadcast('peak_hours_update', {'total_peak_hours': 3})
+        event = async_to_sync(layer.receive)(channel)
+
+        self.assertEqual(event['type'], 'decision_update')
+        self.assertEqual(event['event'], 'peak_hours_update')
+
+    def test_publisher_client_id_is_unique_per_process(self):
+        from unittest import mock
+
+        with mock.patch('paho.mqtt.client.Client') as client_class:
+            DecisionPublisher()._get_client()
+
+        client_id = client_class.call_args.kwargs['client_id']
+        self.assertEqual(client_id, f"{settings.MQTT_CLIENT_ID}_decisions_{os.getpid()}")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AIServiceRegistryTests(TestCase):
+    """The AI service is built once per process and shares battery state."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_registry_returns_same_service(self):
+        registry = AIServiceRegistry(backend='simple')
+        self.assertIs(registry.get_service(), registry.get_service())
+
+    def test_degraded_registry_switches_to_ml_once_models_appear(self):
+        from unittest import mock
+
+        models_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, models_dir)
+        model_path = os.path.join(models_dir, 'demand_forecaster.npz')
+
+        class FakeInferenceService:
+            @classmethod
+            def model_files(cls):
+                return [model_path]
+
+            def is_available(self):
+                return os.path.exists(model_path)
+
+            def warmup(self):
+                pass
+
+        with mock.patch('data_pipeline.services.ai_inference.AIInferenceService', FakeInferenceService):
+            registry = AIServiceRegistry(backend='ml', check_interval=0)
+            self.assertIsInstance(registry.get_service(), SimpleAIService)
+            self.assertTrue(registry.degraded)
+
+            with open(model_path, 'wb') as f:
+                f.write(b'weights')
+
+            self.assertIsInstance(registry.get_service(), FakeInferenceService)
+            self.assertFalse(registry.degraded)
+
+    def test_battery_charge_persists_across_service_instances(self):
+        conditions = {'hour': 18, 'ldr': 0, 'carbon_intensity': 600, 'grid_price': 8.0}
+
+        first = SimpleAIService()
+        _, metrics = first._optimize(1.0, conditions)
+
+        second = SimpleAIService()
+        _, metrics_after = second._optimize(1.0, conditions)
+
+        self.assertLess(metrics['battery_charge'], 7.0)
+        self.assertLess(metrics_after['battery_charge'], metrics['battery_charge'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ForecastCacheTests(TestCase):
+    """Forecasts are computed once per hour and shared across horizons."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_compute_runs_once_until_invalidated(self):
+        forecast_cache = ForecastCache('test')
+        bucket = ForecastCache.hour_bucket()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return [1.0, 2.0]
+
+        forecast_cache.get_or_compute(bucket, 2, 'abc', compute)
+        forecast_cache.get_or_compute(bucket, 2, 'abc', compute)
+        self.assertEqual(len(calls), 1)
+
+        ForecastCache.invalidate()
+        forecast_cache.get_or_compute(bucket, 2, 'abc', compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_horizons_are_slices_of_one_forecast(self):
+        import random
+        service = SimpleAIService()
+        state = random.getstate()
+
+        short = service.forecast_demand(6)
+        long = service.forecast_demand(24)
+
+        self.assertEqual(short['predictions'], long['predictions'][:6])
+        self.assertEqual(random.getstate(), state)
+
+
+    def test_ml_forecast_reused_within_the_hour(self):
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        from data_pipeline.models import SensorReading
+        from data_pipeline.services.ai_inference import AIInferenceService
+
+        bucket = ForecastCache.hour_bucket()
+        SensorReading.objects.bulk_create([
+            SensorReading(sensor_type=kind, sensor_id='s1', value=1 + h % 5,
+                          timestamp=bucket - timedelta(hours=h, minutes=-10))
+            for h in range(1, 26) for kind in ('current', 'temperature')
+        ])
+        service = AIInferenceService.__new__(AIInferenceService)
+        service.ai, service.models_loaded = object(), True
+        service.forecast_cache = ForecastCache('ml-test')
+        service.forecaster = mock.Mock(forecast_horizon=6)
+        service.forecaster.predict.return_value = [1.0] * 6
+
+        first = service.forecast_demand(6)
+        SensorReading.objects.create(sensor_type='current', sensor_id='s1', value=9,
+                                     timestamp=min(timezone.now(), bucket + timedelta(minutes=59)))
+        second = service.forecast_demand(6)
+
+        self.assertTrue(first['available'])
+        self.assertEqual(first['predictions'], second['predictions'])
+        service.forecaster.predict.assert_called_once()
+        window = service.forecaster.predict.call_args[0][0]
+        self.assertEqual(len(window), 24)
+        self.assertLess(window['hour_key'].max(), bucket)
+
+AI_MODELS_DIR = os.path.join(settings.BASE_DIR, '..', 'ai', 'models')
+AI_MODULE_PATH = os.path.join(settings.BASE_DIR, '..', 'ai', 'module3-ai')
+
+
+def setUpModule():
+    """Make the AI module (ai/module3-ai) importable for every test in this file."""
+    if AI_MODULE_PATH not in sys.path:
+        sys.path.insert(0, AI_MODULE_PATH)
+
+
+def export_demand_weights(test):
+    """Export the trained Keras demand model to a temporary .npz file."""
+    from numpy_forecaster import export_weights
+
+    weights_dir = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, weights_dir)
+    return export_weights(
+        os.path.join(AI_MODELS_DIR, 'demand_forecaster.h5'),
+        os.path.join(AI_MODELS_DIR, 'demand_forecaster_scalers.pkl'),
+        os.path.join(AI_MODELS_DIR, 'demand_forecaster_config.json'),
+        os.path.join(weights_dir, 'demand_forecaster.npz'),
+    )
+
+
+class NumpyForecasterTests(TestCase):
+    """The exported NumPy forecaster matches Keras and needs no TensorFlow."""
+
+    def setUp(self):
+        from numpy_forecaster import NumpyDemandForecaster
+        self.forecaster = NumpyDemandForecaster(export_demand_weights(self))
+        self.assertTrue(self.forecaster.load_model())
+
+    @unittest.skipUnless(importlib.util.find_spec('tensorflow'), 'TensorFlow not installed')
+    def test_matches_keras_outputs(self):
+        from tensorflow import keras
+        model = keras.models.load_model(
+            os.path.join(AI_MODELS_DIR, 'demand_forecaster.h5'), compile=False
+        )
+        windows = np.random.default_rng(0).uniform(
+            0, 1, (8, self.forecaster.lookback_hours, len(self.forecaster.feature_columns))
+        )
+
+        expected = model.predict(windows, verbose=0)
+        np.testing.assert_allclose(self.forecaster.forward(windows), expected, atol=1e-5)
+
+    def test_inference_service_does_not_import_tensorflow(self):
+        script = (
+            "import sys, django; django.setup(); "
+            "from data_pipeline.services.ai_inference import AIInferenceService; "
+            "service = AIInferenceService(); service.warmup(); "
+            "print(service.is_available(), 'tensorflow' in sys.modules)"
+        )
+        weights_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, weights_dir)
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='hypervolt_backend.settings',
+                   AI_WEIGHTS_DIR=weights_dir)
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(result.stdout.strip().splitlines()[-1], 'True False')
+        # The weights are exported on load, outside the source tree
+        self.assertTrue(os.path.exists(os.path.join(weights_dir, 'demand_forecaster.npz')))
+
+
+@unittest.skipUnless(importlib.util.find_spec('tensorflow'), 'TensorFlow not installed')
+class DemandDatasetTests(TestCase):
+    """Training windows are views, and the streamed pipeline matches them."""
+
+    def setUp(self):
+        # The forecaster creates models/ in the working directory
+        cwd = os.getcwd()
+        tmp = tempfile.TemporaryDirectory()
+        os.chdir(tmp.name)
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_windows_match_loop_without_copying(self):
+        import pandas as pd
+        from train_demand_model import EnergyDemandForecaster, WindowSequence
+
+        forecaster = EnergyDemandForecaster(lookback_hours=24, forecast_horizon=6)
+        columns = ['total_energy_kwh', 'temperature', 'hour']
+        df = pd.DataFrame(np.random.default_rng(0).uniform(0, 5, (200, 3)), columns=columns)
+
+        X, y = forecaster.prepare_data(df)
+
+        data = df[columns].values
+        scaled = forecaster.scaler_X.transform(data)
+        expected_X = np.array([scaled[i - 24:i] for i in range(24, 200 - 6)])
+        expected_y = np.array([data[i:i + 6, 0] for i in range(24, 200 - 6)])
+        np.testing.assert_allclose(X, expected_X, atol=1e-6)
+        np.testing.assert_allclose(forecaster.scaler_y.inverse_transform(y), expected_y)
+        self.assertFalse(X.flags.owndata)
+
+        batch_X, batch_y = WindowSequence(X, y, batch_size=64)[2]
+        self.assertEqual(batch_X.shape, (len(X) - 128, 24, 3))
+        np.testing.assert_array_equal(batch_y, y[128:])
+
+    def test_streaming_matches_in_memory(self):
+        import pandas as pd
+        from train_demand_model import EnergyDemandForecaster
+
+        columns = ['timestamp', 'total_energy_kwh', 'temperature', 'hour']
+        df = pd.DataFrame(np.random.default_rng(1).uniform(0, 5, (300, 4)), columns=columns)
+        df['timestamp'] = pd.date_range('2026-01-01', periods=300, freq='h')
+        df.to_csv('history.csv', index=False)
+
+        in_memory = EnergyDemandForecaster()
+        X, y = in_memory.prepare_data(df)
+
+        streamed = EnergyDemandForecaster()
+        summary = streamed.fit_scalers_streaming('history.csv', chunksize=37)
+        batches = list(streamed.stream_batches('history.csv', batch_size=16, start=5, stop=250, chunksize=37))
+
+        self.assertEqual((summary['records'], summary['samples']), (300, len(X)))
+        np.testing.assert_allclose(streamed.scaler_X.data_max_, in_memory.scaler_X.data_max_)
+        np.testing.assert_allclose(streamed.scaler_y.data_min_, in_memory.scaler_y.data_min_)
+        self.assertTrue(all(len(b[0]) == 16 for b in batches[:-1]))
+        np.testing.assert_allclose(np.concatenate([b[0] for b in batches]), X[5:250], atol=1e-6)
+        np.testing.assert_allclose(np.concatenate([b[1] for b in batches]), y[5:250], atol=1e-6)
+
+
+class HyperparameterSearchTests(TestCase):
+    """Dust/demand tuning: time-ordered scoring, pruning and saved artifacts."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output_dir = tmp.name
+
+    def test_dust_search(self):
+        import pandas as pd
+        from hyperparameter_search import run_search
+
+        rng = np.random.default_rng(0)
+        n = 400
+        df = pd.DataFrame({
+            'hour': np.tile(np.arange(6, 18), n // 12 + 1)[:n],
+            'days_since_cleaning': np.linspace(0, 30, n),
+            'solar_irradiance': rng.uniform(0.2, 1.0, n),
+            'temperature_c': rng.uniform(20, 35, n),
+            'ldr_lux': rng.uniform(100, 1000, n),
+            'expected_power_kw': rng.uniform(0.5, 2.0, n),
+            'actual_power_kw': rng.uniform(0.5, 2.0, n),
+        })
+        df['efficiency_ratio'] = 1 - df['days_since_cleaning'] / 60
+        df['dust_percentage'] = df['days_since_cleaning'] * 2 + rng.normal(0, 0.5, n)
+        space = {'model_type': ['random_forest'], 'n_estimators': [10], 'max_depth': [6, 1]}
+
+        result = run_search('dust', df, space=space, n_splits=3, max_workers=1,
+                            prune_factor=1.2, output_dir=self.output_dir)
+
+        best, pruned = result['leaderboard']
+        self.assertEqual((best['status'], best['params']['max_depth']), ('completed', 6))
+        self.assertEqual(len(best['fold_mae']), 3)
+        self.assertEqual((pruned['status'], len(pruned['fold_mae'])), ('pruned', 1))
+        self.assertTrue(os.path.exists(os.path.join(result['paths']['best_model'], 'solar_dust_random_forest.pkl')))
+        leaderboard = pd.read_csv(result['paths']['csv'])
+        self.assertEqual(list(leaderboard['status']), ['completed', 'pruned'])
+
+    @unittest.skipUnless(importlib.util.find_spec('tensorflow'), 'TensorFlow not installed')
+    def test_demand_scalers_fit_on_training_fold_only(self):
+        import pandas as pd
+        from hyperparameter_search import _demand_fold_windows, _folds
+        from train_demand_model import EnergyDemandForecaster
+
+        n = 200
+        df = pd.DataFrame({'total_energy_kwh': np.linspace(1, 5, n), 'temperature': np.linspace(10, 40, n)})
+        forecaster = EnergyDemandForecaster(models_dir=self.output_dir, lookback_hours=12, forecast_horizon=6)
+        n_windows = len(forecaster.prepare_data(df)[0])
+        data = df[forecaster.feature_columns].to_numpy(dtype=float)
+
+        train, val = next(_folds(n_windows, 3, gap=6 - 1))
+        # The last training target row comes before the first validation target row
+        self.assertLess(train.stop - 1 + 12 + 6 - 1, val.start + 12)
+        _, y = _demand_fold_windows(forecaster, data, n_windows, train)
+        # Rising series: the fold's scaler tops out where its training windows end
+        end = train.stop - 1 + 12 + 6  # rows read by the training windows
+        self.assertEqual(forecaster.scaler_X.data_max_.tolist(), data[end - 1].tolist())
+        self.assertLess(forecaster.scaler_X.data_max_[0], data[:, 0].max())
+        self.assertEqual(forecaster.scaler_y.data_max_.tolist(), data[end - 6:end, 0].tolist())
+        # Validation targets lie above the training range instead of being squeezed into it
+        self.assertGreater(y[val].max(), 1.0)
+
+    def test_pruning_compares_the_same_folds(self):
+        import multiprocessing
+        import hyperparameter_search
+        from hyperparameter_search import _pruned, _report
+
+        self.addCleanup(hyperparameter_search._worker.clear)
+        hyperparameter_search._worker['best'] = multiprocessing.Array('d', [float('inf')] * 3)
+        self.assertFalse(_pruned([5.0], 1.2))
+
+        _report([1.0, 4.0, 4.0])
+        _report([3.0, 3.0, 3.5])  # worse mean, not kept
+        self.assertEqual(hyperparameter_search._worker['best'][:], [1.0, 4.0, 4.0])
+        # 2.0 on fold 0 is within 1.2x of the best overall mean (3.0) but not of its fold 0
+        self.assertTrue(_pruned([2.0], 1.2))
+        self.assertFalse(_pruned([2.0, 3.0], 1.2))
+
+    def test_dust_training_holds_out_latest_readings(self):
+        import pandas as pd
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        from train_solar_dust_model import SolarDustPredictor
+
+        n = 500
+        days = np.linspace(0, 30, n)
+        df = pd.DataFrame({
+            'timestamp': pd.date_range('2026-01-01', periods=n, freq='5min'),
+            'hour': 12, 'days_since_cleaning': days, 'solar_irradiance': 0.8,
+            'temperature_c': 30.0, 'ldr_lux': 800.0, 'expected_power_kw': 1.6,
+            'actual_power_kw': 1.6 - days / 30, 'efficiency_ratio': 1 - days / 60,
+            'dust_percentage': days * 2,
+        }).sample(frac=1, random_state=0)
+
+        predictor = SolarDustPredictor('hist_gradient_boosting', models_dir=self.output_dir, n_jobs=1)
+        metrics = predictor.train(df, test_size=0.2)
+
+        self.assertIsInstance(predictor.model, HistGradientBoostingRegressor)
+        self.assertEqual((metrics['training_samples'], metrics['test_samples']), (400, 100))
+        # Trees cannot extrapolate past the dust levels seen in training
+        self.assertGreater(metrics['test']['mae'], 5.0)
+
+
+class SolarDustDataTests(TestCase):
+    """The vectorized dataset generator is seeded and follows the cleaning schedule."""
+
+    def test_generator_is_reproducible_and_resets_on_cleaning(self):
+        import pandas as pd
+        from generate_solar_dust_data import SolarDustDataGenerator
+
+        first = SolarDustDataGenerator(seed=11).generate_solar_dust_dataset(rows=20000)
+        second = SolarDustDataGenerator(seed=11).generate_solar_dust_dataset(rows=20000)
+
+        self.assertEqual(len(first), 20000)
+        np.testing.assert_array_equal(first['actual_power_kw'], second['actual_power_kw'])
+        np.testing.assert_array_equal(first['timestamp'], second['timestamp'])
+        shifted = SolarDustDataGenerator(seed=11).generate_solar_dust_dataset(rows=20000, start='2025-06-01')
+        self.assertEqual(shifted['timestamp'].iloc[-1] - first['timestamp'].iloc[-1],
+                         pd.Timestamp('2025-06-01') - pd.Timestamp('2026-01-01'))
+        self.assertTrue(first['hour'].between(6, 17).all())
+        days = first['days_since_cleaning'].to_numpy()
+        resets = np.flatnonzero(np.diff(days) < 0) + 1
+        self.assertTrue(np.all((days[resets - 1] >= 10 - 1e-9) & (days[resets - 1] <= 15)))
+        self.assertTrue(np.all(days[resets] < 1 / 144 + 1e-9))
+
+
+class PartitionedDataTests(TestCase):
+    """Chunked per-site generation is reproducible and integrates every hour."""
+
+    def setUp(self):
+        cwd = os.getcwd()
+        tmp = tempfile.TemporaryDirectory()
+        os.chdir(tmp.name)
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_process_pool_matches_serial(self):
+        import pandas as pd
+        from collect_all_data import MasterDataCollector, read_partitioned
+
+        collector = MasterDataCollector(days=5)
+        summary = collector.collect_partitioned(sites=2, chunk_days=2, max_workers=1,
+                                                output_dir='serial', fmt='csv')
+        collector.collect_partitioned(sites=2, chunk_days=2, max_workers=2,
+                                      output_dir='pooled', fmt='csv')
+
+        serial = read_partitioned('serial')
+        self.assertEqual(summary['partitions'], 6)
+        self.assertEqual(summary['rows']['integrated'], 2 * 5 * 24)
+        self.assertEqual(summary['rows']['sensor'], 2 * 5 * 24 * 12)
+        self.assertFalse(serial.isna().any().any())
+        for _, site in serial.groupby('site_id'):
+            self.assertTrue((site['timestamp'].diff().dropna() == np.timedelta64(1, 'h')).all())
+        pd.testing.assert_frame_equal(serial, read_partitioned('pooled'))
+
+
+class SolarDustBatchTests(TestCase):
+    """Fleet-wide dust prediction in one call matches the per-row predict() logic."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.models_dir = tmp.name
+
+    def _train(self, n=300):
+        import pandas as pd
+        from train_solar_dust_model import SolarDustPredictor
+
+        rng = np.random.default_rng(3)
+        fleet = pd.DataFrame({
+            'panel_id': [f'string-{i}' for i in range(n)],
+            'hour': 12, 'days_since_cleaning': rng.uniform(0, 40, n),
+            'solar_irradiance': 0.8, 'temperature_c': 30.0, 'ldr_lux': 800.0,
+            'expected_power_kw': rng.uniform(1.0, 2.0, n), 'actual_power_kw': 1.2,
+            'efficiency_ratio': rng.uniform(0.5, 1.0, n),
+        })
+        fleet['dust_percentage'] = fleet['days_since_cleaning'] * 2
+        predictor = SolarDustPredictor(params={'n_estimators': 10}, models_dir=self.models_dir, n_jobs=1)
+        predictor.train(fleet.copy())
+        fleet['efficiency_volatility'] = rng.uniform(0, 0.1, n)
+        return predictor, fleet
+
+    @staticmethod
+    def _predict_row(predictor, row):
+        """Per-row prediction as predict() computed it before predict_batch() existed."""
+        data = row.copy()
+        for column in ('power_volatility', 'efficiency_volatility'):
+            if column not in data.columns:
+                data[column] = 0.0
+        dust = predictor.model.predict(predictor.scaler.transform(data[predictor.feature_columns].values))[0]
+        is_shadow = data['efficiency_volatility'].values[0] > 0.05
+        if is_shadow:
+            return {'dust_percentage': dust, 'is_shadow': True, 'needs_cleaning': False,
+                    'urgency': 'None', 'potential_revenue_gain_per_hour': 0.0}
+        return {
+            'dust_percentage': dust, 'is_shadow': False, 'needs_cleaning': dust > 40,
+            'urgency': 'High' if dust > 60 else 'Medium' if dust > 40 else 'Low',
+            'potential_revenue_gain_per_hour': data['expected_power_kw'].values[0] * dust * 0.007 * 6,
+        }
+
+    def test_batch_matches_single_predictions(self):
+        predictor, fleet = self._train()
+        n = len(fleet)
+
+        batch = predictor.predict_batch(fleet, id_column='panel_id')
+
+        self.assertEqual(list(batch['panel_id']), list(fleet['panel_id']))
+        self.assertTrue(all(len(values) == n for values in batch.values()))
+        self.assertTrue({'none', 'monitor', 'schedule', 'clean_now'} >= set(batch['action']))
+        for i in range(0, n, 7):
+            expected = self._predict_row(predictor, fleet.iloc[[i]])
+            for column, value in expected.items():
+                self.assertAlmostEqual(batch[column][i], value, msg=f'{column} of row {i}')
+        self.assertFalse(batch['needs_cleaning'][batch['is_shadow']].any())
+        self.assertTrue(batch['is_shadow'].any() and batch['needs_cleaning'].any())
+
+    def test_missing_features_raise_except_volatility(self):
+        predictor, fleet = self._train(n=50)
+        fleet = fleet.drop(columns=['efficiency_volatility'])
+
+        batch = predictor.predict_batch(fleet)
+        self.assertFalse(batch['is_shadow'].any())
+        self.assertAlmostEqual(batch['dust_percentage'][0],
+                               self._predict_row(predictor, fleet.iloc[[0]])['dust_percentage'])
+
+        with self.assertRaisesRegex(ValueError, 'days_since_cleaning, hour'):
+            predictor.predict_batch(fleet.drop(columns=['days_since_cleaning', 'hour']))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ForecastBatchTests(TestCase):
+    """Many load profiles are forecast in one request and one computation."""
+
+    def test_forecast_batch_scales_shared_forecast(self):
+        response = self.client.post(
+            '/api/ai/forecast_batch/',
+            {'hours': 4, 'contexts': [{'id': 'house'}, {'id': 'kitchen', 'scale': 0.5}]},
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        house, kitchen = response.json()['forecasts']
+        self.assertEqual(len(house['predictions']), 4)
+        for full, half in zip(house['predictions'], kitchen['predictions']):
+            self.assertAlmostEqual(half['predicted_kwh'], full['predicted_kwh'] * 0.5, places=2)
+
+    def test_forecast_batch_requires_contexts(self):
+        response = self.client.post('/api/ai/forecast_batch/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_numpy_predict_batch_matches_single_predictions(self):
+        import pandas as pd
+        from numpy_forecaster import NumpyDemandForecaster
+        forecaster = NumpyDemandForecaster(export_demand_weights(self))
+        forecaster.load_model()
+        rng = np.random.default_rng(1)
+        windows = [
+            pd.DataFrame(rng.uniform(0, 30, (24, 11)), columns=forecaster.feature_columns)
+            for _ in range(5)
+        ]
+
+        batched = forecaster.predict_batch(windows)
+        single = np.stack([forecaster.predict(window) for window in windows])
+        np.testing.assert_allclose(batched, single, atol=1e-5)
+
+
+class StartupImportTests(TestCase):
+    """Loading the API must not pull in the ML stack."""
+
+    def test_startup_does_not_import_heavy_modules(self):
+        path = os.path.join(settings.BASE_DIR, 'scripts', 'benchmark_startup.py')
+        spec = importlib.util.spec_from_file_location('benchmark_startup', path)
+        benchmark = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(benchmark)
+
+        modules = benchmark.measure_imports()
+        total_ms = sum(self_us for self_us, _ in modules.values()) / 1000.0
+
+        self.assertIn('data_pipeline.services.ai_registry', modules)
+        self.assertNotIn('tensorflow', modules)
+        self.assertNotIn('keras', modules)
+        self.assertEqual(benchmark.heavy_imports(modules), [])
+        # TensorFlow alone takes several seconds to import
+        self.assertLess(total_ms, benchmark.DEFAULT_BUDGET_MS)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class DecisionWorkerTests(TestCase):
+    """/ai/decide/ serves the decision stored by the inference worker."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_latest_is_404_before_first_decision(self):
+        response = self.client.get('/api/ai/latest/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_worker_once_stores_decision_served_by_decide(self):
+        from django.core.management import call_command
+        from io import StringIO
+        call_command('ai_worker', '--once', stdout=StringIO())
+
+        entry = DecisionStore().get_latest()
+        self.assertIsNotNone(entry)
+
+        response = self.client.post('/api/ai/decide/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['decision_seq'], entry['seq'])
+
+        latest = self.client.get('/api/ai/latest/')
+        self.assertEqual(latest.json()['decision_seq'], entry['seq'])
+
+    def test_fresh_without_worker_computes_inline(self):
+        first = self.client.post('/api/ai/decide/').json()
+        second = self.client.post('/api/ai/decide/?fresh=1').json()
+        self.assertGreater(second['decision_seq'], first['decision_seq'])
+
+
+    def test_listener_requests_decisions_on_material_changes_only(self):
+        from io import StringIO
+        from types import SimpleNamespace
+        from data_pipeline.management.commands.mqtt_listener import Command
+
+        listener = Command()
+        listener.stdout = StringIO()
+        store = DecisionStore()
+
+        def receive(value, sensor_type='temperature', minute=0):
+            payload = {'sensor_type': sensor_type, 'sensor_id': f'{sensor_type}_1', 'value': value,
+                       'unit': 'raw', 'location': 'lab', 'timestamp': f'2026-03-01T06:{minute:02d}:00Z'}
+            listener.on_message(None, None, SimpleNamespace(topic='t', payload=json.dumps(payload).encode()))
+            return store.pop_refresh_request()
+
+        self.assertTrue(receive(30.0))  # first reading of the hour
+        self.assertFalse(receive(30.5, minute=1))
+        self.assertFalse(receive(33.0, minute=2))
+        self.assertTrue(receive(40.0, minute=3))  # more than 20% above 30.0
+        self.assertTrue(receive(500, 'ldr', minute=4))  # first reading of this type
+        self.assertFalse(receive(520, 'ldr', minute=5))
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionsProviderTests(TestCase):
+    """Conditions come from the Hot Path and fall back to the database."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_hot_path_read_needs_no_queries(self):
+        from django.utils import timezone
+        from data_pipeline.services.cache_manager import SensorBufferManager
+        from data_pipeline.services.conditions import ConditionsProvider, set_grid_context
+
+        buffers = SensorBufferManager()
+        for sensor_type, value in [('temperature', 31.0), ('humidity', 60.0), ('ldr', 3000),
+                                   ('current', 2.0), ('voltage', 229.0)]:
+            buffers.add_reading(sensor_type, 'esp32_001', value, timezone.now().isoformat())
+        set_grid_context('carbon_intensity', 520.0, {'grid_price': 7.5})
+        set_grid_context('weather', 31.0, {'cloud_cover': 20})
+
+        with self.assertNumQueries(0):
+            conditions = ConditionsProvider().get_conditions()
+
+        self.assertEqual(conditions['source'], 'hot_path')
+        self.assertEqual(conditions['temperature'], 31.0)
+        self.assertEqual(conditions['grid_price'], 7.5)
+        self.assertFalse(conditions['staleness']['ldr']['stale'])
+
+    def test_database_fallback_backfills_cache_and_reports_staleness(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from data_pipeline.models import SensorReading
+        from data_pipeline.services.conditions import ConditionsProvider
+
+        SensorReading.objects.create(
+            sensor_type='temperature', sensor_id='esp32_001', value=27.0, unit='celsius',
+            timestamp=timezone.now() - timedelta(hours=1)
+        )
+
+        provider = ConditionsProvider()
+        conditions = provider.get_conditions()
+        self.assertEqual(conditions['temperature'], 27.0)
+        self.assertEqual(conditions['staleness']['temperature']['source'], 'database')
+        self.assertTrue(conditions['staleness']['temperature']['stale'])
+        self.assertEqual(conditions['staleness']['humidity']['source'], 'default')
+
+        conditions = provider.get_conditions()
+        self.assertEqual(conditions['staleness']['temperature']['source'], 'cache')
+
+    def test_stale_hot_path_entries_recheck_database_and_misses_are_cached(self):
+        from datetime import timedelta
+        from django.core.cache import cache
+        from django.utils import timezone
+        from data_pipeline.models import SensorReading
+        from data_pipeline.services.cache_manager import SensorBufferManager
+        from data_pipeline.services.conditions import ConditionsProvider
+
+        # An old MQTT value on the hot path, and a newer REST reading that only reached the DB
+        SensorBufferManager().add_reading('temperature', 'esp32_001', 20.0,
+                                          (timezone.now() - timedelta(hours=2)).isoformat())
+        SensorReading.objects.create(
+            sensor_type='temperature', sensor_id='esp32_001', value=29.0, unit='celsius',
+            timestamp=timezone.now()
+        )
+
+        provider = ConditionsProvider()
+        conditions = provider.get_conditions()
+        self.assertEqual(conditions['temperature'], 29.0)
+        self.assertEqual(conditions['staleness']['temperature']['source'], 'database')
+        self.assertFalse(conditions['staleness']['temperature']['stale'])
+
+        # Fields without rows ('ldr', ...) are not looked up again until the recheck marker expires
+        with self.assertNumQueries(0):
+            conditions = provider.get_conditions()
+        self.assertEqual(conditions['staleness']['temperature']['source'], 'cache')
+        self.assertEqual(conditions['staleness']['ldr']['source'], 'default')
+
+        cache.delete(provider._checked_key('ldr'))
+        with self.assertNumQueries(1):
+            provider.get_conditions()
+
+
+class VectorizedSimulationTests(TestCase):
+    """SourceOptimizer.simulate matches the hour-by-hour simulate_day exactly."""
+
+    def test_simulate_matches_simulate_day(self):
+        import pandas as pd
+        from optimize_sources import SourceOptimizer
+
+        rng = np.random.default_rng(0)
+        hours = 24 * 7
+        df = pd.DataFrame({
+            'timestamp': pd.date_range('2026-01-01', periods=hours, freq='h'),
+            'hour': np.arange(hours) % 24,
+            'total_energy_kwh': rng.uniform(0, 4, hours),
+            'shortwave_radiation': rng.uniform(0, 1000, hours),
+            'cloud_cover': rng.uniform(0, 100, hours),
+            'carbon_intensity': rng.uniform(200, 800, hours),
+            'grid_price_per_kwh': rng.uniform(2, 15, hours),
+        })
+
+        scalar, vectorized = SourceOptimizer(), SourceOptimizer()
+        expected = scalar.simulate_day(df)
+        actual = vectorized.simulate(df)
+
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_exact=True)
+        self.assertEqual(vectorized.battery_current_charge, scalar.battery_current_charge)
+
+
+class BatteryPlannerTests(TestCase):
+    """The horizon planner holds charge for a coming price peak."""
+
+    def setUp(self):
+        from battery_planner import BatteryPlanner
+
+        self.planner = BatteryPlanner()
+        hours = np.arange(48) % 24
+        self.demand = np.full(48, 1.5)
+        self.price = np.where((hours >= 18) & (hours <= 22), 12.0, 5.0)
+        self.carbon = np.full(48, 500.0)
+        self.solar = np.where((hours >= 9) & (hours < 15), 2.5, 0.0)
+
+    def test_plan_beats_greedy_before_peak(self):
+        plan = self.planner.plan(self.demand, self.price, self.carbon, self.solar, 5.0)
+        greedy = self.planner.greedy_plan(self.demand, self.price, self.carbon, self.solar, 5.0)
+
+        self.assertLess(plan['objective'], greedy['objective'])
+        # Charge is still available when the evening peak starts
+        self.assertGreater(plan['soc'][18], greedy['soc'][18])
+        self.assertTrue(np.all(plan['soc'] >= 0.0))
+        self.assertTrue(np.all(plan['discharge'] <= self.planner.max_discharge + 1e-9))
+        np.testing.assert_allclose(
+            plan['grid'] + plan['solar_used'] + plan['discharge'] - plan['charge_from_grid'],
+            self.demand
+        )
+
+    def test_48_hour_plan_is_fast(self):
+        import time
+
+        self.planner.plan(self.demand, self.price, self.carbon, self.solar, 5.0)
+        start = time.perf_counter()
+        self.planner.plan(self.demand, self.price, self.carbon, self.solar, 5.0)
+        self.assertLess(time.perf_counter() - start, 0.05)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_api_plan_discharges_in_evening_peak(self):
+        from django.core.cache import cache
+        from optimize_sources import SourceOptimizer
+        from data_pipeline.services.ai_inference import AIInferenceService
+        from data_pipeline.services.cache_manager import OptimizerStateStore
+
+        cache.clear()
+        service = AIInferenceService.__new__(AIInferenceService)
+        service.optimizer = SourceOptimizer(carbon_weight=0.5, cost_weight=0.5,
+                                            solar_capacity=3.0, battery_capacity=10.0)
+        service.state_store = OptimizerStateStore('test')
+        conditions = {'hour': 15, 'grid_price': 6.0, 'carbon_intensity': 450.0,
+                      'shortwave_radiation': 600.0, 'cloud_cover': 30.0}
+        predictions = [{'predicted_kwh': 1.5}] * 6  # 16:00 - 21:00
+
+        plan = service._plan_battery(predictions, conditions)
+
+        self.assertEqual(plan['method'], 'dp')
+        self.assertGreater(plan['discharge'][3], 1.0)  # 19:00 peak
+        self.assertTrue(np.all(plan['solar_used'][2:] == 0.0))  # no solar after 18:00
+        self.assertTrue(np.all(plan['charge_from_grid'][1:5] == 0.0))
+
+        cache.clear()
+        flat = dict(conditions, grid_price_forecast=[6.0] * 6, carbon_forecast=[450.0] * 6)
+        plan = service._plan_battery(predictions, flat)
+        self.assertEqual(plan['method'], 'greedy')
+        self.assertGreater(plan['discharge'][3], 1.0)
+
+    def test_user_weights_never_mutate_the_shared_optimizer(self):
+        from optimize_sources import SourceOptimizer
+        from data_pipeline.models import UserPreferences
+        from data_pipeline.services.ai_inference import AIInferenceService
+
+        service = AIInferenceService.__new__(AIInferenceService)
+        service.optimizer = SourceOptimizer(carbon_weight=0.5, cost_weight=0.5)
+        UserPreferences.objects.create(preference_key='cost_priority', preference_value=80)
+
+        optimizer = service._weighted_optimizer()
+
+        self.assertIsNot(optimizer, service.optimizer)
+        self.assertAlmostEqual(optimizer.cost_weight, 0.8)
+        self.assertAlmostEqual(optimizer.carbon_weight, 0.2)
+        self.assertEqual((service.optimizer.cost_weight, service.optimizer.carbon_weight), (0.5, 0.5))
+
+
+class ScenarioEngineTests(TestCase):
+    """Monte Carlo policy evaluation is reproducible and ranks policies sensibly."""
+
+    def setUp(self):
+        hours = np.arange(24)
+        self.inputs = (
+            np.full(24, 1.5),
+            np.where((hours >= 18) & (hours <= 22), 12.0, 5.0),
+            np.full(24, 500.0),
+            np.where((hours >= 9) & (hours < 15), 2.5, 0.0),
+            5.0,
+        )
+
+    def test_process_pool_matches_serial(self):
+        from scenario_engine import ScenarioEngine
+
+        serial = ScenarioEngine(chunk_size=500, max_workers=1)
+        pooled = ScenarioEngine(chunk_size=500, parallel_threshold=1000, max_workers=2)
+        try:
+            expected = serial.run(*self.inputs, n_scenarios=2000, seed=7)
+            actual = pooled.run(*self.inputs, n_scenarios=2000, seed=7)
+        finally:
+            pooled.close()
+
+        self.assertEqual(actual, expected)
+
+    def test_planned_policy_is_cheapest(self):
+        from scenario_engine import ScenarioEngine
+
+        result = ScenarioEngine().run(*self.inputs, n_scenarios=1000, seed=0)
+        policies = result['policies']
+
+        self.assertEqual(result['best_policy'], 'planned')
+        self.assertLess(policies['planned']['expected_cost'], policies['idle']['expected_cost'])
+        for stats in policies.values():
+            self.assertGreaterEqual(stats['p95_cost'], stats['expected_cost'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OptimizerStateStoreTests(TestCase):
+    """Battery state updates are atomic read-modify-write transactions."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_concurrent_updates_are_not_lost(self):
+        import threading
+        from data_pipeline.services.cache_manager import OptimizerStateStore
+
+        store = OptimizerStateStore('test')
+
+        def drain():
+            for _ in range(25):
+                store.update(lambda s: (None, dict(s, battery_charge=s['battery_charge'] - 0.01)),
+                             default={'battery_charge': 10.0})
+
+        threads = [threading.Thread(target=drain) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertAlmostEqual(store.get_battery_charge(), 8.0)
+        self.assertEqual(store.get_state()['version'], 200)
+
+    def test_watch_conflict_is_retried(self):
+        from unittest import mock
+        from redis.exceptions import WatchError
+        from data_pipeline.services.cache_manager import OptimizerStateStore
+
+        class FakePipeline:
+            """Redis pipeline where another client wins the first transaction."""
+            def __init__(self, data):
+                self.data, self.conflicts = data, 1
+            def __enter__(self):
+                return self
+            def __exit__(self, *exc):
+                return False
+            def watch(self, key):
+                pass
+            def get(self, key):
+                return self.data.get(key)
+            def multi(self):
+                pass
+            def set(self, key, value):
+                self.pending = (key, value)
+            def execute(self):
+                if self.conflicts:
+                    self.conflicts -= 1
+                    self.data[self.pending[0]] = b'{"battery_charge": 5.0, "version": 1}'
+                    raise WatchError()
+                self.data[self.pending[0]] = self.pending[1]
+
+        data = {}
+        client = mock.Mock()
+        client.pipeline.return_value = FakePipeline(data)
+        store = OptimizerStateStore('test')
+        seen = []
+
+        def step(state):
+            seen.append(state['battery_charge'])
+            return None, dict(state, battery_charge=state['battery_charge'] - 1.0)
+
+        with mock.patch.object(OptimizerStateStore, '_redis', return_value=client):
+            store.update(step, default={'battery_charge': 8.0})
+
+        self.assertEqual(seen, [8.0, 5.0])
+        self.assertEqual(json.loads(list(data.values())[0]), {'battery_charge': 4.0, 'version': 2})
+
+    def test_redis_error_propagates_without_a_decision(self):
+        from unittest import mock
+        from redis.exceptions import ConnectionError as RedisConnectionError
+        from data_pipeline.services.cache_manager import OptimizerStateStore
+
+        client = mock.MagicMock()
+        pipe = client.pipeline.return_value.__enter__.return_value
+        pipe.watch.side_effect = RedisConnectionError('connection refused')
+        store = OptimizerStateStore('test')
+        step = mock.Mock(return_value=(None, {'battery_charge': 1.0}))
+
+        with mock.patch.object(OptimizerStateStore, '_redis', return_value=client):
+            with self.assertRaises(RedisConnectionError):
+                store.update(step, default={'battery_charge': 8.0})
+
+        step.assert_not_called()
+        pipe.execute.assert_not_called()
+
+    def test_optimizers_do_not_mutate_state(self):
+        from optimize_sources import SourceOptimizer
+        from data_pipeline.services.simple_ai import SimpleSourceOptimizer
+
+        conditions = {'hour': 19, 'ldr': 0, 'shortwave_radiation': 0, 'cloud_cover': 0,
+                      'carbon_intensity': 700, 'grid_price': 9.0}
+        for optimizer, attribute in ((SourceOptimizer(), 'battery_current_charge'),
+                                     (SimpleSourceOptimizer(), 'battery_charge')):
+            before = getattr(optimizer, attribute)
+            _, _, state = optimizer.optimize({'battery_charge': 6.0}, 1.5, conditions)
+            self.assertEqual(getattr(optimizer, attribute), before)
+            self.assertLess(state['battery_charge'], 6.0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BatchRecommendationTests(TestCase):
+    """recommend_all matches per-load recommendations and records them in one insert."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from data_pipeline.models import EnergySource, GridData, Load, SensorReading
+        cache.clear()
+
+        EnergySource.objects.create(source_type='grid', capacity=10000)
+        EnergySource.objects.create(source_type='solar', capacity=3000, current_output=500)
+        EnergySource.objects.create(source_type='battery', capacity=2000)
+        GridData.objects.create(data_type='carbon_intensity', value=620, unit='gCO2eq/kWh')
+        GridData.objects.create(data_type='weather', value=31, unit='C',
+                                metadata={'cloud_cover': 45})
+        SensorReading.objects.create(sensor_type='ldr', sensor_id='ldr-1', value=800, unit='raw')
+
+        for i, (priority, power) in enumerate([(100, 1500), (75, 3000), (50, 200), (25, 12000), (75, 900)]):
+            Load.objects.create(name=f'Load {i}', priority=priority, rated_power=power, is_active=True)
+
+    def test_matches_single_recommendations(self):
+        from data_pipeline.models import AIDecision, Load
+        from data_pipeline.services.energy_optimizer import EnergySourceOptimizer
+
+        loads = [{'load_name': load.name, 'load_priority': load.priority, 'load_power': load.rated_power}
+                 for load in Load.objects.order_by('name')]
+        optimizer = EnergySourceOptimizer()
+        expected = [optimizer.recommend_source_for_load(**load) for load in loads]
+        AIDecision.objects.all().delete()
+
+        batch = optimizer.recommend_sources_for_loads(loads)['recommendations']
+
+        for single, batched in zip(expected, batch):
+            for key in ('recommended_source', 'reasoning', 'scores', 'confidence'):
+                self.assertEqual(batched.get(key), single.get(key))
+        self.assertEqual(AIDecision.objects.count(), sum(1 for r in batch if r['recommended_source']))
+
+    def test_recommend_all_endpoint(self):
+        from data_pipeline.models import AIDecision
+
+        response = self.client.post('/api/loads/recommend_all/', {}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['count'], 5)
+        self.assertTrue(all('load_id' in r for r in body['recommendations']))
+        self.assertEqual(AIDecision.objects.count(), 4)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContextSnapshotTests(TestCase):
+    """gather_context is served from a snapshot that model writes invalidate."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from data_pipeline.models import EnergySource
+        cache.clear()
+        EnergySource.objects.create(source_type='grid', capacity=10000)
+
+    def test_snapshot_reused_until_data_changes(self):
+        from data_pipeline.models import GridData
+        from data_pipeline.services.energy_optimizer import EnergySourceOptimizer
+
+        optimizer = EnergySourceOptimizer()
+        first = optimizer.gather_context()
+        with self.assertNumQueries(0):
+            self.assertEqual(optimizer.gather_context(), first)
+
+        GridData.objects.create(data_type='carbon_intensity', value=320, unit='gCO2eq/kWh')
+        self.assertEqual(optimizer.gather_context()['carbon_intensity']['value'], 320)
+
+    def test_max_age_accepts_outdated_snapshot(self):
+        from data_pipeline.models import GridData
+        from data_pipeline.services.energy_optimizer import EnergySourceOptimizer
+
+        EnergySourceOptimizer().gather_context()
+        GridData.objects.create(data_type='carbon_intensity', value=320, unit='gCO2eq/kWh')
+
+        with self.assertNumQueries(0):
+            stale = EnergySourceOptimizer(max_age=60).gather_context()
+        self.assertIsNone(stale['carbon_intensity'])
+
+        fresh = self.client.get('/api/optimization/context/').json()
+        self.assertEqual(fresh['carbon_intensity']['value'], 320)
+
+
+    def test_sensor_readings_outdate_snapshot_after_debounce(self):
+        import time
+        from unittest import mock
+        from data_pipeline.models import SensorReading
+        from data_pipeline.services.energy_optimizer import EnergySourceOptimizer
+
+        optimizer = EnergySourceOptimizer()
+        optimizer.gather_context()
+        for value in (700, 800, 900):
+            SensorReading.objects.create(sensor_type='ldr', sensor_id='ldr-1', value=value, unit='raw')
+
+        with self.assertNumQueries(0):
+            self.assertNotIn('ldr', optimizer.gather_context()['sensor_data'])
+
+        later = time.time() + settings.OPTIMIZER_SENSOR_DEBOUNCE + 1
+        with mock.patch('data_pipeline.services.cache_manager.time.time', return_value=later):
+            self.assertEqual(optimizer.gather_context()['sensor_data']['ldr']['value'], 900)
+            with self.assertNumQueries(0):
+                optimizer.gather_context()
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LoadDistributionTests(TestCase):
+    """Loads are assigned in priority order without exceeding source capacity."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_solver_respects_priority_capacity_and_pins(self):
+        from data_pipeline.services.load_distribution import LoadDistributionSolver
+
+        loads = {
+            'power': np.array([1500, 1000, 600, 900, 2500]),
+            'priority': np.array([100, 75, 25, 50, 25]),
+            'can_defer': np.array([False, False, True, False, False]),
+            'pinned': np.array([-1, -1, -1, 1, -1]),
+        }
+        result = LoadDistributionSolver().solve(loads, ['solar', 'grid'], [110, 20], [[2000, 3000]])
+
+        self.assertEqual(result['source'].tolist(), [0, 1, -1, 1, -1])
+        self.assertEqual(result['status'].tolist(),
+                         ['assigned', 'assigned', 'deferred', 'assigned', 'unserved'])
+        self.assertEqual(result['used'].tolist(), [[1500, 1900]])
+
+    def test_knapsack_fills_boundary_tier(self):
+        from data_pipeline.services.load_distribution import LoadDistributionSolver
+
+        loads = {'power': np.array([2000, 1500, 1500]), 'priority': np.array([50, 50, 50])}
+        result = LoadDistributionSolver().solve(loads, ['solar'], [100], [[3000]])
+
+        # First-fit takes 2000 W alone; the two 1500 W loads fill the source
+        self.assertEqual(result['source'].tolist(), [-1, 0, 0])
+        self.assertEqual(result['used'].tolist(), [[3000]])
+
+    def test_solver_10k_loads_under_100ms(self):
+        from data_pipeline.services.load_distribution import LoadDistributionSolver
+
+        rng = np.random.default_rng(0)
+        n_loads, n_sites = 10000, 100
+        loads = {
+            'power': rng.choice([60, 100, 500, 1200, 2000, 3500], n_loads) * rng.uniform(0.8, 1.2, n_loads),
+            'priority': rng.choice([25, 50, 75, 100], n_loads),
+            'can_defer': rng.random(n_loads) < 0.3,
+            'site': rng.integers(0, n_sites, n_loads),
+        }
+        capacity = np.tile([6000.0, 10000.0, 80000.0], (n_sites, 1)) * rng.uniform(0.5, 1.5, (n_sites, 1))
+        solver = LoadDistributionSolver()
+
+        result = min((solver.solve(loads, ['solar', 'battery', 'grid'], [110, 75, 20], capacity)
+                      for _ in range(3)), key=lambda r: r['solve_time_ms'])
+
+        self.assertLess(result['solve_time_ms'], 100)
+        self.assertTrue((result['used'] <= capacity + 1e-6).all())
+        used = np.zeros_like(capacity)
+        placed = result['source'] >= 0
+        np.add.at(used, (loads['site'][placed], result['source'][placed]), loads['power'][placed])
+        np.testing.assert_allclose(used, result['used'])
+
+    def test_distribution_endpoint(self):
+        from data_pipeline.models import EnergySource, Load
+
+        EnergySource.objects.create(source_type='solar', capacity=2000)
+        EnergySource.objects.create(source_type='grid', capacity=3000)
+        Load.objects.create(name='Fridge', priority=75, rated_power=1500, is_active=True,
+                            current_source='grid', min_runtime=30)
+        Load.objects.create(name='Router', priority=100, rated_power=50, is_active=True)
+        Load.objects.create(name='Heater', priority=50, rated_power=1800, is_active=True)
+        Load.objects.create(name='Washer', priority=25, rated_power=2000, is_active=True, can_defer=True)
+        Load.objects.create(name='Idle TV', priority=25, rated_power=150, is_active=False)
+
+        body = self.client.get('/api/optimization/distribution/').json()
+
+        sources = {a['load_name']: a['source'] for a in body['assignments']}
+        self.assertEqual(len(sources), 4)
+        self.assertEqual(sources['Fridge'], 'grid')
+        self.assertEqual(sources['Router'], 'solar')
+        self.assertEqual(sources['Heater'], 'solar')
+        self.assertEqual(body['deferred'], ['Washer'])
+        self.assertEqual(body['sources']['grid']['assigned_power'], 1500)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RetrainingJobTests(TestCase):
+    """POST /ai/retrain/ returns a job id and the Django-Q task reports progress."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_retrain_endpoint_runs_job(self):
+        from unittest import mock
+        from django_q.conf import Conf
+        from data_pipeline.services.ai_inference import AIInferenceService
+
+        result = {'success': True, 'status': 'succeeded', 'watermark': '2026-01-26T11:00:00+00:00'}
+        with mock.patch.object(Conf, 'SYNC', True), \
+                mock.patch.object(AIInferenceService, '__init__', return_value=None), \
+                mock.patch.object(AIInferenceService, 'retrain_incremental', return_value=dict(result)):
+            response = self.client.post('/api/ai/retrain/')
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job_id']
+        job = self.client.get(f'/api/ai/retrain/{job_id}/').json()
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result']['watermark'], result['watermark'])
+        self.assertEqual(self.client.get('/api/ai/retrain/abc123/').status_code, 404)
+
+    def test_only_one_job_at_a_time(self):
+        from data_pipeline.services.cache_manager import RetrainingJobStore
+        from data_pipeline.tasks import retrain_demand_model
+
+        store = RetrainingJobStore()
+        store.acquire('running', 60)
+        store.create('second')
+
+        self.assertEqual(retrain_demand_model('second')['status'], 'skipped')
+
+    def test_killed_job_fails_after_deadline(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from data_pipeline.services.cache_manager import RetrainingJobStore
+
+        store = RetrainingJobStore()
+        store.create('dead01')
+        store.update('dead01', status='running', deadline=(timezone.now() + timedelta(minutes=5)).isoformat())
+        self.assertEqual(self.client.get('/api/ai/retrain/dead01/').json()['status'], 'running')
+
+        deadline = (timezone.now() - timedelta(seconds=1)).isoformat()
+        store.update('dead01', deadline=deadline)
+        job = self.client.get('/api/ai/retrain/dead01/').json()
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['finished_at'], deadline)
+        self.assertEqual(store.get('dead01')['status'], 'failed')
+
+    @unittest.skipUnless(importlib.util.find_spec('tensorflow'), 'TensorFlow not installed')
+    def test_fine_tunes_only_data_after_watermark(self):
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        from data_pipeline.models import SensorReading
+        from data_pipeline.services.ai_inference import AIInferenceService, load_ai_modules
+
+        load_ai_modules()
+        from train_demand_model import EnergyDemandForecaster
+
+        models_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, models_dir)
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        watermark = now - timedelta(hours=48)
+
+        forecaster = EnergyDemandForecaster(models_dir=models_dir)
+        forecaster._select_features([
+            'total_energy_kwh', 'temperature', 'humidity', 'solar_radiation_proxy',
+            'carbon_intensity', 'grid_price_per_kwh', 'hour', 'day_of_week',
+            'is_weekend', 'is_peak_hour', 'occupancy_factor',
+        ])
+        forecaster.scaler_X.fit(np.random.default_rng(0).uniform(0, 30, (50, 11)))
+        forecaster.scaler_y.fit(np.random.default_rng(1).uniform(0, 3, (50, 6)))
+        forecaster.model = forecaster.build_model((24, 11))
+        forecaster.trained_until = watermark.isoformat()
+        forecaster.save_model()
+
+        # 60 hours before the watermark, 47 completed hours after it, one reading in the current hour
+        hours = [watermark + timedelta(hours=h) for h in range(-60, 49)]
+        SensorReading.objects.bulk_create([
+            SensorReading(sensor_type=kind, sensor_id='s1', value=1 + (i % 5) * 0.3, timestamp=hour + timedelta(minutes=5))
+            for i, hour in enumerate(hours) for kind in ('current', 'temperature')
+        ])
+
+        with mock.patch.object(AIInferenceService, 'AI_MODELS_DIR', models_dir):
+            service = AIInferenceService()
+            first = service.retrain_incremental(replay_days=30, epochs=1)
+            second = service.retrain_incremental(replay_days=30, epochs=1)
+
+        self.assertEqual(first['status'], 'succeeded')
+        self.assertEqual(first['new_hours'], 47)
+        # Every window whose targets end by the newest hour, which becomes the watermark
+        self.assertEqual(first['new_samples'], 24 + 47 - 30 + 1)
+        self.assertEqual(first['replay_samples'], 61 - 30 + 1)
+        self.assertEqual(first['watermark'], (now - timedelta(hours=1)).isoformat())
+        self.assertEqual(second['status'], 'skipped')
+        self.assertEqual(second['previous_watermark'], first['watermark'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SOLAR_FEATURE_INTERVAL=0, SOLAR_PANEL_CAPACITY_KW=3.0)
+class SolarFeatureTests(TestCase):
+    """Dust volatility features are maintained on ingest and match training."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_rolling_stats_match_pandas(self):
+        import pandas as pd
+        from data_pipeline.services.cache_manager import RollingStats
+
+        values = np.random.default_rng(4).normal(1.0, 0.3, 50)
+        expected = pd.Series(values).rolling(window=6, min_periods=1).std().fillna(0.0)
+        stats = RollingStats(6)
+        for i, value in enumerate(values):
+            self.assertAlmostEqual(stats.std_with(value), expected[i], places=9)
+            stats = RollingStats.from_dict(6, stats.to_dict())
+            stats.add(value)
+            self.assertAlmostEqual(stats.std, expected[i], places=9)
+
+    def test_ingest_updates_features_and_dust_endpoint(self):
+        import pandas as pd
+        from data_pipeline.services.cache_manager import SensorBufferManager, SolarFeatureStore
+        from data_pipeline.services.solar_dust import SolarDustMonitor
+
+        buffers = SensorBufferManager()
+        buffers.add_reading('voltage', 'volt_1', 200.0, '2026-03-01T06:00:00+00:00')
+        buffers.add_reading('ldr', 'ldr_1', 800.0, '2026-03-01T06:00:00+00:00')
+        buffers.add_reading('temperature', 'temp_1', 25.0, '2026-03-01T06:00:00+00:00')
+        currents = [9000, 9000, 4000, 9000, 3000, 9000, 9000]
+        for minute, current in enumerate(currents):
+            buffers.add_reading('current', 'curr_1', current, f'2026-03-01T06:{minute:02d}:00+00:00')
+
+        row, = SolarFeatureStore().get_features()
+        store = SolarFeatureStore()
+        expected_kw = store.expected_power(800.0, 25.0, row['hour'])
+        power = pd.Series([200.0 * c / 1e6 for c in currents])
+        self.assertEqual(row['panel_id'], 'curr_1')
+        self.assertAlmostEqual(row['actual_power_kw'], 1.8)
+        self.assertAlmostEqual(row['power_volatility'], power.rolling(6).std().iloc[-1])
+        self.assertAlmostEqual(row['efficiency_volatility'],
+                               (power / expected_kw).rolling(6).std().iloc[-1])
+        # No cleaning recorded: counted from the panel's first reading
+        self.assertAlmostEqual(row['days_since_cleaning'], 6 / (24 * 60))
+
+        # A steady, dimmed panel cleaned 27 days ago
+        response = self.client.post('/api/ai/dust/cleaned/',
+                                    {'panel': 'curr_2', 'cleaned_at': '2026-02-02T06:00:00Z'},
+                                    content_type='application/json')
+        self.assertEqual(response.json()['cleaned_at'], '2026-02-02T06:00:00+00:00')
+        self.assertEqual(self.client.post('/api/ai/dust/cleaned/', {}, content_type='application/json').status_code, 400)
+        for minute in range(7):
+            buffers.add_reading('current', 'curr_2', 4500, f'2026-03-01T06:{minute:02d}:00+00:00')
+        self.assertAlmostEqual(store.get_features(['curr_2'])[0]['days_since_cleaning'], 27 + 6 / (24 * 60))
+
+        from train_solar_dust_model import SolarDustPredictor
+        models_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, models_dir)
+        n = 200
+        history = pd.DataFrame({
+            'hour': 12, 'days_since_cleaning': np.linspace(0, 30, n), 'solar_irradiance': 0.8,
+            'temperature_c': 25.0, 'ldr_lux': 800.0, 'expected_power_kw': 2.4,
+            'actual_power_kw': np.linspace(2.4, 1.2, n), 'efficiency_ratio': np.linspace(1, 0.5, n),
+            'dust_percentage': np.linspace(0, 60, n),
+        })
+        SolarDustPredictor(params={'n_estimators': 5}, models_dir=models_dir, n_jobs=1).train(history)
+
+        result = SolarDustMonitor(models_dir=models_dir).predict()
+
+        self.assertEqual(result['panels'], 2)
+        predictions = result['predictions']
+        self.assertEqual(predictions['panel_id'], ['curr_1', 'curr_2'])
+        self.assertEqual(predictions['is_shadow'], [True, False])
+        self.assertEqual(predictions['urgency'][0], 'None')
+        self.assertEqual(predictions['issue_type'][1], 'Dust')
+        self.assertGreater(predictions['dust_percentage'][1], 40)
+        self.assertTrue(predictions['needs_cleaning'][1])
+
+
+STUB_RESPONSES = {
+    '/data/2.5/weather': {'main': {'temp': 27.5, 'humidity': 60}, 'clouds': {'all': 20},
+                          'weather': [{'main': 'Clouds', 'description': 'few clouds'}]},
+    '/v3/carbon-intensity/latest': {'carbonIntensity': 420, 'datetime': '2026-03-01T06:00:00Z',
+                                    'fossilFreePercentage': 30, 'renewablePercentage': 25},
+    '/v3/carbon-intensity/forecast': {'forecast': [{'datetime': f'2026-03-01T{h:02d}:00Z',
+                                                    'carbonIntensity': 400 + h} for h in range(48)]},
+    '/v1/forecast': {'minutely_15': {'temperature_2m': [21.5]},
+                     'daily': {'sunrise': ['2026-03-01T06:31'], 'sunset': ['2026-03-01T18:29']},
+                     'hourly': {'time': ['2026-03-01T00:00', '2026-03-01T01:00'],
+                                'temperature_2m': [20.0, 19.5]}},
+}
+
+
+def start_stub_server(test, latency=0.0, failures=None):
+    """
+    Serve STUB_RESPONSES on a local port, sleeping `latency` seconds per request.
+
+    failures maps a path to the status codes returned before it succeeds.
+    Returns (base_url, hits) where hits counts requests per path.
+    """
+    import threading
+    import time
+    from collections import Counter
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse
+
+    hits = Counter()
+    failures = {path: list(codes) for path, codes in (failures or {}).items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlparse(self.path).path
+            hits[path] += 1
+            time.sleep(latency)
+            status = failures[path].pop(0) if failures.get(path) else 200
+            if path not in STUB_RESPONSES:
+                status = 404
+            body = json.dumps(STUB_RESPONSES.get(path, {}) if status == 200 else {}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    return f'http://127.0.0.1:{server.server_address[1]}', hits
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ELECTRICITY_MAPS_API_KEY='test-key',
+                   OPENWEATHER_API_KEY='test-key', EXTERNAL_API_BACKOFF=0.01)
+class ExternalDataTests(TestCase):
+    """A refresh takes the slowest API's latency, not the sum, and retries transient errors."""
+
+    LATENCY = 0.5
+
+    def setUp(self):
+        self.base_url, self.hits = start_stub_server(self, latency=self.LATENCY)
+
+    def services(self, base_url):
+        from data_pipeline.services.electricity_maps import ElectricityMapsService
+        from data_pipeline.services.weather import WeatherService
+
+        carbon, weather = ElectricityMapsService(), WeatherService()
+        carbon.BASE_URL = base_url + '/v3'
+        weather.BASE_URL = base_url + '/data/2.5'
+        return {'carbon_intensity': carbon, 'weather': weather}
+
+    def test_task_fetches_both_apis_concurrently(self):
+        import time
+        from unittest import mock
+        from data_pipeline.models import GridData
+        from data_pipeline.services.electricity_maps import ElectricityMapsService
+        from data_pipeline.services.weather import WeatherService
+        from data_pipeline.tasks import fetch_external_data
+
+        with mock.patch.object(ElectricityMapsService, 'BASE_URL', self.base_url + '/v3'), \
+                mock.patch.object(WeatherService, 'BASE_URL', self.base_url + '/data/2.5'):
+            start = time.perf_counter()
+            fetch_external_data()
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(self.hits['/v3/carbon-intensity/latest'], 1)
+        self.assertEqual(self.hits['/data/2.5/weather'], 1)
+        self.assertLess(elapsed, 1.8 * self.LATENCY)
+        carbon = GridData.objects.get(data_type='carbon_intensity')
+        weather = GridData.objects.get(data_type='weather')
+        self.assertEqual(carbon.value, 420)
+        self.assertEqual(carbon.metadata['renewable_percentage'], 25)
+        self.assertEqual(weather.value, 27.5)
+        self.assertEqual(weather.metadata['description'], 'few clouds')
+
+    def test_retries_transient_errors_only(self):
+        from data_pipeline.services.external_data import refresh_external_data
+
+        base_url, hits = start_stub_server(self, failures={
+            '/v3/carbon-intensity/latest': [503, 429],
+            '/data/2.5/weather': [401],
+        })
+
+        with self.assertLogs('data_pipeline.services.async_fetcher', 'WARNING') as logs:
+            result = refresh_external_data(self.services(base_url))
+
+        self.assertEqual(result['carbon_intensity']['carbon_intensity'], 420)
+        self.assertIsNone(result['weather'])
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(hits['/v3/carbon-intensity/latest'], 3)
+        self.assertEqual(hits['/data/2.5/weather'], 1)
+
+        hits.clear()
+        result = refresh_external_data(self.services(base_url + '/missing'), retries=0)
+        self.assertEqual(result, {'carbon_intensity': None, 'weather': None})
+        self.assertEqual(sum(hits.values()), 2)
+
+    def test_api_fetcher_is_the_shared_client_with_settings_defaults(self):
+        from async_collection import AsyncFetcher as SharedFetcher
+        from data_pipeline.services.external_data import AsyncFetcher
+
+        fetcher = AsyncFetcher(backoff=0)
+        self.assertIsInstance(fetcher, SharedFetcher)
+        self.assertEqual((fetcher.timeout, fetcher.retries, fetcher.backoff),
+                         (settings.EXTERNAL_API_TIMEOUT, settings.EXTERNAL_API_RETRIES, 0))
+
+    def test_realtime_collection_takes_the_slowest_request(self):
+        import time
+        from async_collection import collect_realtime
+        from collect_carbon_data import CarbonIntensityCollector
+        from collect_weather_data import WeatherDataCollector
+
+        weather = WeatherDataCollector()
+        weather.base_url = self.base_url + '/v1/forecast'
+        carbon = CarbonIntensityCollector()
+        carbon.base_url = self.base_url + '/v3'
+        carbon.api_key, carbon.use_mock = 'test-key', False
+
+        start = time.perf_counter()
+        result = collect_realtime(weather, carbon, forecast_days=2, forecast_hours=24)
+        elapsed = time.perf_counter() - start
+
+        # Four requests: sequentially 4 x latency
+        self.assertEqual(sum(self.hits.values()), 4)
+        self.assertLess(elapsed, 1.8 * self.LATENCY)
+        self.assertEqual(result['current_weather']['temperature'], 21.5)
+        self.assertEqual(len(result['weather_forecast']), 2)
+        self.assertEqual(result['current_carbon']['carbon_intensity'], 420)
+        self.assertEqual(len(result['carbon_forecast']), 24)
@@ -2,6 +2,7 @@ from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 from django.http import JsonResponse
@@ -18,10 +19,26 @@ from .serializers import (
     LoadSerializer,
     SourceSwitchEventSerializer
 )
-from .services.cache_manager import SensorBufferManager
+from .services.cache_manager import SensorBufferManager, DecisionStore, RetrainingJobStore, SolarFeatureStore
 from .services.energy_optimizer import EnergySourceOptimizer
-# Use simple AI service that works without TensorFlow
-from .services.simple_ai import SimpleAIService
+from .services.decision_publisher import get_decision_publisher
+# Shared AI service (SimpleAIService unless AI_SERVICE_BACKEND = 'ml')
+from .services.ai_registry import get_ai_service
+from .services.solar_dust import get_dust_monitor
+
+
+def context_max_age(request):
+    """
+    Seconds of context staleness the caller accepts (?max_age=), or None.
+
+    Lets optimization endpoints reuse a cached context snapshot instead of
+    re-querying sensors, grid data and preferences.
+    """
+    try:
+        max_age = float(request.query_params['max_age'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return max(0.0, max_age)
 
 
 class SensorReadingViewSet(viewsets.ModelViewSet):
@@ -322,7 +339,7 @@ class LoadViewSet(viewsets.ModelViewSet):
         This endpoint allows Module 3 (AI) to override with ML-based recommendations.
         """
         load = self.get_object()
-        optimizer = EnergySourceOptimizer()
+        optimizer = EnergySourceOptimizer(max_age=context_max_age(request))
         
         recommendation = optimizer.recommend_source_for_load(
             load_name=load.name,
@@ -331,7 +348,43 @@ class LoadViewSet(viewsets.ModelViewSet):
         )
         
         return Response(recommendation)
-    
+
+    @action(detail=False, methods=['post'])
+    def recommend_all(self, request):
+        """
+        Get energy source recommendations for many loads in one call.
+
+        Context is gathered once and all decisions are recorded together.
+
+        Request body (optional):
+        {
+            "load_ids": [1, 2, 3]   // default: all active loads
+        }
+        """
+        load_ids = request.data.get('load_ids')
+        if load_ids is not None:
+            if not isinstance(load_ids, list):
+                return Response({
+                    'error': 'load_ids must be a list'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            queryset = self.queryset.filter(id__in=load_ids)
+        else:
+            queryset = self.queryset.filter(is_active=True)
+
+        loads = [
+            {'load_id': load.id, 'load_name': load.name,
+             'load_priority': load.priority, 'load_power': load.rated_power}
+            for load in queryset.order_by('-priority', 'name')
+        ]
+
+        optimizer = EnergySourceOptimizer(max_age=context_max_age(request))
+        result = optimizer.recommend_sources_for_loads(loads)
+        for load, recommendation in zip(loads, result['recommendations']):
+            recommendation['load_id'] = load['load_id']
+        result['count'] = len(loads)
+
+        return Response(result)
+
     @action(detail=True, methods=['post'])
     def check_switch(self, request, pk=None):
         """
@@ -344,7 +397,7 @@ class LoadViewSet(viewsets.ModelViewSet):
                 'error': 'Load has no current source assigned'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        optimizer = EnergySourceOptimizer()
+        optimizer = EnergySourceOptimizer(max_age=context_max_age(request))
         switch_recommendation = optimizer.should_switch_source(
             current_source=load.current_source,
             load_name=load.name,
@@ -418,7 +471,7 @@ class EnergyOptimizationViewSet(viewsets.ViewSet):
                 'error': 'load_name is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        optimizer = EnergySourceOptimizer()
+        optimizer = EnergySourceOptimizer(max_age=context_max_age(request))
         recommendation = optimizer.recommend_source_for_load(
             load_name=load_name,
             load_priority=load_priority,
@@ -435,7 +488,7 @@ class EnergyOptimizationViewSet(viewsets.ViewSet):
         Returns all relevant data: sensors, weather, carbon, energy sources.
         Module 3 (AI) can use this to make informed decisions.
         """
-        optimizer = EnergySourceOptimizer()
+        optimizer = EnergySourceOptimizer(max_age=context_max_age(request))
         context = optimizer.gather_context()
         
         return Response(context)
@@ -443,12 +496,13 @@ class EnergyOptimizationViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def distribution(self, request):
         """
-        Get optimal distribution of loads across energy sources.
+        Get optimal distribution of active loads across energy sources.
         
-        This is a placeholder for Module 3 (AI) to implement sophisticated
-        load balancing algorithms.
+        Assigns every active load to a source without exceeding source
+        capacity (see LoadDistributionSolver); loads that do not fit are
+        listed as deferred or unserved.
         """
-        optimizer = EnergySourceOptimizer()
+        optimizer = EnergySourceOptimizer(max_age=context_max_age(request))
         distribution = optimizer.get_optimal_source_distribution()
         
         return Response(distribution)
@@ -529,9 +583,12 @@ class AIPredictionViewSet(viewsets.ViewSet):
     - Real-time decision making
     """
     
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.ai_service = SimpleAIService()
+    MAX_BATCH_CONTEXTS = 500
+    
+    @property
+    def ai_service(self):
+        """Process-wide AI service, loaded once per worker"""
+        return get_ai_service()
     
     @action(detail=False, methods=['get'])
     def status(self, request):
@@ -585,6 +642,47 @@ class AIPredictionViewSet(viewsets.ViewSet):
         except Exception as e:
             print(f"Warning: Could not record forecast: {e}")
         
+        # Push to ws/decisions/ subscribers
+        get_decision_publisher().broadcast('forecast_update', result)
+        
+        return Response(result)
+    
+    @action(detail=False, methods=['post'])
+    def forecast_batch(self, request):
+        """
+        Forecast energy demand for many sites, sub-circuits or scenarios at once.
+        
+        Request body:
+        {
+            "hours": 6,
+            "contexts": [
+                {"id": "kitchen", "scale": 0.4},
+                {"id": "meter_2", "history": [{"total_energy_kwh": 1.2, ...}, ...]}
+            ]
+        }
+        
+        "scale" is used by the statistical model, "history" (last 24 hourly
+        feature rows) by the LSTM model. All contexts share one forward pass.
+        """
+        contexts = request.data.get('contexts')
+        if not isinstance(contexts, list) or not contexts:
+            return Response(
+                {'error': 'contexts must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(contexts) > self.MAX_BATCH_CONTEXTS:
+            return Response(
+                {'error': f'At most {self.MAX_BATCH_CONTEXTS} contexts per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            hours = int(request.data.get('hours', 6))
+        except (ValueError, TypeError):
+            hours = 6
+        hours = max(1, min(hours, 24))  # Clamp between 1 and 24 hours
+        
+        result = self.ai_service.forecast_demand_batch(contexts, hours_ahead=hours)
         return Response(result)
     
     @action(detail=False, methods=['get'])
@@ -602,13 +700,18 @@ class AIPredictionViewSet(viewsets.ViewSet):
         
         result = self.ai_service.forecast_demand(hours_ahead=hours)
         
-        return Response({
+        peak_info = {
             'timestamp': result['timestamp'],
             'peak_hours': result['peak_hours'],
             'next_peak': result['next_peak'],
             'total_predictions': len(result['predictions']),
             'recommendation': result['recommendation']
-        })
+        }
+        
+        # Push to ws/decisions/ subscribers
+        get_decision_publisher().broadcast('peak_hours_update', peak_info)
+        
+        return Response(peak_info)
     
     @action(detail=False, methods=['post'])
     def recommend_source(self, request):
@@ -650,9 +753,14 @@ class AIPredictionViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['post'])
     def decide(self, request):
         """
-        Make a comprehensive energy management decision.
+        Get the latest comprehensive energy management decision.
+        
+        Decisions are computed in the background by the ai_worker command;
+        this endpoint only reads the latest result.
         
-        Combines demand forecasting, peak detection, and source optimization.
+        Query params:
+        - fresh: If 1, ask the worker for a new decision and wait for it
+                 (up to AI_DECISION_LONGPOLL_TIMEOUT seconds)
         
         Returns:
         {
@@ -669,25 +777,150 @@ class AIPredictionViewSet(viewsets.ViewSet):
                 "primary_source": "solar"
             },
             "recommendation": "...",
-            "available": true
+            "available": true,
+            "decision_seq": 42,
+            "computed_at": "2026-01-26T12:00:00Z"
+        }
+        """
+        store = DecisionStore()
+        entry = store.get_latest()
+        
+        fresh = request.query_params.get('fresh', '').lower() in ('1', 'true', 'yes')
+        if fresh or entry is None:
+            entry = self._refresh_decision(store, entry)
+        
+        return Response(self._decision_response(entry))
+    
+    @action(detail=False, methods=['get'])
+    def latest(self, request):
+        """
+        Get the latest decision computed by the AI worker without triggering one.
+        """
+        entry = DecisionStore().get_latest()
+        if entry is None:
+            return Response(
+                {'error': 'No decision computed yet', 'available': False},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(self._decision_response(entry))
+    
+    def _refresh_decision(self, store, entry):
+        """
+        Get a new decision: from the worker if one is running,
+        otherwise by computing it in this request.
+        """
+        if store.worker_alive():
+            seq = entry['seq'] if entry else 0
+            store.request_refresh()
+            newer = store.wait_for_newer(seq, settings.AI_DECISION_LONGPOLL_TIMEOUT)
+            if newer is not None:
+                return newer
+            if entry is not None:
+                return entry
+        
+        from .tasks import compute_ai_decision
+        return compute_ai_decision()
+    
+    @staticmethod
+    def _decision_response(entry):
+        return {
+            **entry['decision'],
+            'decision_seq': entry['seq'],
+            'computed_at': entry['computed_at'],
         }
+    
+    @action(detail=False, methods=['post'])
+    def retrain(self, request):
         """
-        result = self.ai_service.make_decision()
+        Start incremental retraining of the demand model in the background.
         
-        # Record the decision
+        The model is fine-tuned on hourly data newer than its watermark by a
+        Django-Q worker; poll /api/ai/retrain/<job_id>/ for the result.
+        
+        Returns (202):
+        {
+            "job_id": "3f2a...",
+            "status": "queued",
+            "queued_at": "2026-01-26T12:00:00Z",
+            "status_url": "/api/ai/retrain/3f2a.../"
+        }
+        """
+        from uuid import uuid4
+        from django_q.tasks import async_task
+        
+        store = RetrainingJobStore()
+        job_id = uuid4().hex
+        job = store.create(job_id)
         try:
-            AIDecision.objects.create(
-                decision_type='general',
-                timestamp=timezone.now(),
-                decision=result,
-                confidence=0.85,
-                applied=True,
-                reasoning=result.get('recommendation', '')
+            async_task(
+                'data_pipeline.tasks.retrain_demand_model', job_id,
+                task_name=f'retrain-{job_id}',
+                q_options={'timeout': settings.AI_RETRAIN_TIMEOUT},
             )
         except Exception as e:
-            print(f"Warning: Could not record decision: {e}")
+            store.update(job_id, status='failed', error=f'Could not enqueue retraining: {e}')
+            return Response(
+                {'error': 'Task queue unavailable', 'job_id': job_id},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         
-        return Response(result)
+        job = store.get(job_id) or job
+        return Response(
+            {**job, 'status_url': request.build_absolute_uri(f'{job_id}/')},
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    @action(detail=False, methods=['get'], url_path=r'retrain/(?P<job_id>[0-9a-f]+)')
+    def retrain_status(self, request, job_id=None):
+        """
+        Get the status of a retraining job
+        (queued, running, succeeded, skipped or failed).
+        """
+        job = RetrainingJobStore().get(job_id)
+        if job is None:
+            return Response({'error': 'Unknown job id'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+    
+    @action(detail=False, methods=['get'])
+    def dust(self, request):
+        """
+        Dust prediction for every solar panel from its live rolling features.
+        
+        Query params:
+        - panel: Panel (current sensor) id, repeatable (default: all panels)
+        
+        Returns one column per field (dust_percentage, is_shadow, urgency,
+        action, potential gain, ...) with one entry per panel.
+        """
+        monitor = get_dust_monitor()
+        if not monitor.is_available():
+            return Response(
+                {'error': 'Solar dust model not trained'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        panel_ids = request.query_params.getlist('panel') or None
+        return Response(monitor.predict(panel_ids))
+    
+    @action(detail=False, methods=['post'], url_path='dust/cleaned')
+    def dust_cleaned(self, request):
+        """
+        Record that a solar panel was cleaned; days_since_cleaning restarts.
+        
+        Request body:
+        {
+            "panel": "curr_1",
+            "cleaned_at": "2026-03-01T08:00:00Z"  (optional, default: now)
+        }
+        """
+        panel_id = request.data.get('panel')
+        if not panel_id:
+            return Response({'error': 'panel is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            cleaned_at = SolarFeatureStore().record_cleaning(panel_id, request.data.get('cleaned_at'))
+        except (ValueError, TypeError):
+            return Response({'error': 'cleaned_at must be an ISO timestamp'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'panel': panel_id, 'cleaned_at': cleaned_at.isoformat()})
     
     @action(detail=False, methods=['get'])
     def conditions(self, request):
@@ -20,6 +20,12 @@ django_asgi_app = get_asgi_application()
 
 from data_pipeline.routing import websocket_urlpatterns
 
+# Load and warm up the AI models once per worker, not per request
+from django.conf import settings
+if settings.AI_WARMUP_ON_STARTUP:
+    from data_pipeline.services.ai_registry import get_registry
+    get_registry().warmup()
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 import environ
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -221,13 +222,47 @@ MQTT_TOPIC_PREFIX = env('MQTT_TOPIC_PREFIX', default='HyperVolt')
 # External API Configuration
 ELECTRICITY_MAPS_API_KEY = env('ELECTRICITY_MAPS_API_KEY', default='')
 OPENWEATHER_API_KEY = env('OPENWEATHER_API_KEY', default='')
+EXTERNAL_API_TIMEOUT = 10  # Seconds allowed per request (connect + read)
+EXTERNAL_API_RETRIES = 3  # Retries after a connection error, timeout, 429 or 5xx
+EXTERNAL_API_BACKOFF = 0.5  # Base of the jittered exponential backoff between retries (seconds)
 
 # Location Configuration
 LOCATION_LAT = env.float('LOCATION_LAT', default=12.9716)
 LOCATION_LON = env.float('LOCATION_LON', default=77.5946)
 LOCATION_ZONE = env('LOCATION_ZONE', default='IN-KA')
 
+# Time-of-use grid tariff, relative to the normal rate (used to plan the battery
+# over the forecast horizon when no hourly price forecast is available)
+GRID_PEAK_HOURS = [7, 8, 9, 17, 18, 19, 20]
+GRID_OFFPEAK_HOURS = [22, 23, 0, 1, 2, 3, 4, 5]
+GRID_TARIFF_MULTIPLIERS = {'peak': 1.4, 'normal': 1.0, 'offpeak': 0.8}
+
 # Hot Path Configuration - Sliding window buffer size
 SENSOR_BUFFER_SIZE = 60  # Last 60 readings
 SENSOR_BUFFER_KEY_PREFIX = 'sensor_buffer'
+SENSOR_STALE_AFTER = 300  # Seconds before a sensor value is reported as stale
+GRID_STALE_AFTER = 3600  # Seconds before carbon/weather data is reported as stale
+GRID_CONTEXT_TTL = 6 * 3600  # Cache lifetime of the latest grid values
+CONDITIONS_RECHECK_AFTER = 30  # Seconds before a field missing or stale on the hot path is looked up in the DB again
+OPTIMIZER_CONTEXT_TTL = 300  # Upper bound on the age of a cached optimizer context snapshot
+OPTIMIZER_SENSOR_DEBOUNCE = 10  # Seconds new sensor readings may lag in a cached optimizer context
+SOLAR_PANEL_CAPACITY_KW = env.float('SOLAR_PANEL_CAPACITY_KW', default=3.0)  # Rated output used for expected power
+SOLAR_FEATURE_INTERVAL = 300  # Seconds averaged into one dust-feature sample (training data cadence)
+SOLAR_VOLATILITY_WINDOW = 6  # Samples in the rolling power/efficiency volatility
+SOLAR_FEATURE_TTL = 24 * 3600  # Cache lifetime of a panel's rolling feature state
+SOLAR_LAST_CLEANED = env('SOLAR_LAST_CLEANED', default=None)  # ISO time the panels were last cleaned, until POST /api/ai/dust/cleaned/ records one
+
+# AI Service Configuration
+AI_SERVICE_BACKEND = env('AI_SERVICE_BACKEND', default='simple')  # 'simple' or 'ml'
+AI_WARMUP_ON_STARTUP = env.bool('AI_WARMUP_ON_STARTUP', default=True)
+AI_MODEL_RELOAD_CHECK_INTERVAL = 30  # seconds between model file mtime checks
+AI_WEIGHTS_DIR = env('AI_WEIGHTS_DIR', default=os.path.join(tempfile.gettempdir(), 'hypervolt', 'ai_weights'))  # NumPy export of the demand model, generated on load
+FORECAST_CACHE_TTL = 3600  # Forecasts are recomputed at least hourly
+FORECAST_MAX_HORIZON = 48  # Hours computed once and sliced per endpoint
+AI_DECISION_INTERVAL = env.float('AI_DECISION_INTERVAL', default=10.0)  # ai_worker schedule (seconds)
+AI_DECISION_LONGPOLL_TIMEOUT = 5.0  # Max seconds /ai/decide/?fresh=1 waits for the worker
+AI_REFRESH_CHANGE = 0.2  # Relative sensor change that makes ai_worker decide before its schedule
+AI_RETRAIN_TIMEOUT = 1800  # Max seconds a Django-Q retraining task may run
+AI_RETRAIN_JOB_TTL = 24 * 3600  # How long retraining job status stays queryable
+AI_RETRAIN_REPLAY_DAYS = 30  # History before the watermark sampled for replay during fine-tuning
 
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hypervolt_backend.settings')
 
 application = get_wsgi_application()
+
+# Load and warm up the AI models once per worker, not per request
+from django.conf import settings
+if settings.AI_WARMUP_ON_STARTUP:
+    from data_pipeline.services.ai_registry import get_registry
+    get_registry().warmup()
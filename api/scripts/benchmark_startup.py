@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+HyperVolt API Startup Benchmark
+Measures import time of the Django process with `python -X importtime`
+and fails if startup regresses:
+
+- any heavy ML module (TensorFlow, scikit-learn, pandas, ...) is imported
+  while loading the API, or
+- total import time exceeds the budget.
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --budget-ms 2500 --runs 5
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# What a web worker / manage.py command loads before serving anything
+STARTUP_CODE = (
+    "import django; django.setup(); "
+    "import hypervolt_backend.urls; "
+    "import data_pipeline.management.commands.mqtt_listener"
+)
+
+# Modules that must only be imported on demand
+HEAVY_MODULES = ['tensorflow', 'keras', 'sklearn', 'pandas', 'scipy', 'h5py', 'joblib']
+
+DEFAULT_BUDGET_MS = 3000
+
+
+def measure_imports():
+    """
+    Run the startup code once under -X importtime
+
+    Returns:
+        Dict mapping module name -> (self_us, cumulative_us)
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='hypervolt_backend.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+        cwd=API_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # "import time:  <self> | <cumulative> | <indent><module>"
+        self_field, cumulative_field, name = line.split('|', 2)
+        self_us = int(self_field.split(':')[1])
+        modules[name.strip()] = (self_us, int(cumulative_field))
+    return modules
+
+
+def heavy_imports(modules):
+    """Return the heavy top-level packages present in the import log"""
+    return sorted({name.split('.')[0] for name in modules} & set(HEAVY_MODULES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API startup import time')
+    parser.add_argument('--runs', type=int, default=3, help='Number of runs (best is reported)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Maximum total import time in milliseconds')
+    parser.add_argument('--top', type=int, default=10, help='Show the N slowest project modules')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("API STARTUP IMPORT BENCHMARK")
+    print("=" * 70)
+
+    best_total, best_modules = None, None
+    for _ in range(args.runs):
+        modules = measure_imports()
+        total = sum(self_us for self_us, _ in modules.values()) / 1000.0
+        if best_total is None or total < best_total:
+            best_total, best_modules = total, modules
+
+    project = sorted(
+        ((cumulative, name) for name, (_, cumulative) in best_modules.items()
+         if name.split('.')[0] in ('data_pipeline', 'hypervolt_backend')),
+        reverse=True
+    )
+    print("\nSlowest project modules (cumulative):")
+    for cumulative, name in project[:args.top]:
+        print(f"  {cumulative / 1000.0:8.1f} ms  {name}")
+
+    print(f"\nModules imported: {len(best_modules)}")
+    print(f"Total import time: {best_total:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    heavy = heavy_imports(best_modules)
+    if heavy:
+        failures.append(f"Heavy modules imported at startup: {', '.join(heavy)}")
+    if best_total > args.budget_ms:
+        failures.append(f"Import time {best_total:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+
+    if failures:
+        for failure in failures:
+            print(f"✗ {failure}")
+        sys.exit(1)
+    print("✓ Startup import time within budget")
+
+
+if __name__ == "__main__":
+    main()
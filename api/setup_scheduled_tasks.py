@@ -13,25 +13,21 @@ django.setup()
 
 from django_q.models import Schedule
 
+# Replaced by 'Fetch External Data', which fetches both APIs concurrently
+SUPERSEDED_TASKS = ['Fetch Carbon Intensity', 'Fetch Weather Data']
+
 
 def setup_tasks():
     """Create scheduled tasks for external API data fetching."""
     
     tasks = [
         {
-            'name': 'Fetch Carbon Intensity',
-            'func': 'data_pipeline.tasks.fetch_carbon_intensity',
+            'name': 'Fetch External Data',
+            'func': 'data_pipeline.tasks.fetch_external_data',
             'schedule_type': Schedule.MINUTES,
             'minutes': 15,
             'repeats': -1,  # Infinite repeats
         },
-        {
-            'name': 'Fetch Weather Data',
-            'func': 'data_pipeline.tasks.fetch_weather_data',
-            'schedule_type': Schedule.MINUTES,
-            'minutes': 15,
-            'repeats': -1,
-        },
         {
             'name': 'Cleanup Old Data',
             'func': 'data_pipeline.tasks.cleanup_old_data',
@@ -40,6 +36,10 @@ def setup_tasks():
         },
     ]
     
+    deleted, _ = Schedule.objects.filter(name__in=SUPERSEDED_TASKS).delete()
+    if deleted:
+        print(f"✓ Removed {deleted} superseded task(s): {', '.join(SUPERSEDED_TASKS)}")
+    
     for task_config in tasks:
         schedule, created = Schedule.objects.get_or_create(
             name=task_config['name'],
@@ -1,23 +1,42 @@
-import requests
-import time
+import asyncio
+import json
+
+import aiohttp
+
+# AI decisions are computed by `python manage.py ai_worker` and pushed to
+# this WebSocket as they are made; nothing here polls /api/ai/decide/.
+DECISIONS_URL = 'ws://localhost:8000/ws/decisions/'
+RECONNECT_DELAY = 5
 
-print("Starting AI Decision Loop...")
-print("Press Ctrl+C to stop.")
 
-while True:
-    try:
-        # CORRECTED URL: Changed 'predictions' to 'ai'
-        response = requests.post('http://localhost:8000/api/ai/decide/')
+async def follow_decisions():
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.ws_connect(DECISIONS_URL, heartbeat=30) as ws:
+                    print(f"Connected to {DECISIONS_URL}")
+                    async for message in ws:
+                        if message.type != aiohttp.WSMsgType.TEXT:
+                            continue
+                        event = json.loads(message.data)
+                        data = event.get('data', {})
+                        if event.get('type') == 'ai_decision':
+                            rec = data.get('recommendation', 'No recommendation')
+                            print(f"✅ AI Update: {rec}")
+                        else:
+                            print(f"📡 {event.get('type')}: {data.get('recommendation', '')}")
 
-        if response.status_code == 200:
-            data = response.json()
-            rec = data.get('recommendation', 'No recommendation')
-            print(f"✅ AI Update: {rec}")
-        else:
-            print(f"⚠ API Error: {response.status_code} - {response.text}")
+            except aiohttp.ClientError as e:
+                print(f"❌ Connection Failed: {e}")
 
-    except Exception as e:
-        print(f"❌ Connection Failed: {e}")
+            print(f"Reconnecting in {RECONNECT_DELAY} seconds...")
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+print("Following AI decisions (start `python manage.py ai_worker` to produce them)...")
+print("Press Ctrl+C to stop.")
 
-    # Wait 10 seconds before next decision
-    time.sleep(10)
\ No newline at end of file
+try:
+    asyncio.run(follow_decisions())
+except KeyboardInterrupt:
+    pass